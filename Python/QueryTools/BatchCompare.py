@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+import csv
+import hashlib
+import json
+from array import array
+
+import unreal
+import Utilities
+
+from . import Utils
+from .CrumbHistory import ObjectRef
+from .DetailDiff import remove_address_str
+
+MISSING = 0  # fingerprint of the objects which don't have the attribute
+
+
+def fingerprint(value_str):
+    """ 64 bits hash of the value string, never equals MISSING """
+    fp = int.from_bytes(hashlib.blake2b(value_str.encode("utf-8", "replace"), digest_size=8).digest(), "little", signed=True)
+    return fp if fp != MISSING else 1
+
+
+class BatchCompare(object):
+    """
+    Introspect N objects in one pass, and compare their values as a property x object matrix.
+    Only a 64 bits fingerprint is kept for each cell, the value strings are kept once per distinct value of a property,
+    so the memory is bounded for thousands of objects. The attr_meta is shared by the objects of the same class.
+    The values beyond max_samples_per_property are evaluated again from the objects when exporting.
+    """
+    def __init__(self, kinds=Utils.EAttrKind.EDITOR_PROPERTY | Utils.EAttrKind.OTHER_PROPERTY, name_filter=None
+                 , max_samples_per_property=64):
+        """
+        :param kinds: the EAttrKind of attributes to compare, the functions with params are always skipped
+        :param name_filter: only compare the attributes whose names contain it
+        :param max_samples_per_property: at most how many distinct value strings are kept for each property
+        """
+        self.kinds = int(kinds)
+        self.name_filter = name_filter.lower() if name_filter else None
+        self.max_samples_per_property = max_samples_per_property
+        self.labels = []            # one label per object
+        self.refs = []              # one ObjectRef per object, for evaluating the values which aren't sampled
+        self.names = []             # property names, in first seen order
+        self.fingerprints = {}      # {name: array('q')}, one fingerprint per object
+        self.samples = {}           # {name: {fingerprint: value string}}
+
+    def _accept(self, meta:Utils.attr_meta):
+        if meta.param_str:
+            return False
+        if not meta.kind_flags & self.kinds:
+            return False
+        if self.name_filter and self.name_filter not in meta.name.lower():
+            return False
+        return True
+
+    def add(self, obj, label=None):
+        """ Introspect obj and append it as a new column """
+        column = len(self.labels)
+        if label is None:
+            label = obj.get_path_name() if isinstance(obj, unreal.Object) else f"{obj}"
+        self.labels.append(label)
+        self.refs.append(ObjectRef(obj))
+
+        table = Utils.AttributeTable(obj, lazy=True)
+        for i, meta in enumerate(table.metas):
+            if not self._accept(meta):
+                continue
+            name = meta.name
+            column_fps = self.fingerprints.get(name, None)
+            if column_fps is None:
+                column_fps = array('q', [MISSING] * column)
+                self.fingerprints[name] = column_fps
+                self.samples[name] = {}
+                self.names.append(name)
+            value_str = remove_address_str("{}".format(table.result(i)))
+            fp = fingerprint(value_str)
+            column_fps.append(fp)
+            samples = self.samples[name]
+            if fp not in samples and len(samples) < self.max_samples_per_property:
+                samples[fp] = value_str
+        table.release()
+
+        # the properties which obj doesn't have
+        for name in self.names:
+            column_fps = self.fingerprints[name]
+            if len(column_fps) == column:
+                column_fps.append(MISSING)
+
+    def run(self, objs, bShowProgress=True):
+        if not bShowProgress:
+            for obj in objs:
+                self.add(obj)
+            return self
+        with unreal.ScopedSlowTask(len(objs), "Comparing Objects") as slow_task:
+            slow_task.make_dialog(True)
+            for obj in objs:
+                if slow_task.should_cancel():
+                    break
+                slow_task.enter_progress_frame(1, f"Introspecting: {obj}")
+                self.add(obj)
+        return self
+
+    def is_differ(self, name):
+        fps = self.fingerprints[name]
+        first = fps[0] if fps else MISSING
+        return any(fp != first for fp in fps)
+
+    def differing_names(self):
+        return [name for name in self.names if self.is_differ(name)]
+
+    def _get_sample(self, name, fp, materialized=None):
+        value_str = self.samples[name].get(fp, None)
+        if value_str is None and materialized:
+            value_str = materialized[name].get(fp, None)
+        return value_str if value_str is not None else f"<value #{fp & 0xFFFFFFFF:08x}>"
+
+    def get_cell(self, name, column, materialized=None):
+        fp = self.fingerprints[name][column]
+        if fp == MISSING:
+            return ""
+        return self._get_sample(name, fp, materialized)
+
+    def materialize(self, names):
+        """
+        The value strings of names which weren't sampled, evaluated again from the objects in a second pass, only one
+        object per distinct value. The values which changed since add, or whose objects are gone, aren't found.
+        :return: {name: {fingerprint: value string}}
+        """
+        result = {name: {} for name in names}
+        names_by_column = {}
+        for name in names:
+            samples = self.samples[name]
+            wanted = set()
+            for column, fp in enumerate(self.fingerprints[name]):
+                if fp != MISSING and fp not in samples and fp not in wanted:
+                    wanted.add(fp)
+                    names_by_column.setdefault(column, []).append(name)
+        for column, column_names in names_by_column.items():
+            obj = self.refs[column].get()
+            if obj is None:
+                continue
+            table = Utils.AttributeTable(obj, lazy=True)
+            for name in column_names:
+                i = table.index_of(name)
+                if i == -1:
+                    continue
+                value_str = remove_address_str("{}".format(table.result(i)))
+                fp = fingerprint(value_str)
+                if fp == self.fingerprints[name][column]:
+                    result[name][fp] = value_str
+            table.release()
+        return result
+
+    def summary(self):
+        return {"objects": len(self.labels), "properties": len(self.names), "differing": len(self.differing_names())}
+
+    def export_csv(self, file_path, bOnlyDiffering=True):
+        """ One row per property, one column per object """
+        names = self.differing_names() if bOnlyDiffering else self.names
+        materialized = self.materialize(names)
+        with open(file_path, 'w', encoding="utf-8", newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["property", "differ"] + self.labels)
+            for name in names:
+                writer.writerow([name, self.is_differ(name)]
+                                + [self.get_cell(name, c, materialized) for c in range(len(self.labels))])
+        return len(names)
+
+    def export_json(self, file_path, bOnlyDiffering=True):
+        """ The cells of the same value share one index in "values", so the file stays small for same values """
+        names = self.differing_names() if bOnlyDiffering else self.names
+        materialized = self.materialize(names)
+        properties = {}
+        for name in names:
+            fps = self.fingerprints[name]
+            distinct = list(dict.fromkeys(fp for fp in fps))
+            index_of = {fp: i for i, fp in enumerate(distinct)}
+            properties[name] = {"differ": self.is_differ(name)
+                , "values": [self._get_sample(name, fp, materialized) if fp != MISSING else None for fp in distinct]
+                , "cells": [index_of[fp] for fp in fps]}
+        with open(file_path, 'w', encoding="utf-8") as f:
+            json.dump({"objects": self.labels, "properties": properties}, f, indent=1)
+        return len(names)
+
+
+def compare_selected_actors(csv_path=None, **kwargs):
+    result = BatchCompare(**kwargs).run(Utilities.Utils.get_selected_actors())
+    print(result.summary())
+    if csv_path:
+        result.export_csv(csv_path)
+    return result
+
+
+def compare_selected_assets(csv_path=None, **kwargs):
+    result = BatchCompare(**kwargs).run(Utilities.Utils.get_selected_assets())
+    print(result.summary())
+    if csv_path:
+        result.export_csv(csv_path)
+    return result
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import gc
+import time
+import tracemalloc
+
+import unreal
+from Utilities import DocParser
+
+from . import Utils
+
+
+class _dict_attr_record(object):
+    # same fields as attr_detail before it had __slots__, used as the baseline of bench_attribute_memory
+    def __init__(self, attr):
+        self.name = attr.name
+        self.bCallable = attr.bCallable
+        self.bCallable_builtin = attr.bCallable_builtin
+        self.bProperty = attr.bProperty
+        self.result = attr.result
+        self.param_str = attr.param_str
+        self.bEditorProperty = attr.bEditorProperty
+        self.return_type_str = attr.return_type_str
+        self.doc_str = attr.doc_str
+        self.property_rw = attr.property_rw
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    t = time.perf_counter()
+    kept = build()
+    seconds = time.perf_counter() - t
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current, seconds
+
+
+def bench_attribute_memory(objs, bPrint=True):
+    """
+    Compare the memory of keeping the introspection results of objs, as dict based records (the old attr_detail),
+    attr_detail with __slots__ and AttributeTable. The values are all evaluated, and the class meta is warmed up first.
+    :param objs: the objects to introspect, like the selected actors, or [obj] * 1000
+    :return: {name: (bytes, seconds)}
+    """
+    for obj in objs:
+        Utils.get_class_meta(obj)
+
+    result = {
+        "dict records": _measure(lambda: [[_dict_attr_record(attr) for attr in Utils.ll(obj)] for obj in objs]),
+        "attr_detail": _measure(lambda: [Utils.ll(obj) for obj in objs]),
+        "AttributeTable": _measure(lambda: [Utils.AttributeTable(obj, lazy=False) for obj in objs]),
+    }
+    if bPrint:
+        base = result["dict records"][0]
+        for name, (size, seconds) in result.items():
+            print(f"{name:>16}: {size / 1024:10.1f} KB  {size / base * 100 if base else 0:6.1f}%  {seconds:.3f}s")
+    return result
+
+
+def _legacy_get_editor_properties(content, obj):
+    # _getEditorProperties of QueryTools.Utils before DocParser, unchanged, the baseline of bench_doc_parser
+    # print("Content: {}".format(content))
+
+    lines = content.split('\r')
+    signFound = False
+    allInfoFound = False
+    result = []
+    for line in lines:
+        if not signFound and '**Editor Properties:**' in line:
+            signFound = True
+        if signFound:
+            #todo re
+            # nameS, nameE = line.find('``') + 2, line.find('`` ')
+            nameS, nameE = line.find('- ``') + 4, line.find('`` ')
+            if nameS == -1 or nameE == -1:
+                continue
+            typeS, typeE = line.find('(') + 1, line.find(')')
+            if typeS == -1 or typeE == -1:
+                continue
+            rwS, rwE = line.find('[') + 1, line.find(']')
+            if rwS == -1 or rwE == -1:
+                continue
+            name = line[nameS: nameE]
+            type_str = line[typeS: typeE]
+            rws = line[rwS: rwE]
+            descript = line[rwE + 2:]
+            allInfoFound = True
+            result.append((name, type_str, rws, descript))
+            # print(name, type, rws)
+    if signFound:
+        if not allInfoFound:
+            unreal.log_warning("not all info found {}".format(obj))
+    else:
+        unreal.log_warning("can't find editor properties in {}".format(obj))
+    return result
+
+
+def _get_unreal_class_docs(max_count):
+    docs = []
+    for name in dir(unreal):
+        cls = getattr(unreal, name, None)
+        # only the docs with the section, the parsers warn about the others
+        if isinstance(cls, type) and issubclass(cls, unreal.Object) and cls.__doc__ \
+                and DocParser.EDITOR_PROPERTIES_SIGN in cls.__doc__:
+            docs.append(cls.__doc__)
+            if len(docs) >= max_count:
+                break
+    return docs
+
+
+def bench_doc_parser(docs=None, repeat=3, bPrint=True):
+    """
+    Throughput of the editor properties parsers, in doc lines per second.
+    :param docs: the docs to parse, the docs of the first 500 unreal classes by default
+    :return: {name: lines per second}
+    """
+    if docs is None:
+        docs = _get_unreal_class_docs(500)
+    line_count = sum(doc.count('\n') + 1 for doc in docs)
+    parsers = {"legacy": lambda doc: _legacy_get_editor_properties(doc, None)
+        , "DocParser": lambda doc: DocParser.get_editor_properties(doc, None)}
+    result = {}
+    for name, parse in parsers.items():
+        best = None
+        for _ in range(repeat):
+            t = time.perf_counter()
+            for doc in docs:
+                parse(doc)
+            seconds = time.perf_counter() - t
+            best = seconds if best is None else min(best, seconds)
+        result[name] = line_count / best if best else 0
+    if bPrint:
+        for name, lines_per_second in result.items():
+            print(f"{name:>16}: {lines_per_second:12,.0f} lines/s  ({len(docs)} docs, {line_count} lines)")
+    return result
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+import unreal
+
+from .ClassMetaStore import get_version_key
+
+POLICY_NORMAL = 0       # timed, the call is guarded by the pending marker
+POLICY_ALLOW = 1        # proven cheap, no pending marker any more
+POLICY_SKIP_SLOW = 2    # slower than slow_threshold, skipped
+POLICY_SKIP_CRASH = 3   # the editor crashed while calling it, skipped
+POLICY_SUSPECT = 4      # in flight in a batch when the editor crashed, called alone with its own pending marker
+
+RECENT_COUNT = 5        # the latest durations kept by CallStats, for the median
+
+
+class CallStats(object):
+    """ The measured cost of one zero-arg getter of one class, shared by the attr_meta of the class """
+    __slots__ = ("class_key", "name", "count", "total_seconds", "max_seconds", "errors", "policy", "recent")
+
+    def __init__(self, class_key, name):
+        self.class_key = class_key
+        self.name = name
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.errors = 0
+        self.policy = POLICY_NORMAL
+        self.recent = []    # the latest RECENT_COUNT durations
+
+    @property
+    def mean_seconds(self):
+        return self.total_seconds / self.count if self.count else 0.0
+
+    @property
+    def median_seconds(self):
+        return statistics.median(self.recent) if self.recent else 0.0
+
+    @property
+    def bSkipped(self):
+        return self.policy == POLICY_SKIP_SLOW or self.policy == POLICY_SKIP_CRASH
+
+    def get_skip_reason(self):
+        if self.policy == POLICY_SKIP_SLOW:
+            return f"skip call, slow: {self.median_seconds * 1000:.1f}ms"
+        if self.policy == POLICY_SKIP_CRASH:
+            return "skip call, crashed before."
+        return None
+
+    def to_record(self):
+        return [self.count, self.total_seconds, self.max_seconds, self.errors, self.policy, self.recent]
+
+    def from_record(self, record):
+        self.count, self.total_seconds, self.max_seconds, self.errors, self.policy = record[:5]
+        self.recent = list(record[5]) if len(record) > 5 else []
+
+
+def get_default_policy_path():
+    return os.path.join(unreal.Paths.project_saved_dir(), "TAPython", "CallPolicy.json")
+
+
+class CallPolicy(object):
+    """
+    Times the zero-arg getters called by the introspection and keeps a per class policy across editor sessions:
+    the slow getters are skipped, the getters which crashed the editor are skipped, and the cheap ones are allow-listed.
+    A crash is detected by a pending marker file, which holds the getters being called and is emptied after them,
+    so a non-empty marker at startup means the last session died in one of them. In a batch, the marker is written
+    once with all the getters of the batch. When the crash can't be pinned to one getter, they become suspects,
+    and each of them is called alone with its own marker next time.
+    A getter is skipped as slow when the median of its latest calls is over slow_threshold, not by a single sample.
+    Use reset to call the skipped getters again.
+    """
+    def __init__(self, file_path=None, version_key=None):
+        self.file_path = file_path if file_path else get_default_policy_path()
+        self.pending_path = os.path.splitext(self.file_path)[0] + ".pending"
+        self.version_key = version_key if version_key else get_version_key()
+        self.slow_threshold = 0.05      # seconds, the getters slower than it are skipped
+        self.cheap_threshold = 0.001    # seconds, the getters always faster than it are allow-listed
+        self.cheap_count = 3            # after how many calls a cheap getter is allow-listed
+        self.slow_count = 3             # at least how many samples before a getter is skipped as slow
+        self.stats = {}                 # {class_key: {name: CallStats}}
+        self.bDirty = False
+        self.last_save_time = 0
+        self._lock = threading.RLock()  # only held to update the pending marker, and for the getters called alone
+        self._batch = {}                # {CallStats: None} in the pending marker of the open batches
+        self._batch_count = 0           # count of the open batches, of all threads
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.file_path):
+                with open(self.file_path, 'r', encoding="utf-8") as f:
+                    content = json.load(f)
+                if content.get("version", None) == self.version_key:
+                    for class_key, records in content.get("classes", {}).items():
+                        for name, record in records.items():
+                            self.get_stats(class_key, name).from_record(record)
+        except Exception as e:
+            unreal.log_warning(f"CallPolicy load failed: {e}")
+        self._check_pending()
+
+    def _check_pending(self):
+        try:
+            if not os.path.exists(self.pending_path):
+                return
+            with open(self.pending_path, 'r', encoding="utf-8") as f:
+                pending = f.read()
+            lines = [line for line in pending.splitlines() if line]
+            if lines:
+                alone = [line[1:] for line in lines if line.startswith("!")]
+                if alone or len(lines) == 1:
+                    # the getter called alone is always the last in flight
+                    class_key, name = (alone[-1] if alone else lines[0]).split('\t', 1)
+                    self.get_stats(class_key, name).policy = POLICY_SKIP_CRASH
+                    unreal.log_warning(f"{class_key}.{name} crashed the editor last time, it will be skipped.")
+                else:
+                    for line in lines:
+                        class_key, name = line.split('\t', 1)
+                        stats = self.get_stats(class_key, name)
+                        if not stats.bSkipped:
+                            stats.policy = POLICY_SUSPECT
+                    unreal.log_warning(f"The editor crashed last time in one of {len(lines)} getters, "
+                                       f"they will be called one by one to find it.")
+                self._clear_pending()
+                self.save()
+        except Exception as e:
+            unreal.log_warning(f"CallPolicy check pending failed: {e}")
+
+    def _write_pending(self, batch, alone=None):
+        lines = [f"{stats.class_key}\t{stats.name}" for stats in batch] if batch else []
+        if alone is not None:
+            lines.append(f"!{alone.class_key}\t{alone.name}")
+        with open(self.pending_path, 'w', encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+    def _clear_pending(self):
+        with open(self.pending_path, 'w', encoding="utf-8"):
+            pass
+
+    @contextmanager
+    def batch(self, stats_list):
+        """
+        Write the pending marker once for the getters which may be called in this batch, instead of once per call.
+        The getters not in the batch, and the suspects, still get their own marker. The batches which are open at the
+        same time, nested or in other threads, share one marker, it's emptied when the last of them is closed.
+        """
+        with self._lock:
+            added = [stats for stats in stats_list if stats.policy == POLICY_NORMAL and stats not in self._batch]
+            self._batch.update(dict.fromkeys(added))
+            self._batch_count += 1
+            if added:
+                self._write_pending(self._batch)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._batch_count -= 1
+                if self._batch_count == 0:
+                    if self._batch:
+                        self._clear_pending()
+                    self._batch = {}
+
+    def get_stats(self, class_key, name) -> CallStats:
+        records = self.stats.get(class_key, None)
+        if records is None:
+            records = self.stats[class_key] = {}
+        stats = records.get(name, None)
+        if stats is None:
+            stats = records[name] = CallStats(class_key, name)
+        return stats
+
+    def call(self, stats:CallStats, fn):
+        """ Call fn and record its cost into stats, the caller should check stats.bSkipped first """
+        if stats.policy == POLICY_ALLOW or (stats.policy == POLICY_NORMAL and stats in self._batch):
+            return self._timed_call(stats, fn)
+        with self._lock:
+            batch = self._batch
+            self._write_pending(batch, alone=stats)
+            try:
+                result = self._timed_call(stats, fn)
+                if stats.policy == POLICY_SUSPECT:
+                    stats.policy = POLICY_NORMAL  # it's not the one which crashed
+                return result
+            finally:
+                if batch:
+                    self._write_pending(batch)
+                else:
+                    self._clear_pending()
+
+    def _timed_call(self, stats:CallStats, fn):
+        t = time.perf_counter()
+        try:
+            return fn()
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            self.record(stats, time.perf_counter() - t)
+
+    def record(self, stats:CallStats, seconds):
+        stats.count += 1
+        stats.total_seconds += seconds
+        if seconds > stats.max_seconds:
+            stats.max_seconds = seconds
+        stats.recent.append(seconds)
+        if len(stats.recent) > RECENT_COUNT:
+            del stats.recent[0]
+        if len(stats.recent) >= self.slow_count and stats.median_seconds > self.slow_threshold:
+            stats.policy = POLICY_SKIP_SLOW
+        elif stats.policy == POLICY_NORMAL and stats.count >= self.cheap_count \
+                and stats.max_seconds < self.cheap_threshold:
+            stats.policy = POLICY_ALLOW
+        self.bDirty = True
+
+    def reset(self, class_key=None, name=None):
+        """ Forget the stats, all of them, or the ones of class_key, or one getter. :return: reset count """
+        targets = []
+        for key, records in self.stats.items():
+            if class_key is not None and key != class_key:
+                continue
+            targets.extend(stats for stats in records.values() if name is None or stats.name == name)
+        for stats in targets:
+            stats.count = stats.errors = 0
+            stats.total_seconds = stats.max_seconds = 0.0
+            stats.recent = []
+            stats.policy = POLICY_NORMAL
+        if targets:
+            self.bDirty = True
+        return len(targets)
+
+    def get_slowest(self, count=20):
+        """ :return: [CallStats] sorted by max cost """
+        all_stats = [stats for records in self.stats.values() for stats in records.values() if stats.count]
+        return sorted(all_stats, key=lambda stats: stats.max_seconds, reverse=True)[:count]
+
+    def save(self):
+        content = {"version": self.version_key
+            , "classes": {class_key: {name: stats.to_record() for name, stats in records.items() if stats.count
+                                                                      or stats.policy != POLICY_NORMAL}
+                          for class_key, records in self.stats.items()}}
+        try:
+            with open(self.file_path, 'w', encoding="utf-8") as f:
+                json.dump(content, f, separators=(',', ':'))
+            self.bDirty = False
+        except Exception as e:
+            unreal.log_warning(f"CallPolicy save failed: {e}")
+        self.last_save_time = time.time()
+
+    def save_if_dirty(self, min_interval=5.0):
+        if self.bDirty and time.time() - self.last_save_time >= min_interval:
+            self.save()
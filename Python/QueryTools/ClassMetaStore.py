@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+import unreal
+
+FORMAT_VERSION = 2  # bump it when the record layout of attr_meta or the doc parsing changes
+
+
+def get_version_key():
+    """ The records are only valid for the same engine and TAPython, an upgrade of either starts a new set of records """
+    engine_version = unreal.SystemLibrary.get_engine_version()
+    try:
+        ta_version = dict(unreal.PythonBPLib.get_ta_python_version())
+    except Exception:
+        ta_version = {}
+    return f"{engine_version}|{json.dumps(ta_version, sort_keys=True)}|{FORMAT_VERSION}"
+
+
+def get_default_db_path():
+    return os.path.join(unreal.Paths.project_saved_dir(), "TAPython", "ClassMetaCache.sqlite")
+
+
+class ClassMetaStore(object):
+    """
+    On disk cache of the attr_meta records of unreal classes, so the __doc__ parsing isn't repeated every editor session.
+    The rows are keyed by (version key, class key). All the rows of the current version are read by a background
+    thread after the store was opened (warm_up), and they are decoded lazily per class in load.
+    """
+    def __init__(self, db_path=None, version_key=None):
+        self.db_path = db_path if db_path else get_default_db_path()
+        self.version_key = version_key if version_key else get_version_key()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._preloaded = {}            # {class key: compressed blob}, filled by warm_up
+        self._warm_thread = None
+        self._bWarmed = False
+
+    def _get_conn(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS class_meta"
+                               "(version TEXT, class_key TEXT, data BLOB, PRIMARY KEY (version, class_key))")
+            self._conn.commit()
+        return self._conn
+
+    def warm_up(self, bBlocking=False):
+        """ Read all the rows of current version in a background thread """
+        if self._bWarmed or self._warm_thread is not None:
+            return
+        self._warm_thread = threading.Thread(target=self._warm_up, name="ClassMetaStoreWarmUp", daemon=True)
+        self._warm_thread.start()
+        if bBlocking:
+            self._warm_thread.join()
+
+    def _warm_up(self):
+        try:
+            with self._lock:
+                rows = self._get_conn().execute("SELECT class_key, data FROM class_meta WHERE version = ?"
+                                                , (self.version_key,)).fetchall()
+                for class_key, data in rows:
+                    self._preloaded.setdefault(class_key, data)
+        except Exception as e:
+            unreal.log_warning(f"ClassMetaStore warm up failed: {e}")
+        self._bWarmed = True
+
+    def load(self, class_key):
+        """
+        :return: the records of class_key, None if not stored
+        """
+        with self._lock:
+            data = self._preloaded.pop(class_key, None)
+            if data is None and not self._bWarmed:
+                try:
+                    row = self._get_conn().execute("SELECT data FROM class_meta WHERE version = ? AND class_key = ?"
+                                                   , (self.version_key, class_key)).fetchone()
+                except Exception as e:
+                    unreal.log_warning(f"ClassMetaStore load failed: {e}")
+                    row = None
+                data = row[0] if row else None
+        if data is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(data).decode("utf-8"))
+        except Exception:
+            return None
+
+    def save(self, class_key, records):
+        data = zlib.compress(json.dumps(records, separators=(',', ':')).encode("utf-8"))
+        with self._lock:
+            try:
+                conn = self._get_conn()
+                conn.execute("INSERT OR REPLACE INTO class_meta (version, class_key, data) VALUES (?, ?, ?)"
+                             , (self.version_key, class_key, data))
+                conn.commit()
+            except Exception as e:
+                unreal.log_warning(f"ClassMetaStore save failed: {e}")
+
+    def clear(self, bAllVersions=False):
+        """ Remove the rows of current version, or all the rows. :return: removed count """
+        with self._lock:
+            self._preloaded.clear()
+            conn = self._get_conn()
+            if bAllVersions:
+                cursor = conn.execute("DELETE FROM class_meta")
+            else:
+                cursor = conn.execute("DELETE FROM class_meta WHERE version = ?", (self.version_key,))
+            conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        if self._warm_thread is not None:
+            self._warm_thread.join()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import collections
+import weakref
+
+import unreal
+
+
+class ObjectRef(object):
+    """
+    Reference an object without keeping it alive when possible.
+    unreal.Object: weak reference of the python wrapper, then find the object by its path name.
+    Other objects: weak reference if supported, otherwise a normal reference, like structs and builtin values.
+    """
+    def __init__(self, obj):
+        self._weak = None
+        self._strong = None
+        self._path = None
+        if isinstance(obj, unreal.Object):
+            try:
+                self._path = obj.get_path_name()
+            except Exception:
+                self._path = None
+        try:
+            self._weak = weakref.ref(obj)
+        except TypeError:
+            if self._path is None:
+                self._strong = obj
+
+    def get(self):
+        """ The referenced object, None if it has been garbage collected """
+        if self._weak is not None:
+            obj = self._weak()
+            if obj is not None:
+                return obj
+        if self._path:
+            return unreal.find_object(None, self._path)
+        return self._strong
+
+
+def is_world_object(obj):
+    """ Whether obj is in a world, or can't be checked any more, like a destroyed actor """
+    if isinstance(obj, unreal.Object):
+        try:
+            return bool(obj.get_world())
+        except Exception:
+            return True
+    return False
+
+
+class Crumb(object):
+    def __init__(self, obj, property_name):
+        self.ref = ObjectRef(obj)
+        self.property_name = property_name
+        self.detail = None  # the cached DetailData of this crumb, None if it hasn't been queried or was evicted
+
+    @property
+    def obj(self):
+        return self.ref.get()
+
+
+class CrumbHistory(object):
+    """
+    The navigation history of one side of ObjectDetailViewer. Each crumb caches its DetailData, so navigating back
+    needn't query the object again. The cached details are evicted by LRU, when the total count of their attributes
+    exceeds max_cached_attributes, or their estimated size exceeds max_cached_bytes.
+    Only the top crumb's detail keeps its object, the others are bound to crumb.obj again in get_detail.
+    """
+    def __init__(self, max_cached_attributes=20000, max_cached_bytes=64 * 1024 * 1024):
+        self.crumbs = []
+        self.max_cached_attributes = max_cached_attributes
+        self.max_cached_bytes = max_cached_bytes
+        self._lru = collections.OrderedDict()  # {id(crumb): crumb}, most recently used at the end
+
+    def __len__(self):
+        return len(self.crumbs)
+
+    def top(self) -> Crumb:
+        return self.crumbs[-1] if self.crumbs else None
+
+    def push(self, obj, property_name) -> Crumb:
+        previous = self.top()
+        if previous is not None and previous.detail is not None:
+            previous.detail.release_objects()
+        crumb = Crumb(obj, property_name)
+        self.crumbs.append(crumb)
+        return crumb
+
+    def truncate(self, count):
+        """ Remove the crumbs after the first count crumbs """
+        while len(self.crumbs) > count:
+            crumb = self.crumbs.pop()
+            self._drop_detail(crumb)
+
+    def clear(self):
+        self.truncate(0)
+
+    def set_detail(self, crumb:Crumb, detail):
+        crumb.detail = detail
+        if crumb is not self.top():
+            detail.release_objects()
+        self._touch(crumb)
+        self._evict()
+
+    def get_detail(self, crumb:Crumb):
+        if crumb.detail is not None:
+            obj = crumb.obj
+            if obj is None:
+                # collected while in the history, the unevaluated rows can't be evaluated any more
+                self._drop_detail(crumb)
+                return None
+            crumb.detail.bind_objects(obj)
+            self._touch(crumb)
+        return crumb.detail
+
+    def cached_attribute_count(self):
+        return sum(self._get_detail_size(crumb.detail) for crumb in self._lru.values())
+
+    def remove_world_objects(self):
+        """
+        Remove the crumbs from the first one whose object is in a world or has been garbage collected, called before
+        the world is torn down, so the history won't keep the objects in it alive.
+        :return: the count of removed crumbs
+        """
+        for i, crumb in enumerate(self.crumbs):
+            obj = crumb.obj
+            if obj is None or is_world_object(obj):
+                break
+        else:
+            return 0
+        count = len(self.crumbs) - i
+        self.truncate(i)
+        return count
+
+    def cached_bytes(self):
+        return sum(self._get_detail_bytes(crumb.detail) for crumb in self._lru.values())
+
+    @staticmethod
+    def _get_detail_bytes(detail):
+        return detail.estimate_bytes() if detail is not None else 0
+
+    @staticmethod
+    def _get_detail_size(detail):
+        return len(detail.attributes) if detail is not None and detail.attributes else 0
+
+    def _touch(self, crumb):
+        key = id(crumb)
+        if key in self._lru:
+            self._lru.move_to_end(key)
+        else:
+            self._lru[key] = crumb
+
+    def _drop_detail(self, crumb):
+        crumb.detail = None
+        self._lru.pop(id(crumb), None)
+
+    def _evict(self):
+        total = self.cached_attribute_count()
+        total_bytes = self.cached_bytes()
+        top = self.top()
+        for crumb in list(self._lru.values()):
+            if total <= self.max_cached_attributes and total_bytes <= self.max_cached_bytes:
+                break
+            if crumb is top:
+                continue
+            total -= self._get_detail_size(crumb.detail)
+            total_bytes -= self._get_detail_bytes(crumb.detail)
+            self._drop_detail(crumb)
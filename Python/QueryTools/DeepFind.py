@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import collections
+import time
+from collections import namedtuple
+
+import unreal
+
+from . import Utils
+
+DeepFindMatch = namedtuple("DeepFindMatch", ["path", "value_str", "depth"])
+
+
+class DeepFind(object):
+    """
+    Bounded breadth-first search in the property graph of an object, for the attributes whose name or value contain
+    the pattern. Only unreal Objects, structs and their arrays/maps are crawled, each object is visited once.
+    The attr_meta of each class is reused through Utils.get_class_meta, and the getters go through the CallPolicy.
+    """
+    def __init__(self, pattern, max_depth=4, time_budget=2.0, max_nodes=5000, max_items=64, bMatchName=True
+                 , bMatchValue=True, kinds=Utils.EAttrKind.EDITOR_PROPERTY | Utils.EAttrKind.OTHER_PROPERTY):
+        """
+        :param pattern: case insensitive sub string
+        :param max_depth: how many levels of sub objects are crawled
+        :param time_budget: seconds, the search stops after it, see bTimeout
+        :param max_nodes: at most how many objects are crawled
+        :param max_items: at most how many items of an array or map are crawled
+        :param kinds: the EAttrKind of attributes to crawl, add EAttrKind.BUILTIN to call the getters without params
+        """
+        self.pattern = pattern.lower()
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.max_nodes = max_nodes
+        self.max_items = max_items
+        self.bMatchName = bMatchName
+        self.bMatchValue = bMatchValue
+        self.kinds = int(kinds)
+        self.matches = []
+        self.visited_count = 0
+        self.bTimeout = False
+
+    @staticmethod
+    def _get_identity(obj):
+        # the python wrappers of one unreal object may differ, so the path name is used
+        if isinstance(obj, unreal.Object):
+            try:
+                return obj.get_path_name()
+            except Exception:
+                pass
+        return id(obj)
+
+    @staticmethod
+    def _is_crawlable(value):
+        return isinstance(value, (unreal.Object, unreal.StructBase))
+
+    def _accept(self, meta:Utils.attr_meta):
+        if meta.param_str or meta.name.startswith("_"):
+            return False
+        return bool(meta.kind_flags & self.kinds)
+
+    def _match(self, path, name, value, depth):
+        value_str = None
+        if self.bMatchValue:
+            value_str = "{}".format(value)
+        if (self.bMatchName and self.pattern in name.lower()) or (value_str and self.pattern in value_str.lower()):
+            if value_str is None:
+                value_str = "{}".format(value)
+            self.matches.append(DeepFindMatch(path, value_str[:200], depth))
+
+    def _iter_items(self, value):
+        if isinstance(value, (list, tuple, unreal.Array)):
+            for i, item in enumerate(value):
+                if i >= self.max_items:
+                    break
+                yield f"[{i}]", item
+        elif isinstance(value, (dict, unreal.Map)):
+            for i, (key, item) in enumerate(value.items()):
+                if i >= self.max_items:
+                    break
+                yield f"[{key!r}]", item
+
+    def run(self, root, root_name="root"):
+        deadline = time.perf_counter() + self.time_budget
+        visited = {self._get_identity(root): root}  # keep the visited objects alive, so their ids are not reused
+        queue = collections.deque([(root, root_name, 0)])
+        while queue:
+            if time.perf_counter() > deadline:
+                self.bTimeout = True
+                break
+            if self.visited_count >= self.max_nodes:
+                break
+            obj, path, depth = queue.popleft()
+            self.visited_count += 1
+            for meta in Utils.get_class_meta(obj):
+                if not self._accept(meta):
+                    continue
+                value = Utils.evaluate_attribute(obj, meta)
+                attr_path = f"{path}.{meta.name}"
+                self._match(attr_path, meta.name, value, depth + 1)
+                if depth + 1 >= self.max_depth:
+                    continue
+                children = [("", value)] if self._is_crawlable(value) else self._iter_items(value)
+                for suffix, child in children:
+                    child_path = attr_path + suffix
+                    if suffix and not self._is_crawlable(child):
+                        if self.bMatchValue:
+                            self._match(child_path, "", child, depth + 1)
+                        continue
+                    identity = self._get_identity(child)
+                    if identity in visited:
+                        continue
+                    visited[identity] = child
+                    queue.append((child, child_path, depth + 1))
+        return self.matches
+
+    def log(self, max_lines=200):
+        for match in self.matches[:max_lines]:
+            print(f"\t{match.path}: {match.value_str}")
+        print(f"{len(self.matches)} matches, {self.visited_count} objects visited{', timeout' if self.bTimeout else ''}.")
+
+
+def deep_find(root, pattern, bPrint=True, **kwargs):
+    """ See DeepFind for the kwargs. :return: [DeepFindMatch] """
+    finder = DeepFind(pattern, **kwargs)
+    finder.run(root)
+    if bPrint:
+        finder.log()
+    return finder.matches
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import re
+
+import unreal
+
+_address_re = re.compile(r'\(0x[0-9,A-Fa-f]{16}\)')
+
+
+def remove_address_str(strIn):
+    return _address_re.sub('', strIn)
+
+
+class DetailDiff(object):
+    """
+    Name indexed diff of two attr_detail lists, used by the compare mode of ObjectDetailViewer.
+    The indices are built once per query (see build), the changed state of each name is evaluated on demand and
+    memoized, so a filter change only costs O(filtered rows).
+    """
+    def __init__(self):
+        self.lefts = None
+        self.rights = None
+        self.counts = (0, 0)        # len of lefts and rights when built, the streamed query appends to them
+        self.left_by_name = {}
+        self.right_by_name = {}
+        self.added_names = []       # only in right
+        self.removed_names = []     # only in left
+        self._changed = {}          # {name: bool}
+        self._normalized = {}       # {id(attr): str}, value string without address
+
+    def is_built_for(self, lefts, rights):
+        return self.lefts is lefts and self.rights is rights \
+            and self.counts == (len(lefts) if lefts else 0, len(rights) if rights else 0)
+
+    def build(self, lefts, rights):
+        self.lefts = lefts
+        self.rights = rights
+        self.counts = (len(lefts) if lefts else 0, len(rights) if rights else 0)
+        self.left_by_name = {attr.name: attr for attr in lefts} if lefts else {}
+        self.right_by_name = {attr.name: attr for attr in rights} if rights else {}
+        self.added_names = [name for name in self.right_by_name if name not in self.left_by_name]
+        self.removed_names = [name for name in self.left_by_name if name not in self.right_by_name]
+        self._changed.clear()
+        self._normalized.clear()
+
+    def _get_normalized(self, attr):
+        key = id(attr)
+        s = self._normalized.get(key, None)
+        if s is None:
+            s = remove_address_str("{}".format(attr.result))
+            self._normalized[key] = s
+        return s
+
+    def is_changed(self, name):
+        """ Whether the attribute with name has different values in left and right, False if only one side has it """
+        changed = self._changed.get(name, None)
+        if changed is None:
+            left_attr = self.left_by_name.get(name, None)
+            right_attr = self.right_by_name.get(name, None)
+            changed = bool(left_attr and right_attr) and not self._is_same_value(left_attr, right_attr)
+            self._changed[name] = changed
+        return changed
+
+    def invalidate(self, name):
+        """ Forget the memoized changed state of name, after the value of either side was evaluated again """
+        self._changed.pop(name, None)
+        for attr in [self.left_by_name.get(name, None), self.right_by_name.get(name, None)]:
+            if attr is not None:
+                self._normalized.pop(id(attr), None)
+
+    def _is_same_value(self, left_attr, right_attr):
+        left, right = left_attr.result, right_attr.result
+        try:
+            if left == right:
+                return True
+        except Exception:
+            pass
+        if isinstance(right, unreal.Transform) and isinstance(left, unreal.Transform):
+            if right.is_near_equal(left, location_tolerance=1e-20, rotation_tolerance=1e-20, scale3d_tolerance=1e-20):
+                return True
+        # pointer noise, like "(0x000001B2C3D4E5F6)", is not a difference
+        return self._get_normalized(left_attr) == self._get_normalized(right_attr)
+
+    def diff_rows(self, left_rows, right_rows):
+        """
+        Get the row indices of changed attributes in the shown rows of both sides.
+        :return: (leftIDs, rightIDs)
+        """
+        right_row_by_name = {attr.name: j for j, attr in enumerate(right_rows)} if right_rows else {}
+        leftIDs = []
+        rightIDs = []
+        for i, left_attr in enumerate(left_rows or []):
+            j = right_row_by_name.get(left_attr.name, None)
+            if j is not None and self.is_changed(left_attr.name):
+                leftIDs.append(i)
+                rightIDs.append(j)
+        return leftIDs, rightIDs
+
+    def summary(self):
+        """ The counts of all the attributes, not only the shown rows. Values of both sides will be evaluated. """
+        changed_count = sum(1 for name in self.left_by_name if name in self.right_by_name and self.is_changed(name))
+        return {"added": len(self.added_names), "removed": len(self.removed_names), "changed": changed_count}
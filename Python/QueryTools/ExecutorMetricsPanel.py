@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+import unreal
+from Utilities.Utils import Singleton
+from Utilities import ChameleonTaskExecutor
+from Utilities.ExecutorMetrics import UtilizationSampler
+from Utilities.ExecutorService import get_executor_service
+
+
+class ExecutorMetricsPanel(metaclass=Singleton):
+    """ The queue depth, worker utilization and latency histograms of the ChameleonTaskExecutor of the tools """
+    def __init__(self, jsonPath):
+        self.jsonPath = jsonPath
+        self.data = unreal.PythonBPLib.get_chameleon_data(self.jsonPath)
+        self.ui_lanes = "ListViewLanes"
+        self.ui_executors = "ListViewExecutors"
+        self.ui_info_output = "InfoOutput"
+        self.refreshInterval = 0.5  # seconds
+        self.traceCapacity = 4096   # tasks kept by each executor when tracing
+        self.bTrace = False
+        self.lastRefreshTime = 0.0
+        self.sampler = UtilizationSampler(get_executor_service())
+        self.tick_handle = None
+
+    def on_open(self):
+        # called by InitPyCmd each time the panel is opened, the instance is reused after it's closed
+        self.data = unreal.PythonBPLib.get_chameleon_data(self.jsonPath)
+        self.sampler = UtilizationSampler(get_executor_service())
+        self.lastRefreshTime = 0.0
+        self.start_tick()
+
+    def on_close(self):
+        self.stop_tick()
+
+    def start_tick(self):
+        if self.tick_handle is None:
+            self.tick_handle = unreal.register_slate_post_tick_callback(self.on_tick)
+
+    def stop_tick(self):
+        if self.tick_handle is not None:
+            unreal.unregister_slate_post_tick_callback(self.tick_handle)
+            self.tick_handle = None
+
+    def on_tick(self, delta_seconds):
+        now = time.perf_counter()
+        if now - self.lastRefreshTime >= self.refreshInterval:
+            self.lastRefreshTime = now
+            self.refresh()
+
+    @staticmethod
+    def _ms_pair(histogram:dict):
+        return f"{histogram['p50_ms']:.2f} / {histogram['p99_ms']:.2f}"
+
+    def refresh(self):
+        items = []
+        for name, lane in self.sampler.sample().items():
+            items.extend([name, f"{lane['workers']}/{lane['max_workers']}", str(lane['queued']), str(lane['running'])
+                         , f"{lane['utilization'] * 100:.0f}%"])
+        self.data.set_list_view_multi_column_items(self.ui_lanes, items, 5)
+
+        items = []
+        for executor in ChameleonTaskExecutor.get_executors():
+            if self.bTrace and not executor.metrics.bTrace:
+                executor.set_metrics_trace(self.traceCapacity)  # the tools opened after the trace is on
+            metrics = executor.get_metrics()
+            items.extend([metrics["name"], str(metrics["pending"]), str(metrics["running"])
+                         , f"{metrics['succeeded']}/{metrics['failed']}/{metrics['cancelled']}"
+                         , self._ms_pair(metrics["queue_wait"]), self._ms_pair(metrics["run_time"])
+                         , self._ms_pair(metrics["callback_latency"])])
+        self.data.set_list_view_multi_column_items(self.ui_executors, items, 7)
+
+    def ui_on_checkbox_Trace_state_changed(self, is_checked):
+        self.bTrace = is_checked
+        for executor in ChameleonTaskExecutor.get_executors():
+            executor.set_metrics_trace(self.traceCapacity if is_checked else 0)
+
+    def on_button_Reset_click(self):
+        for executor in ChameleonTaskExecutor.get_executors():
+            executor.reset_metrics()
+        self.refresh()
+
+    def _get_dump_folder(self):
+        return os.path.join(unreal.Paths.project_saved_dir(), "TAPython", "Metrics", time.strftime('%Y%m%d_%H%M%S'))
+
+    def on_button_Dump_click(self):
+        folder = self._get_dump_folder()
+        for executor in ChameleonTaskExecutor.get_executors():
+            executor.dump_metrics(os.path.join(folder, f"{executor.metrics.name}.json"))
+            executor.dump_metrics(os.path.join(folder, f"{executor.metrics.name}.csv"))
+            if executor.metrics.bTrace:
+                executor.dump_metrics_trace(os.path.join(folder, f"{executor.metrics.name}_trace.json"))
+        self.data.set_text(self.ui_info_output, f"Metrics saved to: {folder}")
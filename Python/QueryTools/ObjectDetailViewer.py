@@ -3,23 +3,34 @@ import unreal
 import os
 from Utilities.Utils import Singleton
 from Utilities.Utils import cast
+from Utilities.ChameleonTaskExecutor import ChameleonTaskExecutor
 import Utilities
 import QueryTools
 import re
+import sys
+import time
 
 import types
 import collections
+import itertools
 from .import Utils
+from .import DetailDiff
+from .CrumbHistory import CrumbHistory, is_world_object
+from . import Snapshot
+from . import DeepFind
 
 global _r
 
 
 COLUMN_COUNT = 2
+MAX_VALUE_CELL_LENGTH = 200
+ROW_BYTES = 200     # about the size of an attr_detail with its slots, cache and search entries
+UNRESOLVED_VALUE_STR = "..."
 class DetailData(object):
+    # the query result of one crumb, cached in CrumbHistory
     def __init__(self):
         self.filter_str = ""
         self.filteredIndexToIndex = []
-        self.hisCrumbObjsAndNames = []  #list[(obj, propertyName)]
 
         self.attributes = None
         self.filtered_attributes = None
@@ -27,9 +38,102 @@ class DetailData(object):
         self.plains = []
         self.riches = []
         self.selected = set()
+        self.pendingLineIds = collections.deque()  # line ids which haven't been rendered, or their values haven't been evaluated
+        self.pendingLineSet = set()
+        self.backgroundLineIds = collections.deque()  # the pending line ids out of the window, rendered after it
+        self.cellsCache = {}  # {attribute index: [rich name, plain name, value cell or None]}
+        self.bWorkerResolving = False   # values are being evaluated in a worker thread, see start_worker_resolve
+        self.bWorkerCancelled = False
+        self.bPartial = False           # the rows are still being streamed by a QueryJob
+
+        # search index, built by build_search_index after each query
+        self.search_names = []      # lowercase display names
+        self.search_values = []     # lowercase display results, filled on demand
+        self.kind_masks = []        # Utils.EAttrKind flags
+        self.last_search = None     # (filter_str, hidden_mask, indices)
+
+        # watch mode, see ObjectDetailViewer.step_watch
+        self.watchFingerprints = {}     # {attribute index: hash of display result}
+        self.watchQueue = collections.deque()  # line ids to be evaluated in current round
+        self.watchChanged = {}          # {line id: time of change}, highlighted lines
+        self.lastWatchTime = 0
+
+    def release_objects(self):
+        # the crumb goes into the history, the lazy rows mustn't keep its object alive
+        self.bWorkerCancelled = True
+        for attr in self.attributes if self.attributes else []:
+            attr.release_object()
+
+    def bind_objects(self, obj):
+        for attr in self.attributes if self.attributes else []:
+            attr.bind_object(obj)
+
+    def estimate_bytes(self):
+        # a rough size for the LRU of CrumbHistory: the rendered cells, the rows and their evaluated values
+        size = sum(sys.getsizeof(cell) for cell in self.plains) + sum(sys.getsizeof(cell) for cell in self.riches)
+        for attr in self.attributes if self.attributes else []:
+            size += ROW_BYTES
+            if attr.bResolved:
+                size += sys.getsizeof(attr.result)
+        return size
+
+    def build_search_index(self):
+        attributes = self.attributes if self.attributes else []
+        self.search_names = [attr.display_name.lower() for attr in attributes]
+        self.search_values = [None] * len(attributes)
+        self.kind_masks = [attr.kind_flags for attr in attributes]
+        self.last_search = None
+
+    def get_search_value(self, index):
+        value = self.search_values[index]
+        if value is None:
+            value = self.attributes[index].display_result.lower()
+            self.search_values[index] = value
+        return value
+
+    def search(self, filter_str, hidden_mask):
+        """
+        Get the indices of attributes which match filter_str and none of their kinds are in hidden_mask.
+        If filter_str extends the last one, only the last result will be searched.
+        """
+        filter_str = filter_str.lower() if filter_str else ""
+        if self.last_search and self.last_search[1] == hidden_mask and filter_str.startswith(self.last_search[0]):
+            candidates = self.last_search[2]
+        else:
+            candidates = range(len(self.search_names))
 
+        result = self._match(candidates, filter_str, hidden_mask)
+        self.last_search = (filter_str, hidden_mask, result)
+        return result
 
-
+    def _match(self, candidates, filter_str, hidden_mask):
+        result = []
+        # the pending marker of CallPolicy is written once for the lazy values which may be evaluated for searching
+        metas = [self.attributes[i].meta for i in candidates if not self.attributes[i].bResolved] if filter_str else []
+        with Utils.call_batch(metas):
+            for i in candidates:
+                if self.kind_masks[i] & hidden_mask:
+                    continue
+                if filter_str:
+                    # match the name first, so the lazy values only be evaluated when name is not matched
+                    if filter_str not in self.search_names[i] and filter_str not in self.get_search_value(i):
+                        continue
+                result.append(i)
+        return result
+
+    def append_attributes(self, attributes, hidden_mask):
+        """ Append the attributes streamed by a QueryJob and filter them, return the count of the new lines """
+        start = len(self.attributes)
+        self.attributes.extend(attributes)
+        self.search_names.extend(attr.display_name.lower() for attr in attributes)
+        self.search_values.extend([None] * len(attributes))
+        self.kind_masks.extend(attr.kind_flags for attr in attributes)
+        self.last_search = None
+        filter_str = self.filter_str.lower() if self.filter_str else ""
+        indices = self._match(range(start, len(self.attributes)), filter_str, hidden_mask)
+        self.filtered_attributes.extend(self.attributes[i] for i in indices)
+        self.filteredIndexToIndex.extend(indices)
+        return len(indices)
 
     def check_line_id(self, line_id, column_count):
         from_line = line_id * column_count
@@ -49,6 +153,48 @@ class DetailData(object):
         assert self.check_line_id(line_id, column_count), "check line id failed."
         return self.riches[line_id * 2: line_id * 2 + 2]
 
+    def get_items(self):
+        # the items of the whole list, the selected lines are in plain text
+        if not self.selected:
+            return self.riches
+        items = list(self.riches)
+        for line_id in self.selected:
+            items[line_id * 2: line_id * 2 + 2] = self.plains[line_id * 2: line_id * 2 + 2]
+        return items
+
+
+
+
+class QueryJob(object):
+    # a time sliced query of one side, stepped by ObjectDetailViewer.on_tick in async query mode,
+    # the attributes are pushed in batches while they are collected, see ObjectDetailViewer.push_query_batch
+    def __init__(self, obj, propertyName, bPush):
+        self.obj = obj
+        self.propertyName = propertyName
+        self.bPush = bPush
+        self.total = max(1, len(dir(obj)))  # names only, cheap
+        self.attributes = []
+        self.data = None        # the DetailData of the pushed rows, None before the first batch
+        self.pushedCount = 0
+        self._metas = Utils.iter_class_meta(obj)
+
+    def take_new_attributes(self):
+        attributes = self.attributes[self.pushedCount:]
+        self.pushedCount = len(self.attributes)
+        return attributes
+
+    def step(self, deadline) -> bool:
+        """ Collect the attributes until deadline, return True when all attributes have been collected """
+        for meta in self._metas:
+            self.attributes.append(Utils.attr_detail(self.obj, meta.name, meta, lazy=True))
+            if time.perf_counter() > deadline:
+                return False
+        return True
+
+    @property
+    def done_count(self):
+        return min(len(self.attributes), self.total)
+
 
 
 
@@ -76,19 +222,68 @@ class ObjectDetailViewer(metaclass=Singleton):
         self.ui_rightButtonsGroup = "RightButtonsGroup"  # used for compare mode
         self.ui_rightListGroup = "RightListGroup"
         self.ui_refreshButtonGroup = "RefreshButtonGroup"
-
+        self.ui_checkbox_lazy_evaluation = "CheckBoxLazyEvaluation"
+        self.ui_progress_bar = "QueryProgressBar"
+
+        self.tick_handle = None
+        self.queryJobs = {}  # {bRight: QueryJob}
+        self.executor = None
+        self.pendingSearchTexts = {}  # {bRight: text}, text changed events are coalesced and applied in next tick
+        self.resolveBudgetPerTick = 0.008  # seconds, for evaluating the lazy attributes in each tick
+        self.rowWindowSize = 60     # virtual rows: the rows in the window are rendered first, in next ticks,
+        self.rowWindowMargin = 40   # the other rows after them, or at once when they are selected or searched
+        self.watchInterval = 0.5            # seconds, between the rounds of evaluating the watched rows
+        self.watchBudgetPerTick = 0.004     # seconds
+        self.watchHighlightSeconds = 1.5    # how long the changed rows are highlighted
         self.reset()
 
     def on_close(self):
         self.reset()
+        if self.executor:
+            self.executor.close()
+        policy = Utils.get_call_policy()
+        if policy and policy.bDirty:
+            policy.save()
 
     def on_map_changed(self, map_change_type_str):
         # remove the reference, avoid memory leaking when load another map.
         if map_change_type_str == "TearDownWorld":
-            self.reset(bResetParameter=False)
+            self.evict_world_objects()
         else:
             pass # skip: LoadMap, SaveMap, NewMap
 
+    def evict_world_objects(self):
+        # only the crumbs of objects in the world are removed, the crumbs of assets are kept.
+        self.differ = DetailDiff.DetailDiff()
+        for bRight in [False, True]:
+            job = self.queryJobs.get(bRight, None)
+            bJobEvicted = job is not None and is_world_object(job.obj)
+            if bJobEvicted:
+                self.cancel_query(bRight)
+            history = self.get_history(bRight)
+            if history.remove_world_objects() == 0 and not bJobEvicted:
+                continue
+            ui_breadcrumb = self.ui_hisObjsBreadcrumbRight if bRight else self.ui_hisObjsBreadcrumbLeft
+            while self.data.get_breadcrumbs_count_string(ui_breadcrumb) > len(history):
+                self.data.pop_breadcrumb_string(ui_breadcrumb)
+            if len(history) == 0:
+                self.set_side_data(DetailData(), bRight)
+                self.data.set_list_view_multi_column_items(self.ui_detailListRight if bRight else self.ui_detailListLeft, [], 2)
+                self.data.set_text(self.ui_labelRight if bRight else self.ui_labelLeft, "")
+            else:
+                self.show_crumb(history.top(), bRight)
+        self.apply_compare_if_needed()
+        self.update_log_text(bRight=False)
+
+    def get_history(self, bRight) -> CrumbHistory:
+        return self.rightHistory if bRight else self.leftHistory
+
+    def set_side_data(self, data:DetailData, bRight):
+        if bRight:
+            self.right = data
+        else:
+            self.left = data
+
     def reset(self, bResetParameter=True):
         if bResetParameter:
             self.showBuiltin = True
@@ -98,8 +293,19 @@ class ObjectDetailViewer(metaclass=Singleton):
             self.showParamFunction = True
 
             self.compareMode = False
+            self.lazyEvaluation = True
+            self.virtualRows = True
+            self.asyncQuery = False
+            self.showCallCost = False
+            self.bWatching = False
+        for bRight in list(self.queryJobs.keys()):
+            self.cancel_query(bRight)
+        self.stop_tick()
+        self.pendingSearchTexts = {}
         self.left = None
         self.right = None
+        self.leftHistory = CrumbHistory()
+        self.rightHistory = CrumbHistory()
         self.leftSearchText = ""
         self.rightSearchText = ""
 
@@ -107,9 +313,199 @@ class ObjectDetailViewer(metaclass=Singleton):
         self.left_plain = None
         self.var = None
         self.diff_count = 0
+        self.differ = DetailDiff.DetailDiff()
         self.clear_ui_info()
 
 
+    def start_tick(self):
+        if self.tick_handle is None:
+            self.tick_handle = unreal.register_slate_post_tick_callback(self.on_tick)
+
+    def stop_tick(self):
+        if self.tick_handle is not None:
+            unreal.unregister_slate_post_tick_callback(self.tick_handle)
+            self.tick_handle = None
+
+    def on_tick(self, delta_seconds):
+        deadline = time.perf_counter() + self.resolveBudgetPerTick
+        if self.pendingSearchTexts:
+            pendings = self.pendingSearchTexts
+            self.pendingSearchTexts = {}
+            for bRight, text in pendings.items():
+                self.apply_search_filter(text, bRight)
+        bBusy = False
+        for bRight, job in list(self.queryJobs.items()):
+            bDone = job.step(deadline)
+            self.push_query_batch(job, bRight, bDone)
+            if bDone:
+                del self.queryJobs[bRight]
+                self.apply_compare_if_needed()
+                self.update_log_text(bRight)
+            else:
+                bBusy = True
+        for data, bRight in [(self.left, False), (self.right, True)]:
+            if data and data.pendingLineIds:
+                self.resolve_pending_lines(data, bRight, deadline, data.pendingLineIds)
+            if data and not data.pendingLineIds and data.backgroundLineIds and time.perf_counter() < deadline:
+                self.resolve_pending_lines(data, bRight, deadline, data.backgroundLineIds)
+            bBusy |= bool(data and (data.pendingLineIds or data.backgroundLineIds))
+        if self.bWatching:
+            self.step_watch(time.perf_counter() + self.watchBudgetPerTick)
+            bBusy = True
+        self.update_progress()
+        if not bBusy:
+            self.stop_tick()
+            self.save_call_policy()
+
+    def save_call_policy(self):
+        policy = Utils.get_call_policy()
+        if policy:
+            policy.save_if_dirty()
+
+    def get_watched_lines(self, data:DetailData):
+        # the selected rows are pinned, otherwise the rendered rows at the head of the list
+        if data.selected:
+            return sorted(data.selected)
+        count = min(len(data.filtered_attributes), self.rowWindowSize)
+        return [lineId for lineId in range(count) if lineId not in data.pendingLineSet]
+
+    def step_watch(self, deadline):
+        """
+        Evaluate the watched rows again, in rounds of watchInterval, and push the rows whose value fingerprints
+        changed. The first round of a DetailData only records the fingerprints.
+        """
+        now = time.time()
+        bChanged = False
+        for data, bRight in [(self.left, False), (self.right, True)]:
+            if not data or not data.filtered_attributes or data.bWorkerResolving:
+                continue
+            if bRight and not self.compareMode:
+                continue
+            crumb = self.get_history(bRight).top()
+            obj = crumb.obj if crumb else None
+            if obj is None:
+                continue
+            if not data.watchQueue and now - data.lastWatchTime >= self.watchInterval:
+                data.lastWatchTime = now
+                data.watchQueue.extend(self.get_watched_lines(data))
+
+            updated = []
+            metas = [data.attributes[data.filteredIndexToIndex[lineId]].meta for lineId in data.watchQueue
+                     if lineId < len(data.filteredIndexToIndex)]
+            with Utils.call_batch(metas):
+                while data.watchQueue and time.perf_counter() < deadline:
+                    lineId = data.watchQueue.popleft()
+                    if lineId >= len(data.filteredIndexToIndex):
+                        continue
+                    index = data.filteredIndexToIndex[lineId]
+                    attr = data.attributes[index]
+                    if not attr.bResolved:
+                        continue  # not shown yet, it's evaluated by resolve_pending_lines
+                    attr.reevaluate(obj)
+                    fingerprint = hash(attr.display_result)
+                    old = data.watchFingerprints.get(index, None)
+                    data.watchFingerprints[index] = fingerprint
+                    if old is not None and old != fingerprint:
+                        self.differ.invalidate(attr.name)
+                        bChanged = True
+                        cells = data.cellsCache.get(index, None)
+                        if cells:
+                            cells[2] = None
+                        data.search_values[index] = None
+                        data.last_search = None
+                        data.watchChanged[lineId] = now
+                        self.render_line(data, lineId)
+                        updated.append(lineId)
+
+            for lineId, changed_time in list(data.watchChanged.items()):
+                if now - changed_time > self.watchHighlightSeconds:
+                    del data.watchChanged[lineId]
+                    self.render_line(data, lineId)
+                    updated.append(lineId)
+            if updated:
+                self.update_lines(data, self.ui_detailListRight if bRight else self.ui_detailListLeft, sorted(set(updated)))
+        if bChanged:
+            self.apply_compare_if_needed()
+
+    def update_progress(self):
+        total = 0
+        done = 0
+        for job in self.queryJobs.values():
+            total += job.total
+            done += job.done_count
+        for data in [self.left, self.right]:
+            if data and data.filtered_attributes:
+                # only the lines in the window are rendered by on_tick
+                count = min(len(data.filtered_attributes), self.get_window_end(data))
+                total += count
+                done += count - len(data.pendingLineIds)
+        if done < total:
+            self.data.set_visibility(self.ui_progress_bar, "Visible")
+            self.data.set_progress_bar_percent(self.ui_progress_bar, done / total)
+        else:
+            self.data.set_visibility(self.ui_progress_bar, "Collapsed")
+
+    def cancel_query(self, bRight):
+        # cancel the in-flight query of the side, and the values evaluating in worker thread
+        self.queryJobs.pop(bRight, None)
+        data = self.right if bRight else self.left
+        if data:
+            data.bWorkerCancelled = True
+
+    def start_worker_resolve(self, data:DetailData):
+        # only for pure python objects, unreal apis can't be called in worker threads
+        if self.executor is None:
+            self.executor = ChameleonTaskExecutor(self)
+        data.bWorkerCancelled = False
+        data.bWorkerResolving = True
+        attributes = [data.filtered_attributes[lineId] for lineId in data.pendingLineIds]
+        self.executor.submit_task(ObjectDetailViewer._resolve_in_worker, args=[data, attributes])
+
+    @staticmethod
+    def _resolve_in_worker(data:DetailData, attributes):
+        try:
+            with Utils.call_batch([attr.meta for attr in attributes]):
+                for attr in attributes:
+                    if data.bWorkerCancelled:
+                        break
+                    attr.resolve()
+        finally:
+            data.bWorkerResolving = False
+
+    def resolve_pending_lines(self, data:DetailData, bRight, deadline, lineIds):
+        # render the pending lines of the lineIds queue and evaluate the lazy attributes in them, within the time budget
+        ui_listView = self.ui_detailListRight if bRight else self.ui_detailListLeft
+        updated = []
+        # the pending marker of CallPolicy is written once for the getters which may be called in this tick
+        metas = [data.filtered_attributes[lineId].meta for lineId in itertools.islice(lineIds, self.rowWindowSize)
+                 if lineId in data.pendingLineSet and not data.filtered_attributes[lineId].bResolved]
+        with Utils.call_batch(metas):
+            while lineIds and time.perf_counter() < deadline:
+                lineId = lineIds[0]
+                if data.bWorkerResolving and lineId in data.pendingLineSet \
+                        and not data.filtered_attributes[lineId].bResolved:
+                    break  # wait for the worker
+                lineIds.popleft()
+                if lineId in data.pendingLineSet:
+                    self.render_line(data, lineId)
+                    updated.append(lineId)
+        self.update_lines(data, ui_listView, updated)
+
+    def render_line(self, data:DetailData, lineId):
+        rich_name, plain_name, value_cell = self.get_cells(data, lineId, bResolve=True)
+        if lineId in data.watchChanged:
+            rich_name = "\t<RichText.orange>*</>" + rich_name[1:]
+            plain_name = "\t*" + plain_name[1:]
+        data.riches[lineId * COLUMN_COUNT: lineId * COLUMN_COUNT + 2] = [rich_name, value_cell]
+        data.plains[lineId * COLUMN_COUNT: lineId * COLUMN_COUNT + 2] = [plain_name, value_cell]
+        data.pendingLineSet.discard(lineId)
+
+    def update_lines(self, data:DetailData, ui_listView, lineIds):
+        # push the lines in one batch, the list is only rebuilt once at the last line
+        for i, lineId in enumerate(lineIds):
+            items = data.get_plain(lineId, COLUMN_COUNT) if lineId in data.selected else data.get_rich(lineId, COLUMN_COUNT)
+            self.data.set_list_view_multi_column_line(ui_listView, lineId, items, rebuild_list=i == len(lineIds) - 1)
+
     def clear_ui_info(self):
         for text_ui in [self.ui_info_output, self.ui_labelLeft, self.ui_labelRight]:
             self.data.set_text(text_ui, "")
@@ -129,13 +525,13 @@ class ObjectDetailViewer(metaclass=Singleton):
         for side_str in ["left", "right"] if bShowRight else ["left"]:
             bRight = side_str != "left"
             ui_breadcrumb = self.ui_hisObjsBreadcrumbRight if bRight else self.ui_hisObjsBreadcrumbLeft
-            breadcrumbs =  self.right.hisCrumbObjsAndNames if bRight else self.left.hisCrumbObjsAndNames
+            breadcrumbs =  self.get_history(bRight)
             crumbCount = self.data.get_breadcrumbs_count_string(ui_breadcrumb)
             if bRight:
                 result += "\t\t\t"
             result += "{} crumb: {}  hisObj: {}".format(side_str, crumbCount, len(breadcrumbs))
         if self.compareMode:
-            result = f"{result}\t\t\tdiff count: {self.diff_count}"
+            result = f"{result}\t\t\tdiff count: {self.diff_count}  added: {len(self.differ.added_names)}  removed: {len(self.differ.removed_names)}"
         self.data.set_text(self.ui_info_output, result)
 
     def get_color_by(self, attr : Utils.attr_detail):
@@ -186,51 +582,140 @@ class ObjectDetailViewer(metaclass=Singleton):
                 else:
                     return "\t{}()    {}".format(attr.name,attr.return_type_str)
 
+    def get_hidden_kind_mask(self):
+        mask = Utils.EAttrKind.NONE
+        if not self.showEditorProperties:
+            mask |= Utils.EAttrKind.EDITOR_PROPERTY
+        if not self.showProperties:
+            mask |= Utils.EAttrKind.OTHER_PROPERTY
+        if not self.showParamFunction:
+            mask |= Utils.EAttrKind.PARAM_FUNCTION
+        if not self.showBuiltin:
+            mask |= Utils.EAttrKind.BUILTIN
+        if not self.showOther:
+            mask |= Utils.EAttrKind.OTHER_CALLABLE
+        return int(mask)
+
     def filter(self, data:DetailData):
-        result = []
-        indices = []
-        for i, attr in enumerate(data.attributes):
-            if not self.showEditorProperties and attr.bEditorProperty:
-                continue
-            if not self.showProperties and attr.bOtherProperty:
-                continue
-            if not self.showParamFunction and attr.bHasParamFunction:
-                continue
-            if not self.showBuiltin and attr.bCallable_builtin:
-                continue
-            if not self.showOther and attr.bCallable_other:
-                continue
-            if data.filter_str:
-                if data.filter_str.lower() not in attr.display_result.lower() and data.filter_str not in attr.display_name.lower() :
-                    continue
-            result.append(attr)
-            indices.append(i)
+        indices = data.search(data.filter_str, self.get_hidden_kind_mask())
+        result = [data.attributes[i] for i in indices]
         return result, indices
 
-    def show_data(self, data:DetailData, ui_listView):
-        flatten_list_items = []
-        flatten_list_items_plain = []
-        for i, attr in enumerate(data.filtered_attributes):
-            # print(f"{i}: {attr.name}  {attr.display_name}, {attr.display_result}  ")
+    def get_value_cell(self, attr:Utils.attr_detail):
+        # the long containers are cut before being formatted, the full string is only built for searching
+        result_str = attr.get_display_result(MAX_VALUE_CELL_LENGTH)
+        if len(result_str) > MAX_VALUE_CELL_LENGTH:
+            result_str = result_str[:MAX_VALUE_CELL_LENGTH] + "......"
+        if self.showCallCost:
+            stats = attr.meta.call_stats
+            if stats is not None and stats.count:
+                result_str = f"{result_str}    [{stats.mean_seconds * 1000:.3f}ms, max: {stats.max_seconds * 1000:.3f}ms]"
+        return result_str
+
+    def get_cells(self, data:DetailData, lineId, bResolve):
+        """
+        The cached [rich name, plain name, value cell] of the line, value cell is None if the attribute hasn't been
+        evaluated and bResolve is False.
+        """
+        index = data.filteredIndexToIndex[lineId]
+        cells = data.cellsCache.get(index, None)
+        attr = data.attributes[index]
+        if cells is None:
             attr.check()
             assert attr.display_name, f"display name null {attr.display_name}"
-            assert isinstance(attr.display_result, str), f"display result null {attr.display_result}"
-
-            result_str = attr.display_result
-            if len(result_str) > 200:
-                result_str = result_str[:200] + "......"
-            flatten_list_items.extend([self.get_name_with_rich_text(attr), result_str])
-            flatten_list_items_plain.extend([self.get_name_with_plain_text(attr), result_str])
+            cells = [self.get_name_with_rich_text(attr), self.get_name_with_plain_text(attr), None]
+            data.cellsCache[index] = cells
+        if cells[2] is None and (bResolve or attr.bResolved):
+            cells[2] = self.get_value_cell(attr)
+        return cells
 
-        data.riches = flatten_list_items
-        data.plains = flatten_list_items_plain
+    def show_data(self, data:DetailData, ui_listView):
+        data.riches = []
+        data.plains = []
+        data.pendingLineIds.clear()
+        data.pendingLineSet.clear()
+        data.backgroundLineIds.clear()
+        data.watchQueue.clear()
+        data.watchChanged.clear()
         data.selected.clear()
-
-        self.data.set_list_view_multi_column_items(ui_listView, flatten_list_items, 2)
-
-
+        self.append_rows(data, 0)
+
+        self.data.set_list_view_multi_column_items(ui_listView, data.riches, 2)
+        if data.pendingLineIds or data.backgroundLineIds:
+            self.start_tick()
+
+    def get_window_end(self, data:DetailData):
+        return self.rowWindowSize + self.rowWindowMargin if self.virtualRows else len(data.filtered_attributes)
+
+    def append_rows(self, data:DetailData, fromLine):
+        # build the rows of the lines from fromLine. The lines in the window are rendered in next ticks, the others
+        # after the window is done, or at once on demand, see render_window
+        flatten_list_items = data.riches
+        flatten_list_items_plain = data.plains
+        window_end = self.get_window_end(data)
+        for i in range(fromLine, len(data.filtered_attributes)):
+            attr = data.filtered_attributes[i]
+            if i < window_end:
+                rich_name, plain_name, result_str = self.get_cells(data, i, bResolve=False)
+                if result_str is None:
+                    result_str = UNRESOLVED_VALUE_STR
+                    data.pendingLineIds.append(i)   # filled in later by on_tick
+                    data.pendingLineSet.add(i)
+            else:
+                rich_name = plain_name = f"\t{attr.name}"
+                result_str = UNRESOLVED_VALUE_STR
+                data.pendingLineSet.add(i)
+                data.backgroundLineIds.append(i)
+            flatten_list_items.extend([rich_name, result_str])
+            flatten_list_items_plain.extend([plain_name, result_str])
+
+    def render_lines(self, data:DetailData, ui_listView, lineIds):
+        # render the lines out of the window which are selected by the tool, like the differences in compare mode
+        updated = [lineId for lineId in lineIds if lineId in data.pendingLineSet]
+        with Utils.call_batch([data.filtered_attributes[lineId].meta for lineId in updated]):
+            for lineId in updated:
+                self.render_line(data, lineId)
+        if updated:
+            self.update_lines(data, ui_listView, updated)
+
+    def render_window(self, data:DetailData, ui_listView, centerLineId):
+        # render the pending lines around centerLineId at once, like the user jumps to a line far away
+        lineCount = len(data.filtered_attributes)
+        fromLine = max(0, centerLineId - self.rowWindowMargin)
+        toLine = min(lineCount, centerLineId + self.rowWindowMargin + 1)
+        updated = [lineId for lineId in range(fromLine, toLine) if lineId in data.pendingLineSet]
+        with Utils.call_batch([data.filtered_attributes[lineId].meta for lineId in updated]):
+            for lineId in updated:
+                self.render_line(data, lineId)
+        return updated
+
+    def get_crumb_label(self, obj, propertyName):
+        if propertyName and len(propertyName) > 0:
+            label = propertyName
+        else:
+            if isinstance(obj, unreal.Object):
+                label = obj.get_name()
+            else:
+                try:
+                    label = obj.__str__()
+                except TypeError:
+                    label = f"{obj}"
+        return label
 
     def query_and_push(self, obj, propertyName, bPush, bRight): #bPush: whether add Breadcrumb nor not, call by property
+        self.cancel_query(bRight)
+        if self.asyncQuery:
+            # the rows are pushed by on_tick in batches, while the attributes are collected
+            self.queryJobs[bRight] = QueryJob(obj, propertyName, bPush)
+            self.data.set_list_view_multi_column_items(self.ui_detailListRight if bRight else self.ui_detailListLeft, [], 2)
+            self.start_tick()
+            self.update_progress()
+            return
+        self.push_query_result(obj, propertyName, bPush, bRight, Utils.ll(obj, lazy=self.lazyEvaluation))
+        if not self.lazyEvaluation:
+            self.save_call_policy()
+
+    def push_query_result(self, obj, propertyName, bPush, bRight, attributes):
         if bRight:
             ui_Label = self.ui_labelRight
             ui_listView = self.ui_detailListRight
@@ -240,39 +725,80 @@ class ObjectDetailViewer(metaclass=Singleton):
             ui_listView = self.ui_detailListLeft
             ui_breadcrumb = self.ui_hisObjsBreadcrumbLeft
 
-        data = self.right if bRight else self.left
+        history = self.get_history(bRight)
+        data = DetailData()
+        data.filter_str = self.rightSearchText if bRight else self.leftSearchText
+        self.set_side_data(data, bRight)
 
-        data.attributes = Utils.ll(obj)
+        data.attributes = attributes
+        data.build_search_index()
 
         data.filtered_attributes, data.filteredIndexToIndex = self.filter(data)
         self.show_data(data, ui_listView)
+        if self.asyncQuery and data.pendingLineIds and not isinstance(obj, (unreal.Object, unreal.StructBase)):
+            self.start_worker_resolve(data)
 
         # set breadcrumb
-        if propertyName and len(propertyName) > 0:
-            label = propertyName
-        else:
-            if isinstance(obj, unreal.Object):
-                label = obj.get_name()
-            else:
-                try:
-                    label = obj.__str__()
-                except TypeError:
-                    label = f"{obj}"
+        label = self.get_crumb_label(obj, propertyName)
 
         if bPush: # push
             # print(f"%%% push: {propertyName}, label {label}")
-            data.hisCrumbObjsAndNames.append((obj, propertyName))
+            crumb = history.push(obj, propertyName)
             self.data.push_breadcrumb_string(ui_breadcrumb, label, label)
+        else:
+            crumb = history.top()
+        history.set_detail(crumb, data)
 
         self.data.set_text(ui_Label, "{}  type: {}".format(label, type(obj)) )
 
         crumbCount = self.data.get_breadcrumbs_count_string(ui_breadcrumb)
-        if bRight:
-            assert len(self.right.hisCrumbObjsAndNames) == crumbCount, "hisCrumbObjsAndNames count not match  {}  {}".format(len(self.right.hisCrumbObjsAndNames), crumbCount)
-        else:
-            assert len(self.left.hisCrumbObjsAndNames) == crumbCount, "hisCrumbObjsAndNames count not match  {}  {}".format(len(self.left.hisCrumbObjsAndNames), crumbCount)
+        assert len(history) == crumbCount, "history count not match  {}  {}".format(len(history), crumbCount)
 
         self.update_log_text(bRight)
+        return data
+
+    def push_query_batch(self, job:QueryJob, bRight, bDone):
+        # the first batch pushes the crumb and its DetailData, the next ones append their rows to it
+        attributes = job.take_new_attributes()
+        if job.data is None:
+            job.data = self.push_query_result(job.obj, job.propertyName, job.bPush, bRight, attributes)
+        elif attributes:
+            data = job.data
+            lineCount = len(data.filtered_attributes)
+            if data.append_attributes(attributes, self.get_hidden_kind_mask()):
+                ui_listView = self.ui_detailListRight if bRight else self.ui_detailListLeft
+                self.append_rows(data, lineCount)
+                self.data.set_list_view_multi_column_items(ui_listView, data.get_items(), 2)
+                if data.selected:
+                    self.data.set_list_view_multi_column_selections(ui_listView, sorted(data.selected))
+                self.start_tick()
+        job.data.bPartial = not bDone
+        if bDone and job.data.pendingLineIds and self.asyncQuery and not job.data.bWorkerResolving \
+                and not isinstance(job.obj, (unreal.Object, unreal.StructBase)):
+            self.start_worker_resolve(job.data)  # the rows streamed after the first batch
+
+    def show_crumb(self, crumb, bRight):
+        # show the crumb from its cached DetailData, query the object again if the cache has been evicted.
+        self.cancel_query(bRight)
+        data = self.get_history(bRight).get_detail(crumb)
+        obj = crumb.obj
+        if data is not None and data.bPartial:
+            data = None     # its query was cancelled before all the rows were streamed
+        if data is None:
+            if obj is None:
+                unreal.log_warning(f"Object of crumb: {crumb.property_name} has been garbage collected.")
+                return False
+            self.query_and_push(obj, crumb.property_name, bPush=False, bRight=bRight)
+            return True
+
+        self.set_side_data(data, bRight)
+        # the search text and Show* options may have been changed since it was cached
+        data.filter_str = self.rightSearchText if bRight else self.leftSearchText
+        data.filtered_attributes, data.filteredIndexToIndex = self.filter(data)
+        self.show_data(data, self.ui_detailListRight if bRight else self.ui_detailListLeft)
+        label = self.get_crumb_label(obj, crumb.property_name)
+        self.data.set_text(self.ui_labelRight if bRight else self.ui_labelLeft, "{}  type: {}".format(label, type(obj)))
+        return True
 
     def clear_and_query(self, obj, bRight):
         # first time query
@@ -282,12 +808,9 @@ class ObjectDetailViewer(metaclass=Singleton):
         if not self.left:
             self.left = DetailData()
 
-        data = self.right if bRight else self.left
-        data.hisCrumbObjsAndNames = []  #clear his-Object at first time query
-        if bRight:
-            assert len(self.right.hisCrumbObjsAndNames) == 0, "len(self.right.hisCrumbObjsAndNames) != 0"
-        else:
-            assert len(self.left.hisCrumbObjsAndNames) == 0, "len(self.left.hisCrumbObjsAndNames) != 0"
+        history = self.get_history(bRight)
+        history.clear()  #clear his-Object at first time query
+        assert len(history) == 0, "len(history) != 0"
 
         self.query_and_push(obj, "", bPush=True, bRight= bRight)
         self.apply_compare_if_needed()
@@ -369,10 +892,15 @@ class ObjectDetailViewer(metaclass=Singleton):
 
         typeBlacklist = [int, float, str, bool] #, types.NotImplementedType]
 
+        if bRight in self.queryJobs:
+            return  # querying
         real_index = data.filteredIndexToIndex[index] if data.filteredIndexToIndex else index
         assert 0 <= real_index < len(data.attributes)
 
-        currentObj, _ = data.hisCrumbObjsAndNames[len(data.hisCrumbObjsAndNames) - 1]
+        currentObj = self.get_history(bRight).top().obj
+        if currentObj is None:
+            unreal.log_warning("Current object has been garbage collected.")
+            return
         attr_name = data.attributes[real_index].name
         objResult, propertyName = self.try_get_object(data, currentObj, attr_name)
 
@@ -403,18 +931,14 @@ class ObjectDetailViewer(metaclass=Singleton):
 
     def on_breadcrumbtrail_click_do(self, item, bRight):
         ui_hisObjsBreadcrumb = self.ui_hisObjsBreadcrumbRight if bRight else self.ui_hisObjsBreadcrumbLeft
-        data = self.right if bRight else self.left
+        history = self.get_history(bRight)
         count = self.data.get_breadcrumbs_count_string(ui_hisObjsBreadcrumb)
-        print ("on_breadcrumbtrail_ObjectHis_crumb_click: {}    count: {}    len(data.hisCrumbObjsAndNames): {}".format(item, count, len(data.hisCrumbObjsAndNames)))
-        while len(data.hisCrumbObjsAndNames) > count:
-            data.hisCrumbObjsAndNames.pop()
-        nextObj, name = data.hisCrumbObjsAndNames[len(data.hisCrumbObjsAndNames) - 1]
-        if not bRight:
-            assert self.left.hisCrumbObjsAndNames == data.hisCrumbObjsAndNames, "self.left.hisCrumbObjsAndNames = data.hisCrumbObjsAndNames"
-
-        self.query_and_push(nextObj, name, bPush=False, bRight=False)
+        print ("on_breadcrumbtrail_ObjectHis_crumb_click: {}    count: {}    len(history): {}".format(item, count, len(history)))
+        history.truncate(count)
+
+        self.show_crumb(history.top(), bRight)
         self.apply_compare_if_needed()
-        self.update_log_text(bRight=False)
+        self.update_log_text(bRight)
 
     def on_breadcrumbtrail_ObjectHisLeft_crumb_click(self, item):
         self.on_breadcrumbtrail_click_do(item, bRight=False)
@@ -423,39 +947,100 @@ class ObjectDetailViewer(metaclass=Singleton):
         self.on_breadcrumbtrail_click_do(item, bRight=True)
 
     def remove_address_str(self, strIn):
-        return re.sub(r'\(0x[0-9,A-F]{16}\)', '', strIn)
+        return DetailDiff.remove_address_str(strIn)
 
     def apply_compare_if_needed(self):
-        if not self.compareMode:
+        if not self.compareMode or not self.left or not self.right:
             return
 
-        lefts  = self.left.filtered_attributes if self.left.filtered_attributes else self.left.attributes
-        rights = self.right.filtered_attributes if self.right.filtered_attributes else self.right.attributes
-        if not lefts:
-            lefts = []
-        if not rights:
-            rights = []
-
-        leftIDs = []
-        rightIDs = []
-        for i, left_attr in enumerate(lefts):
-            for j, right_attr in enumerate(rights):
-                if right_attr.name == left_attr.name:
-                    if right_attr.result != left_attr.result:
-                        if isinstance(right_attr.result, unreal.Transform):
-                            if right_attr.result.is_near_equal(left_attr.result, location_tolerance=1e-20, rotation_tolerance=1e-20, scale3d_tolerance=1e-20):
-                                continue
-                        leftIDs.append(i)
-                        rightIDs.append(j)
-                        break
+        # the index is rebuilt only when either side was re-queried, filter changes reuse it.
+        if not self.differ.is_built_for(self.left.attributes, self.right.attributes):
+            self.differ.build(self.left.attributes, self.right.attributes)
+
+        leftIDs, rightIDs = self.differ.diff_rows(self.left.filtered_attributes, self.right.filtered_attributes)
 
+        self.render_lines(self.left, self.ui_detailListLeft, leftIDs)
+        self.render_lines(self.right, self.ui_detailListRight, rightIDs)
         self.data.set_list_view_multi_column_selections(self.ui_detailListLeft, leftIDs)
         self.data.set_list_view_multi_column_selections(self.ui_detailListRight, rightIDs)
         self.diff_count = len(leftIDs)
 
 
+    def get_compare_summary(self):
+        """ added/removed/changed counts of all the attributes in compare mode, not only the filtered rows """
+        if not self.left or not self.right:
+            return None
+        if not self.differ.is_built_for(self.left.attributes, self.right.attributes):
+            self.differ.build(self.left.attributes, self.right.attributes)
+        return self.differ.summary()
+
+    def export_snapshot(self, file_path=None, bRight=False):
+        """ Save the introspection of the object of current crumb, to Saved/TAPython/Snapshots by default """
+        crumb = self.get_history(bRight).top()
+        obj = crumb.obj if crumb else None
+        if obj is None:
+            unreal.log_warning("No object to snapshot.")
+            return None
+        if not file_path:
+            file_path = Snapshot.get_default_snapshot_path(obj)
+        count = Snapshot.export_snapshot(obj, file_path)
+        unreal.log(f"Snapshot of {count} attributes saved to: {file_path}")
+        return file_path
+
+    def compare_with_snapshot(self, file_path, bRight=False):
+        """ Diff a snapshot file and the object of current crumb, the changed and added rows are selected """
+        crumb = self.get_history(bRight).top()
+        obj = crumb.obj if crumb else None
+        data = self.right if bRight else self.left
+        if obj is None or not data:
+            unreal.log_warning("No object to compare with.")
+            return None
+        result = Snapshot.diff_snapshots(file_path, Snapshot.LiveSource(obj))
+        names = set(result.changed_names())
+        names.update(record.name for record in result.added)
+        ids = [i for i, attr in enumerate(data.filtered_attributes) if attr.name in names]
+        ui_listView = self.ui_detailListRight if bRight else self.ui_detailListLeft
+        self.render_lines(data, ui_listView, ids)
+        self.data.set_list_view_multi_column_selections(ui_listView, ids)
+        summary = result.summary()
+        self.data.set_text(self.ui_info_output, f"snapshot: {os.path.basename(file_path)}  changed: {summary['changed']}"
+                                                f"  added: {summary['added']}  removed: {summary['removed']}")
+        return result
+
+    def on_button_Snapshot_click(self):
+        self.export_snapshot()
+
+    def deep_find(self, pattern=None, bRight=False, **kwargs):
+        """
+        Search the sub objects of current crumb for the attributes whose name or value contain pattern, the search
+        text of the side by default. See DeepFind.DeepFind for kwargs.
+        :return: [DeepFindMatch]
+        """
+        if pattern is None:
+            pattern = self.rightSearchText if bRight else self.leftSearchText
+        crumb = self.get_history(bRight).top()
+        obj = crumb.obj if crumb else None
+        if not pattern or obj is None:
+            unreal.log_warning("Deep find needs an object and a search text.")
+            return []
+        finder = DeepFind.DeepFind(pattern, **kwargs)
+        finder.run(obj, root_name=crumb.property_name if crumb.property_name else "root")
+        finder.log()
+        self.data.set_text(self.ui_info_output, f"deep find \"{pattern}\": {len(finder.matches)} matches"
+                                                f"  visited: {finder.visited_count}{'  timeout' if finder.bTimeout else ''}")
+        return finder.matches
+
+    def on_button_DeepFind_click(self):
+        self.deep_find()
+
     def apply_search_filter(self, text, bRight):
+        if bRight:
+            self.rightSearchText = text
+        else:
+            self.leftSearchText = text
         _data = self.right if bRight else self.left
+        if not _data or _data.attributes is None:
+            return
         _data.filter_str = text if len(text) else ""
         _data.filtered_attributes, _data.filteredIndexToIndex = self.filter(_data)
         ui_listView = self.ui_detailListRight if bRight else self.ui_detailListLeft
@@ -463,27 +1048,55 @@ class ObjectDetailViewer(metaclass=Singleton):
         self.apply_compare_if_needed()
 
 
+    def delay_search_filter(self, text, bRight):
+        # typing fast will only trigger one search in next tick
+        self.pendingSearchTexts[bRight] = text
+        self.start_tick()
+
+    def commit_search_filter(self, text, bRight):
+        self.pendingSearchTexts.pop(bRight, None)
+        self.apply_search_filter(text, bRight)
+
     def on_searchbox_FilterLeft_text_changed(self, text):
-        self.apply_search_filter(text if text is not None else "", bRight=False)
+        self.delay_search_filter(text if text is not None else "", bRight=False)
     def on_searchbox_FilterLeft_text_committed(self, text):
-        self.apply_search_filter(text if text is not None else "", bRight=False)
+        self.commit_search_filter(text if text is not None else "", bRight=False)
 
     def on_searchbox_FilterRight_text_changed(self, text):
-        self.apply_search_filter(text if text is not None else "", bRight=True)
+        self.delay_search_filter(text if text is not None else "", bRight=True)
     def on_searchbox_FilterRight_text_committed(self, text):
-        self.apply_search_filter(text if text is not None else "", bRight=True)
+        self.commit_search_filter(text if text is not None else "", bRight=True)
 
 
     def apply_filter(self):
+        # filter the cached attributes of current crumbs, without querying the objects again
         _datas = [self.left, self.right]
         _isRight = [False, True]
         for data, bRight  in zip(_datas, _isRight):
-            if len(data.hisCrumbObjsAndNames) > 0:
-                nextObj, name  = data.hisCrumbObjsAndNames[len(data.hisCrumbObjsAndNames)-1]
-                self.query_and_push(nextObj, name, bPush=False, bRight=bRight)
-                self.apply_compare_if_needed()
+            if data and data.attributes is not None:
+                data.filtered_attributes, data.filteredIndexToIndex = self.filter(data)
+                self.show_data(data, self.ui_detailListRight if bRight else self.ui_detailListLeft)
+        self.apply_compare_if_needed()
         self.update_log_text(bRight=False) #
 
+    def refresh_values(self):
+        # query the objects of current crumbs again, for getting the latest values
+        for bRight in [False, True]:
+            crumb = self.get_history(bRight).top()
+            if crumb:
+                nextObj = crumb.obj
+                if nextObj is None:
+                    unreal.log_warning(f"Object of crumb: {crumb.property_name} has been garbage collected.")
+                    continue
+                # the Blueprint may have been recompiled since last query, its attributes need to be collected again
+                Utils.invalidate_class_meta_of(nextObj)
+                self.query_and_push(nextObj, crumb.property_name, bPush=False, bRight=bRight)
+        self.apply_compare_if_needed()
+        self.update_log_text(bRight=False) #
+
+    def on_button_RefreshValues_click(self):
+        self.refresh_values()
+
 
     def try_get_object(self, data, obj, name:str):
         index = -1
@@ -512,6 +1125,36 @@ class ObjectDetailViewer(metaclass=Singleton):
         self.showParamFunction = bEnabled
         self.apply_filter()
 
+    def ui_on_checkbox_LazyEvaluation_state_changed(self, bEnabled):
+        self.lazyEvaluation = bEnabled
+
+    def ui_on_checkbox_AsyncQuery_state_changed(self, bEnabled):
+        self.asyncQuery = bEnabled
+
+    def ui_on_checkbox_Watch_state_changed(self, bEnabled):
+        self.bWatching = bEnabled
+        for data, bRight in [(self.left, False), (self.right, True)]:
+            if not data:
+                continue
+            data.watchFingerprints.clear()
+            data.watchQueue.clear()
+            if data.watchChanged:
+                lineIds = sorted(data.watchChanged.keys())
+                data.watchChanged.clear()
+                for lineId in lineIds:
+                    self.render_line(data, lineId)
+                self.update_lines(data, self.ui_detailListRight if bRight else self.ui_detailListLeft, lineIds)
+        if bEnabled:
+            self.start_tick()
+
+    def ui_on_checkbox_CallCost_state_changed(self, bEnabled):
+        self.showCallCost = bEnabled
+        for data in [self.left, self.right]:
+            if data:
+                for cells in data.cellsCache.values():
+                    cells[2] = None
+        self.apply_filter()
+
     def ui_on_listview_DetailList_selection_changed(self, bRight):
         data = [self.left, self.right][bRight]
         list_view = [self.ui_detailListLeft, self.ui_detailListRight][bRight]
@@ -520,13 +1163,10 @@ class ObjectDetailViewer(metaclass=Singleton):
         added = selected_indices - data.selected
         de_selected = data.selected - selected_indices
 
-        for i, lineId in enumerate(added):
-            self.data.set_list_view_multi_column_line(list_view, lineId, data.get_plain(lineId, column_count=COLUMN_COUNT)
-                                                      , rebuild_list=True if i == len(added)-1 and len(de_selected) == 0 else False)
-
-        for i, lineId in enumerate(de_selected):
-            self.data.set_list_view_multi_column_line(list_view, lineId, data.get_rich(lineId, column_count=COLUMN_COUNT)
-                                                      , rebuild_list=True if i == len(de_selected)-1 else False)
+        updated = set(added | de_selected)
+        for lineId in added:
+            if lineId in data.pendingLineSet:
+                updated.update(self.render_window(data, list_view, lineId))
 
         data.selected = selected_indices
-
+        self.update_lines(data, list_view, sorted(updated))
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import os
+import time
+from collections import namedtuple
+
+import unreal
+
+from . import Utils
+from .DetailDiff import remove_address_str
+
+SNAPSHOT_FORMAT = "TAPythonObjectSnapshot"
+SNAPSHOT_VERSION = 1
+
+# value_str is the address free value string, which is used for diffing. value is the typed value for reading,
+# None if it can't be kept as json
+SnapshotRecord = namedtuple("SnapshotRecord", ["name", "kind", "value_str", "value"])
+
+
+def _to_typed_value(value, depth=0):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, unreal.Object):
+        try:
+            return {"object": value.get_path_name()}
+        except Exception:
+            return None
+    if isinstance(value, unreal.StructBase):
+        try:
+            return {"struct": type(value).__name__, "fields": [_to_typed_value(v, depth + 1) for v in value.to_tuple()]}
+        except Exception:
+            return None
+    if isinstance(value, (list, tuple, unreal.Array)) and depth < 2 and len(value) <= 256:
+        return [_to_typed_value(v, depth + 1) for v in value]
+    return None
+
+
+def _get_snapshot_label(obj):
+    if isinstance(obj, unreal.Object):
+        try:
+            return obj.get_path_name()
+        except Exception:
+            pass
+    return f"{type(obj).__name__}"
+
+
+def iter_live_records(obj):
+    """ The SnapshotRecord of obj, sorted by name, the values are evaluated one by one """
+    table = Utils.AttributeTable(obj, lazy=True)
+    try:
+        for i in sorted(range(len(table)), key=table.name):
+            meta = table.metas[i]
+            value = table.result(i)
+            yield SnapshotRecord(meta.name, int(meta.kind_flags), remove_address_str("{}".format(value))
+                                 , _to_typed_value(value))
+    finally:
+        table.release()
+
+
+def _open(file_path, mode):
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, mode + "t", encoding="utf-8")
+    return open(file_path, mode, encoding="utf-8")
+
+
+def export_snapshot(obj, file_path, label=None):
+    """
+    Write the introspection of obj to a json lines file, a header line and then one line per attribute, sorted by name.
+    The lines are written while the values are evaluated, so the whole snapshot is never in memory.
+    :param file_path: gzipped if it ends with ".gz"
+    :return: count of the attributes
+    """
+    folder = os.path.dirname(file_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    header = {"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION
+        , "label": label if label else _get_snapshot_label(obj), "type": type(obj).__name__
+        , "engine": unreal.SystemLibrary.get_engine_version(), "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+    count = 0
+    with _open(file_path, 'w') as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for record in iter_live_records(obj):
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+            count += 1
+    return count
+
+
+def read_snapshot_header(file_path):
+    with _open(file_path, 'r') as f:
+        header = json.loads(f.readline())
+    if header.get("format", None) != SNAPSHOT_FORMAT:
+        raise ValueError(f"{file_path} is not an object snapshot.")
+    return header
+
+
+def iter_snapshot_records(file_path):
+    """ The SnapshotRecord in the file, read line by line """
+    with _open(file_path, 'r') as f:
+        header = json.loads(f.readline())
+        if header.get("format", None) != SNAPSHOT_FORMAT:
+            raise ValueError(f"{file_path} is not an object snapshot.")
+        for line in f:
+            if line.strip():
+                yield SnapshotRecord(*json.loads(line))
+
+
+class LiveSource(object):
+    """ A live object as the source of SnapshotDiff, so a mistyped file path is never introspected as a str """
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+
+def iter_records(source):
+    """ source: a snapshot file path, or a LiveSource """
+    if isinstance(source, LiveSource):
+        return iter_live_records(source.obj)
+    if isinstance(source, (str, os.PathLike)):
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Snapshot file not found: {source}")
+        return iter_snapshot_records(os.fspath(source))
+    raise TypeError(f"Unknown snapshot source: {type(source).__name__}, use LiveSource(obj) for a live object.")
+
+
+def iter_diff(lefts, rights):
+    """
+    Linear merge of two record iterables which are sorted by name.
+    :return: yield (name, left record or None, right record or None) of the added, removed and changed attributes
+    """
+    left = next(lefts, None)
+    right = next(rights, None)
+    while left is not None or right is not None:
+        if right is None or (left is not None and left.name < right.name):
+            yield left.name, left, None
+            left = next(lefts, None)
+        elif left is None or right.name < left.name:
+            yield right.name, None, right
+            right = next(rights, None)
+        else:
+            if left.value_str != right.value_str:
+                yield left.name, left, right
+            left = next(lefts, None)
+            right = next(rights, None)
+
+
+class SnapshotDiff(object):
+    """ The diff of two snapshots, or a snapshot and a live object, or two live objects, see iter_records """
+    def __init__(self, left_source, right_source):
+        self.left_source = left_source
+        self.right_source = right_source
+        self.added = []     # [SnapshotRecord] only in right
+        self.removed = []   # [SnapshotRecord] only in left
+        self.changed = []   # [(left SnapshotRecord, right SnapshotRecord)]
+
+    def run(self):
+        for name, left, right in iter_diff(iter(iter_records(self.left_source)), iter(iter_records(self.right_source))):
+            if left is None:
+                self.added.append(right)
+            elif right is None:
+                self.removed.append(left)
+            else:
+                self.changed.append((left, right))
+        return self
+
+    def changed_names(self):
+        return [left.name for left, _ in self.changed]
+
+    def summary(self):
+        return {"added": len(self.added), "removed": len(self.removed), "changed": len(self.changed)}
+
+    def log(self, max_lines=200):
+        lines = [f"{self.summary()}"]
+        lines.extend(f"\t+ {record.name}: {record.value_str}" for record in self.added)
+        lines.extend(f"\t- {record.name}: {record.value_str}" for record in self.removed)
+        lines.extend(f"\t* {left.name}: {left.value_str}  ->  {right.value_str}" for left, right in self.changed)
+        for line in lines[:max_lines]:
+            print(line)
+        if len(lines) > max_lines:
+            print(f"\t... {len(lines) - max_lines} more")
+
+
+def diff_snapshots(left_source, right_source, bPrint=True):
+    """
+    :param left_source: snapshot file path or LiveSource
+    :param right_source: snapshot file path or LiveSource
+    """
+    result = SnapshotDiff(left_source, right_source).run()
+    if bPrint:
+        result.log()
+    return result
+
+
+def get_default_snapshot_path(obj):
+    name = _get_snapshot_label(obj).split('.')[-1].split(':')[-1]
+    name = "".join(c if c.isalnum() or c in "_-" else "_" for c in name)
+    return os.path.join(unreal.Paths.project_saved_dir(), "TAPython", "Snapshots"
+                        , f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.jsonl.gz")
@@ -5,17 +5,56 @@ import unreal
 import inspect
 import types
 import Utilities
+from Utilities import DocParser
+import sys
+import itertools
+import threading
 from collections import Counter
-
-
-class attr_detail(object):
-    def __init__(self, obj,  name:str):
-        self.name = name
-
-        attr = None
+from contextlib import nullcontext
+from enum import IntFlag
+
+
+# how the value of an attribute is evaluated, decided once per class in attr_meta
+EVAL_NONE = 0           # plain property, read by getattr in attr_detail.post
+EVAL_CALL = 1           # builtin method without params, call it
+EVAL_SKIP = 2           # builtin method without params which returns None, skip
+EVAL_PARAM = 3          # builtin method with params, can't call
+EVAL_CALL_STR = 4       # __str__, __repr__ etc
+EVAL_GETATTR = 5        # other callable, getattr
+EVAL_UNKNOWN = 6        # builtin method without doc
+
+
+class EAttrKind(IntFlag):
+    # the categories of attributes, matches the Show* checkboxes of ObjectDetailViewer
+    NONE = 0
+    BUILTIN = 1 << 0
+    OTHER_CALLABLE = 1 << 1
+    OTHER_PROPERTY = 1 << 2
+    EDITOR_PROPERTY = 1 << 3
+    PARAM_FUNCTION = 1 << 4
+
+
+class attr_meta(object):
+    """
+    The instance independent part of an attribute: kind, param string, return type and editor property info.
+    It's shared by all the instances of the same class, see get_class_meta.
+    """
+    __slots__ = ("name", "bCallable", "bCallable_builtin", "param_str", "return_type_str", "doc_str", "eval_mode"
+                 , "editor_property", "display_name", "kind_flags", "call_stats")
+
+    def __init__(self, obj, name:str, editor_property=None):
+        """ editor_property: (type_str, rws, descript) if it's an editor property """
+        self.name = sys.intern(name)
         self.bCallable = None
         self.bCallable_builtin = None
+        self.param_str = None
+        self.return_type_str = None
+        self.doc_str = None
+        self.eval_mode = EVAL_NONE
+        self.editor_property = editor_property
+        self.call_stats = None  # CallPolicy.CallStats of EVAL_CALL getters, see attach_call_stats
 
+        attr = None
         try:
             if hasattr(obj, name):
                 attr = getattr(obj, name)
@@ -24,29 +63,14 @@ class attr_detail(object):
         except Exception as e:
             unreal.log(str(e))
 
-
-
-        self.bProperty = not self.bCallable
-        self.result = None
-        self.param_str = None
-        self.bEditorProperty = None
-        self.return_type_str = None
-        self.doc_str = None
-        self.property_rw = None
-
         if self.bCallable:
             self.return_type_str = ""
 
         if self.bCallable_builtin:
             if hasattr(attr, '__doc__'):
-                docForDisplay, paramStr = _simplifyDoc(attr.__doc__)
-                # print(f"~~~~~ attr: {self.name}  docForDisplay: {docForDisplay}  paramStr: {paramStr}")
-                # print(attr.__doc__)
-
+                docForDisplay, paramStr = DocParser.simplify_doc(attr.__doc__)
                 try:
-                    sig = inspect.getfullargspec(getattr(obj, self.name))
-                    # print("+++ ", sig)
-
+                    sig = inspect.getfullargspec(attr)
                     args = sig.args
                     argCount = len(args)
                     if "self" in args:
@@ -61,62 +85,175 @@ class attr_detail(object):
 
                 if argCount == 0 or (argCount == -1 and (paramStr == '' or paramStr == 'self')):
                     # Method with No params
-
                     if '-> None' not in docForDisplay or self.name in ["__reduce__", "_post_init"]:
-                        try:
-                            if name == "get_actor_time_dilation" and isinstance(obj, unreal.Object):
-                                # call get_actor_time_dilation will crash engine if actor is get from CDO and has no world.
-                                if obj.get_world():
-                                    # self.result = "{}".format(attr.__call__())
-                                    self.result = attr.__call__()
-                                else:
-                                    self.result = "skip call, world == None."
-                            else:
-                                # self.result = "{}".format(attr.__call__())
-                                self.result = attr.__call__()
-                        except:
-                            self.result = "skip call.."
+                        self.eval_mode = EVAL_CALL
                     else:
-                        print(f"docForDisplay: {docForDisplay}, self.name: {self.name}")
-                        self.result = "skip call."
+                        self.eval_mode = EVAL_SKIP
                 else:
                     self.param_str = paramStr
-                    self.result = ""
+                    self.eval_mode = EVAL_PARAM
             else:
                 logging.error("Can't find p")
-        elif self.bCallable_other:
-            if hasattr(attr, '__doc__'):
-                if isinstance(attr.__doc__, str):
-                    docForDisplay, paramStr = _simplifyDoc(attr.__doc__)
-
+                self.eval_mode = EVAL_UNKNOWN
+        elif self.bCallable and not self.bCallable_builtin:
             if name in ["__str__", "__hash__", "__repr__", "__len__"]:
-                try:
-                    self.result = "{}".format(attr.__call__())
-                except:
-                    self.result = "skip call."
+                self.eval_mode = EVAL_CALL_STR
             else:
-                # self.result = "{}".format(getattr(obj, name))
-                self.result = getattr(obj, name)
+                self.eval_mode = EVAL_GETATTR
+
+        self._update_derived()
+
+    def _update_derived(self):
+        # display_name and kind_flags, computed once from the other fields
+        self.kind_flags = self._get_kind_flags()
+        if not self.bCallable:
+            self.display_name = f"\t{self.name}"
+        elif self.param_str:
+            self.display_name = f"\t{self.name}({self.param_str})    {self.return_type_str}"
+        elif not self.bCallable_builtin:
+            self.display_name = f"\t{self.name}"  # __hash__, __class__, __eq__ 等
+        else:
+            self.display_name = f"\t{self.name}()    {self.return_type_str}"
+
+    def to_record(self):
+        """ A plain list of the fields, used by ClassMetaStore """
+        return [self.name, self.bCallable, self.bCallable_builtin, self.param_str, self.return_type_str, self.doc_str
+                , self.eval_mode, list(self.editor_property) if self.editor_property else None]
+
+    @classmethod
+    def from_record(cls, record):
+        """ Rebuild the attr_meta from to_record's result, without touching any instance """
+        meta = cls.__new__(cls)
+        name, meta.bCallable, meta.bCallable_builtin, meta.param_str, meta.return_type_str, meta.doc_str \
+            , meta.eval_mode, editor_property = record
+        meta.name = sys.intern(name)
+        meta.editor_property = tuple(editor_property) if editor_property else None
+        meta.call_stats = None
+        meta._update_derived()
+        return meta
+
+    def _get_kind_flags(self) -> int:
+        flags = EAttrKind.NONE
+        if self.bCallable_builtin:
+            flags |= EAttrKind.BUILTIN
+        if self.bCallable and not self.bCallable_builtin:
+            flags |= EAttrKind.OTHER_CALLABLE
+        if self.editor_property:
+            flags |= EAttrKind.EDITOR_PROPERTY
+        elif not self.bCallable:
+            flags |= EAttrKind.OTHER_PROPERTY
+        if self.param_str:
+            flags |= EAttrKind.PARAM_FUNCTION
+        return int(flags)
+
+
+def evaluate_attribute(obj, meta:attr_meta):
+    """ Evaluate the value of attribute meta.name of obj, the getters with params or returning None are skipped """
+    if meta.editor_property:
+        try:
+            return obj.get_editor_property(meta.name)
+        except:
+            return "Invalid"
 
-    def post(self, obj):
-        if self.bOtherProperty and not self.result:
-            try:
-                self.result = getattr(obj, self.name)
-            except:
-                self.result = "skip call..."
+    mode = meta.eval_mode
+    result = None
+    if mode == EVAL_CALL:
+        try:
+            stats = meta.call_stats
+            attr = getattr(obj, meta.name)
+            if meta.name == "get_actor_time_dilation" and isinstance(obj, unreal.Object) and not obj.get_world():
+                # call get_actor_time_dilation will crash engine if actor is get from CDO and has no world.
+                result = "skip call, world == None."
+            elif stats is None:
+                result = attr.__call__()
+            elif stats.bSkipped:
+                result = stats.get_skip_reason()
+            else:
+                result = _call_policy.call(stats, attr.__call__)
+        except:
+            result = "skip call.."
+    elif mode == EVAL_SKIP:
+        result = "skip call."
+    elif mode == EVAL_PARAM:
+        result = ""
+    elif mode == EVAL_CALL_STR:
+        try:
+            result = "{}".format(getattr(obj, meta.name).__call__())
+        except:
+            result = "skip call."
+    elif mode == EVAL_GETATTR:
+        result = getattr(obj, meta.name)
+
+    if not meta.bCallable and not result:
+        # other property
+        try:
+            result = getattr(obj, meta.name)
+        except:
+            result = "skip call..."
+    return result
 
 
+# values may be evaluated in a worker thread by ObjectDetailViewer async query, avoid evaluating one value twice
+_resolve_lock = threading.RLock()   # for AttributeTable
+_ROW_LOCK_COUNT = 64
+_row_locks = [threading.RLock() for _ in range(_ROW_LOCK_COUNT)]
 
-    def apply_editor_property(self, obj, type_, rws, descript):
-        self.bEditorProperty = True
-        self.property_rw = "[{}]".format(rws)
 
-        try:
-            self.result = eval('obj.get_editor_property("{}")'.format(self.name))
-        except:
-            self.result = "Invalid"
+def _get_row_lock(row):
+    # striped by row, a row evaluated in a worker thread only blocks the few rows which share its lock
+    return _row_locks[(id(row) >> 4) % _ROW_LOCK_COUNT]
+
+_KIND_MASK = 0x7F
+_RESOLVED_BIT = 1 << 7  # packed with EAttrKind flags in attr_detail._flags and AttributeTable.flags
+
+
+def format_limited(value, max_length):
+    """
+    "{}".format(value) for displaying in max_length characters, the long containers are cut before being formatted,
+    so the result may still be longer than max_length, but never formats all the items of a huge container.
+    """
+    count = max_length // 2 + 1   # each item takes at least 2 characters with its separator
+    if isinstance(value, (list, tuple, set, frozenset, unreal.Array)) and len(value) > count:
+        value = list(itertools.islice(value, count))
+    elif isinstance(value, (dict, unreal.Map)) and len(value) > count:
+        value = dict(itertools.islice(value.items(), count))
+    return "{}".format(value)
+
+
+class _attr_base(object):
+    """
+    The common interface of attr_detail and AttributeRow, based on self.meta, self.result and self.bEditorProperty,
+    which are provided by the subclasses.
+    """
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return self.meta.name
+
+    @property
+    def bCallable(self):
+        return self.meta.bCallable
+
+    @property
+    def bCallable_builtin(self):
+        return self.meta.bCallable_builtin
+
+    @property
+    def bProperty(self):
+        return not self.meta.bCallable
+
+    @property
+    def param_str(self):
+        return self.meta.param_str
 
+    @property
+    def return_type_str(self):
+        return self.meta.return_type_str
 
+    @property
+    def doc_str(self):
+        return self.meta.doc_str
 
     def __str__(self):
         s = f"Attr: {self.name}  paramStr: {self.param_str}  desc: {self.return_type_str} result: {self.result}"
@@ -146,29 +283,15 @@ class attr_detail(object):
 
     @property
     def bOtherProperty(self):
-        if self.bProperty and not self.bEditorProperty:
-            return True
-        return False
+        return bool(self.kind_flags & EAttrKind.OTHER_PROPERTY)
 
     @property
     def bCallable_other(self):
-        if self.bCallable and not self.bCallable_builtin:
-            return True
-        return False
+        return bool(self.kind_flags & EAttrKind.OTHER_CALLABLE)
 
     @property
-    def display_name(self, bRichText=True):
-        if self.bProperty:
-            return f"\t{self.name}"
-        else:
-            # callable
-            if self.param_str:
-                return f"\t{self.name}({self.param_str})    {self.return_type_str}"
-            else:
-                if self.bCallable_other:
-                    return f"\t{self.name}"  # __hash__, __class__, __eq__ 等
-                else:
-                    return f"\t{self.name}()    {self.return_type_str}"
+    def display_name(self):
+        return self.meta.display_name
 
     @property
     def display_result(self) -> str:
@@ -177,123 +300,424 @@ class attr_detail(object):
         else:
             return "{}".format(self.result)
 
+    def get_display_result(self, max_length) -> str:
+        """ display_result for showing in max_length characters, see format_limited """
+        if self.bEditorProperty:
+            return "{}    {}".format(format_limited(self.result, max_length), self.property_rw)
+        else:
+            return format_limited(self.result, max_length)
+
     @property
     def bHasParamFunction(self):
-        return self.param_str and len(self.param_str) != 0
+        return bool(self.kind_flags & EAttrKind.PARAM_FUNCTION)
 
+    @property
+    def bEditorProperty(self):
+        return True if self.kind_flags & EAttrKind.EDITOR_PROPERTY else None
+
+
+class attr_detail(_attr_base):
+    __slots__ = ("meta", "_result", "_flags", "_obj", "property_rw", "_display_result")
+
+    def __init__(self, obj,  name:str, meta:attr_meta=None, lazy:bool=False):
+        """
+        :param lazy: True: the value will be evaluated at the first time of accessing self.result, and memoized.
+        """
+        if meta is None:
+            meta = attr_meta(obj, name)
+        self.meta = meta
+        self._result = None
+        self._flags = meta.kind_flags
+        self._obj = None
+        self._display_result = None
+        self.property_rw = "[{}]".format(meta.editor_property[1]) if meta.editor_property else None
+
+        if lazy:
+            self._obj = obj
+        else:
+            self.resolve(obj)
 
+    @property
+    def kind_flags(self) -> int:
+        return self._flags & _KIND_MASK
 
+    @property
+    def bResolved(self):
+        return bool(self._flags & _RESOLVED_BIT)
 
+    @property
+    def result(self):
+        if not self._flags & _RESOLVED_BIT:
+            self.resolve()
+        return self._result
 
-def ll(obj):
+    @result.setter
+    def result(self, value):
+        self._result = value
+        self._display_result = None
+        self._flags |= _RESOLVED_BIT
 
-    if not obj:
+    @property
+    def display_result(self) -> str:
+        # memoized, reevaluate forgets it
+        display_result = self._display_result
+        if display_result is None:
+            display_result = _attr_base.display_result.fget(self)
+            if self._flags & _RESOLVED_BIT:
+                self._display_result = display_result
+        return display_result
+
+    def resolve(self, obj=None):
+        """ Evaluate the value if not evaluated yet. obj: the owner object, default is the one given in __init__ """
+        if self._flags & _RESOLVED_BIT:
+            return self._result
+        with _get_row_lock(self):
+            if self._flags & _RESOLVED_BIT:
+                return self._result
+            if obj is None:
+                obj = self._obj
+                if obj is None:
+                    return None  # unbound in the crumb history, see bind_object
+            if self.bEditorProperty and not self.meta.editor_property:
+                # marked by apply_editor_property
+                self._result = self._get_editor_property(obj)
+            else:
+                self._result = evaluate_attribute(obj, self.meta)
+            self._flags |= _RESOLVED_BIT
+            self._obj = None
+        return self._result
+
+    def bind_object(self, obj):
+        """ Keep the owner object for the lazy evaluation, if it's not evaluated yet """
+        with _get_row_lock(self):
+            if not self._flags & _RESOLVED_BIT:
+                self._obj = obj
+
+    def release_object(self):
+        """ Drop the owner object, so an unevaluated row won't keep it alive, bind it again before evaluating """
+        with _get_row_lock(self):
+            self._obj = None
+
+    def reevaluate(self, obj):
+        """ Evaluate the value again, for watching the value changes """
+        with _get_row_lock(self):
+            self._flags &= ~_RESOLVED_BIT
+            self._display_result = None
+            self._obj = obj
+            return self.resolve()
+
+    def _get_editor_property(self, obj):
+        try:
+            return obj.get_editor_property(self.name)
+        except:
+            return "Invalid"
+
+    def post(self, obj):
+        if self.bOtherProperty and not self._result:
+            try:
+                self.result = getattr(obj, self.name)
+            except:
+                self.result = "skip call..."
+
+    def apply_editor_property(self, obj, type_, rws, descript):
+        self._flags = (self._flags & ~EAttrKind.OTHER_PROPERTY) | EAttrKind.EDITOR_PROPERTY
+        self.property_rw = "[{}]".format(rws)
+        self.result = self._get_editor_property(obj)
+
+
+class AttributeTable(object):
+    """
+    Struct-of-arrays storage of the attributes of one object, for introspecting lots of objects. The attr_meta list is
+    shared by all the objects of the same class, each object only stores its values and a byte of flags per attribute,
+    the EAttrKind flags packed with the resolved bit.
+    table[i] returns an AttributeRow, a thin view with the same interface as attr_detail.
+    """
+    __slots__ = ("metas", "results", "flags", "_obj", "_index_by_name")
+
+    def __init__(self, obj, metas=None, lazy=True):
+        self.metas = metas if metas is not None else get_class_meta(obj)
+        self.results = [None] * len(self.metas)
+        self.flags = bytearray(meta.kind_flags for meta in self.metas)
+        self._obj = obj
+        self._index_by_name = None
+        if not lazy:
+            self.resolve_all()
+
+    def __len__(self):
+        return len(self.metas)
+
+    def __getitem__(self, index):
+        return AttributeRow(self, index)
+
+    def __iter__(self):
+        return (AttributeRow(self, i) for i in range(len(self.metas)))
+
+    def name(self, index):
+        return self.metas[index].name
+
+    def index_of(self, name):
+        if self._index_by_name is None:
+            self._index_by_name = {meta.name: i for i, meta in enumerate(self.metas)}
+        return self._index_by_name.get(name, -1)
+
+    def kind_flags(self, index):
+        return self.flags[index] & _KIND_MASK
+
+    def is_resolved(self, index):
+        return bool(self.flags[index] & _RESOLVED_BIT)
+
+    def result(self, index):
+        if not self.flags[index] & _RESOLVED_BIT:
+            with _resolve_lock:
+                if not self.flags[index] & _RESOLVED_BIT:
+                    self.results[index] = evaluate_attribute(self._obj, self.metas[index])
+                    self.flags[index] |= _RESOLVED_BIT
+        return self.results[index]
+
+    def resolve_all(self):
+        for i in range(len(self.metas)):
+            self.result(i)
+        self.release()
+
+    def release(self):
+        """ Drop the reference to the object, the unresolved values can't be evaluated after that """
+        self._obj = None
+
+
+class AttributeRow(_attr_base):
+    # a view of one row in AttributeTable
+    __slots__ = ("table", "index")
+
+    def __init__(self, table:AttributeTable, index:int):
+        self.table = table
+        self.index = index
+
+    @property
+    def meta(self):
+        return self.table.metas[self.index]
+
+    @property
+    def kind_flags(self) -> int:
+        return self.table.kind_flags(self.index)
+
+    @property
+    def bResolved(self):
+        return self.table.is_resolved(self.index)
+
+    @property
+    def property_rw(self):
+        return "[{}]".format(self.meta.editor_property[1]) if self.meta.editor_property else None
+
+    @property
+    def result(self):
+        return self.table.result(self.index)
+
+    def resolve(self, obj=None):
+        return self.table.result(self.index)
+
+    def bind_object(self, obj):
+        self.table._obj = obj
+
+    def release_object(self):
+        self.table.release()
+
+
+_class_meta_cache = {}   # {(type, class_path): [attr_meta]}
+
+
+def _get_class_key(obj):
+    # Only the unreal types have the same attributes for all instances, python objects may have their own __dict__
+    if isinstance(obj, unreal.Object):
+        try:
+            return type(obj), obj.get_class().get_path_name()
+        except Exception:
+            return None
+    if isinstance(obj, unreal.StructBase):
+        return type(obj), ""
+    return None
+
+
+bUsePersistentMetaCache = True
+_persistent_store = None
+
+
+def get_persistent_store():
+    """ The ClassMetaStore under Saved/, opened and warmed up in background on first use. None if it's disabled """
+    global _persistent_store
+    if not bUsePersistentMetaCache:
         return None
-    if inspect.ismodule(obj):
+    if _persistent_store is None:
+        try:
+            from .ClassMetaStore import ClassMetaStore
+            _persistent_store = ClassMetaStore()
+            _persistent_store.warm_up()
+        except Exception as e:
+            unreal.log_warning(f"Persistent class meta cache disabled: {e}")
+            globals()["bUsePersistentMetaCache"] = False
+            return None
+    return _persistent_store
+
+
+bUseCallPolicy = True
+_call_policy = None
+
+
+def get_call_policy():
+    """ The CallPolicy which times the getters and skips the slow or crashing ones. None if it's disabled """
+    global _call_policy
+    if not bUseCallPolicy:
         return None
+    if _call_policy is None:
+        try:
+            from .CallPolicy import CallPolicy
+            _call_policy = CallPolicy()
+        except Exception as e:
+            unreal.log_warning(f"Call policy disabled: {e}")
+            globals()["bUseCallPolicy"] = False
+            return None
+    return _call_policy
 
-    result = []
-    for x in dir(obj):
-        attr = attr_detail(obj, x)
-        result.append(attr)
 
+def attach_call_stats(policy_key, meta:attr_meta):
+    if meta.eval_mode == EVAL_CALL and meta.call_stats is None:
+        meta.call_stats = _call_policy.get_stats(policy_key, meta.name)
 
-    if hasattr(obj, '__doc__') and isinstance(obj, unreal.Object):
-        editorPropertiesInfos = _getEditorProperties(obj.__doc__, obj)
-        for name, type_, rws, descript in editorPropertiesInfos:
-            # print(f"~~ {name} {type} {rws}, {descript}")
-
-            index = -1
-            for i, v in enumerate(result):
-                if v.name == name:
-                    index = i
-                    break
-            if index != -1:
-                this_attr = result[index]
-            else:
-                this_attr = attr_detail(obj, name)
-                result.append(this_attr)
-                # unreal.log_warning(f"Can't find editor property: {name}")
 
-            this_attr.apply_editor_property(obj, type_, rws, descript)
+def call_batch(metas):
+    """ A CallPolicy batch of the getters of metas, the pending marker is written once for all of them """
+    if _call_policy is None:
+        return nullcontext()
+    return _call_policy.batch([meta.call_stats for meta in metas if meta.call_stats is not None])
 
-    for i, attr in enumerate(result):
-        attr.post(obj)
 
-    return result
+def _get_policy_key(key):
+    cls, class_path = key
+    return f"{getattr(cls, '__module__', '')}.{cls.__qualname__}|{class_path}"
 
 
-def _simplifyDoc(content):
-    def next_balanced(content, s="(", e = ")" ):
-        s_pos = -1
-        e_pos = -1
-        balance = 0
-        for index, c in enumerate(content):
-            match = c == s or c == e
-            if not match:
-                continue
-            balance += 1 if c == s else -1
-            if c == s and balance == 1 and s_pos == -1:
-                s_pos = index
-            if c == e and balance == 0 and s_pos != -1 and e_pos == -1:
-                e_pos = index
-                return s_pos, e_pos
-        return -1, -1
-
-    # bracketS, bracketE = content.find('('), content.find(')')
-    if not content:
-        return "", ""
-    bracketS, bracketE = next_balanced(content, s='(', e = ')')
-    arrow = content.find('->')
-    funcDocPos = len(content)
-    endSign = ['--', '\n', '\r']
-    for s in endSign:
-        p = content.find(s)
-        if p != -1 and p < funcDocPos:
-            funcDocPos = p
-    funcDoc = content[:funcDocPos]
-    if bracketS != -1 and bracketE != -1:
-        param = content[bracketS + 1: bracketE].strip()
-    else:
-        param = ""
-    return funcDoc, param
-
-
-def _getEditorProperties(content, obj):
-    # print("Content: {}".format(content))
-
-    lines = content.split('\r')
-    signFound = False
-    allInfoFound = False
-    result = []
-    for line in lines:
-        if not signFound and '**Editor Properties:**' in line:
-            signFound = True
-        if signFound:
-            #todo re
-            # nameS, nameE = line.find('``') + 2, line.find('`` ')
-            nameS, nameE = line.find('- ``') + 4, line.find('`` ')
-            if nameS == -1 or nameE == -1:
-                continue
-            typeS, typeE = line.find('(') + 1, line.find(')')
-            if typeS == -1 or typeE == -1:
-                continue
-            rwS, rwE = line.find('[') + 1, line.find(']')
-            if rwS == -1 or rwE == -1:
-                continue
-            name = line[nameS: nameE]
-            type_str = line[typeS: typeE]
-            rws = line[rwS: rwE]
-            descript = line[rwE + 2:]
-            allInfoFound = True
-            result.append((name, type_str, rws, descript))
-            # print(name, type, rws)
-    if signFound:
-        if not allInfoFound:
-            unreal.log_warning("not all info found {}".format(obj))
-    else:
-        unreal.log_warning("can't find editor properties in {}".format(obj))
-    return result
+def _get_persistent_key(key):
+    # Only the native classes are stored, Blueprint and python classes can be changed between sessions
+    cls, class_path = key
+    if getattr(cls, "__module__", None) != "unreal":
+        return None
+    if class_path and not class_path.startswith("/Script/"):
+        return None
+    return f"{cls.__qualname__}|{class_path}"
+
+
+def iter_class_meta(obj):
+    """
+    Generator version of get_class_meta, the attr_meta are yielded while being built, so the query can be time sliced.
+    The result is only cached after the generator is exhausted.
+    """
+    key = _get_class_key(obj)
+    metas = _class_meta_cache.get(key, None) if key is not None else None
+    if metas is not None:
+        yield from metas
+        return
+
+    store = get_persistent_store() if key is not None else None
+    persistent_key = _get_persistent_key(key) if store else None
+    policy_key = _get_policy_key(key) if key is not None and get_call_policy() else None
+    if persistent_key:
+        records = store.load(persistent_key)
+        if records is not None:
+            metas = [attr_meta.from_record(record) for record in records]
+            if policy_key:
+                for meta in metas:
+                    attach_call_stats(policy_key, meta)
+            _class_meta_cache[key] = metas
+            yield from metas
+            return
+
+    editorPropertiesInfos = {}
+    if hasattr(obj, '__doc__') and isinstance(obj, unreal.Object):
+        for name, type_, rws, descript in DocParser.get_editor_properties(obj.__doc__, obj):
+            editorPropertiesInfos[name] = (type_, rws, descript)
+
+    metas = []
+    names = set()
+    for x in dir(obj):
+        meta = attr_meta(obj, x, editorPropertiesInfos.get(x, None))
+        if policy_key:
+            attach_call_stats(policy_key, meta)
+        metas.append(meta)
+        names.add(x)
+        yield meta
+    for name, info in editorPropertiesInfos.items():
+        if name not in names:
+            meta = attr_meta(obj, name, info)
+            metas.append(meta)
+            yield meta
+
+    if key is not None:
+        _class_meta_cache[key] = metas
+        if persistent_key:
+            store.save(persistent_key, [meta.to_record() for meta in metas])
+
+
+def get_class_meta(obj):
+    """
+    Get the attr_meta list of obj. The result of unreal.Object and unreal.StructBase is cached per class,
+    so the doc parsing only runs at the first query of each class.
+    """
+    return list(iter_class_meta(obj))
+
+
+def invalidate_class_meta(target=None, bPersistent=False):
+    """
+    Remove the cached attr_meta, need to be called after a Blueprint was recompiled or python classes were reloaded.
+    :param target: None: remove all; a type: remove that type; a str: class path, like "/Game/BP_A.BP_A_C",
+                    or module name of reloaded python classes
+    :param bPersistent: also clear the on disk cache of current engine version, only used when target is None
+    :return: removed count
+    """
+    if target is None:
+        count = len(_class_meta_cache)
+        _class_meta_cache.clear()
+        if bPersistent and get_persistent_store():
+            get_persistent_store().clear()
+        return count
+    keys = []
+    for key in _class_meta_cache.keys():
+        cls, class_path = key
+        if isinstance(target, str):
+            if class_path == target or getattr(cls, "__module__", None) == target:
+                keys.append(key)
+        elif cls is target:
+            keys.append(key)
+    for key in keys:
+        _class_meta_cache.pop(key, None)
+    return len(keys)
+
+
+def invalidate_class_meta_of(obj):
+    """
+    Remove the cached attr_meta of the class of obj, if the class can be changed in the session, like Blueprint
+    classes, which may be recompiled, and python classes, which may be reloaded. The native classes are kept.
+    :return: removed count
+    """
+    key = _get_class_key(obj)
+    if key is None or _get_persistent_key(key):
+        return 0
+    return 1 if _class_meta_cache.pop(key, None) is not None else 0
+
+
+def ll(obj, lazy=False):
+    """
+    Get the attr_detail list of obj.
+    :param lazy: True: only collect the attributes, the values are evaluated on demand when attr_detail.result is accessed
+    """
+    if not obj:
+        return None
+    if inspect.ismodule(obj):
+        return None
+
+    metas = get_class_meta(obj)
+    if lazy:
+        return [attr_detail(obj, meta.name, meta, lazy=True) for meta in metas]
+    with call_batch(metas):
+        return [attr_detail(obj, meta.name, meta, lazy=False) for meta in metas]
 
 
 def log_classes(obj):
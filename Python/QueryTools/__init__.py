@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
 from . import queryTools
 from . import ObjectDetailViewer
+from . import ExecutorMetricsPanel
 
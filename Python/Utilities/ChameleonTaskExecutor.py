@@ -1,17 +1,33 @@
+import collections
+import functools
+import itertools
 import json
+import threading
+import time
+import weakref
 from enum import Enum, auto
 import inspect
 from typing import Callable, Union
 
-from concurrent.futures import ThreadPoolExecutor, Future
+from concurrent.futures import Future
 from threading import Lock
 
 import logging
 
 import unreal
 
+from .ExecutorMetrics import ExecutorMetrics
+from .ExecutorService import get_executor_service, iter_chunks, run_chunk, LANE_IO, LANE_PROCESS, PRIORITY_NORMAL
+
 logger = logging.getLogger(__name__)
 
+# this module is imported by the tools on the game thread
+_game_thread_ident = threading.get_ident()
+
+
+def is_game_thread() -> bool:
+    return threading.get_ident() == _game_thread_ident
+
 
 class FuncType(Enum):
     STATIC_METHOD = auto()
@@ -66,21 +82,353 @@ def get_func_type(callback: callable, cls=None) -> FuncType:
     return FuncType.UNKNOWN
 
 
+class TaskCancelled(Exception):
+    """ Raised in a task by TaskContext.check, after the task was cancelled or its deadline has passed """
+    pass
+
+
+class TaskContext(object):
+    """
+    The cancellation token, deadline and progress channel of one task.
+    The task calls check() or reads bCancelled between its steps, so it can stop at a safe point, and writes its
+    progress with report_progress. The game thread only reads the latest progress, see ChameleonTaskExecutor.watch_progress.
+    The timing of the task is kept here too, for the ExecutorMetrics.
+    """
+    __slots__ = ("deadline", "_bCancelled", "_progress", "progress_version", "name", "submit_time", "start_time"
+                 , "thread_id")
+
+    def __init__(self, timeout=None):
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self._bCancelled = False
+        self._progress = (0, 0, "")     # (done, total, message), replaced as a whole, so it's never half updated
+        self.progress_version = 0
+        self.name = None                # the task name, only when the metrics are traced
+        self.submit_time = time.perf_counter()
+        self.start_time = None
+        self.thread_id = None
+
+    def cancel(self):
+        self._bCancelled = True
+
+    @property
+    def bTimeout(self) -> bool:
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    @property
+    def bCancelled(self) -> bool:
+        return self._bCancelled or self.bTimeout
+
+    def check(self):
+        if self._bCancelled:
+            raise TaskCancelled("Task cancelled.")
+        if self.bTimeout:
+            raise TaskCancelled("Task timeout.")
+
+    def report_progress(self, done, total=None, message=None):
+        """ Called by the task, as often as it likes, the readers are throttled """
+        _, last_total, last_message = self._progress
+        self._progress = (done, last_total if total is None else total, last_message if message is None else message)
+        self.progress_version += 1
+
+    @property
+    def progress(self):
+        """ (done, total, message) """
+        return self._progress
+
+    def get_percent(self) -> float:
+        done, total, _ = self._progress
+        return min(1.0, done / total) if total else 0.0
+
+
+class _ProgressWatch(object):
+    __slots__ = ("future", "context", "data", "progress_bar", "on_progress", "min_interval", "last_time", "last_version")
+
+    def __init__(self, future, context, data, progress_bar, on_progress, min_interval):
+        self.future = future
+        self.context = context
+        self.data = data
+        self.progress_bar = progress_bar
+        self.on_progress = on_progress
+        self.min_interval = min_interval
+        self.last_time = 0.0
+        self.last_version = -1
+
+    def update(self, now, bFinal=False):
+        version = self.context.progress_version
+        if not bFinal and (version == self.last_version or now - self.last_time < self.min_interval):
+            return
+        self.last_time = now
+        self.last_version = version
+        if self.progress_bar:
+            bSucceeded = bFinal and not self.future.cancelled() and self.future.exception() is None
+            self.data.set_progress_bar_percent(self.progress_bar, 1.0 if bSucceeded else self.context.get_percent())
+        if self.on_progress:
+            done, total, message = self.context.progress
+            self.on_progress(done, total, message)
+
+
+class GameThreadQueue:
+    """
+    The calls from worker threads which need to run on the game thread, like the unreal apis. They are queued and
+    drained in batches by a slate post tick callback, so a worker can wait for a small engine read or write in the
+    middle of its task, without a round trip of exec_python_command for each call.
+    The done callbacks of the tasks are queued here too, and dispatched together once per tick or batch_window.
+    The progress of the watched tasks is read here, at most max_rate times per second for each task.
+    The tick callback is only registered while there are queued calls, completions or watches.
+    """
+    def __init__(self, budget_per_tick=0.005, batch_window=0.0):
+        self.budget_per_tick = budget_per_tick  # seconds, the rest of the calls are run in next tick
+        self.batch_window = batch_window        # seconds, how long the first done callback can wait for others
+        self.tick_handle = None
+        self._queue = collections.deque()  # (future, fn, args, kwargs)
+        self._completions = collections.deque()  # (callback id or command str, future id, bBatch, time, metrics
+                                                 #  , on_dispatched)
+        self._progress_watches = []
+        self._bStartRequested = False
+        self._tick_lock = Lock()    # the items are queued before the lock is taken, see _request_start and _on_tick
+
+    def start(self):
+        """ Register the tick callback, must be called on the game thread """
+        with self._tick_lock:
+            if self.tick_handle is None:
+                self.tick_handle = unreal.register_slate_post_tick_callback(self._on_tick)
+            self._bStartRequested = False
+
+    def stop(self):
+        with self._tick_lock:
+            self._stop()
+
+    def _stop(self):
+        if self.tick_handle is not None:
+            unreal.unregister_slate_post_tick_callback(self.tick_handle)
+            self.tick_handle = None
+
+    def is_idle(self) -> bool:
+        return not self._queue and not self._completions and not self._progress_watches
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._queue)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        if is_game_thread():
+            # run it directly, waiting for the next tick on the game thread would dead lock
+            if future.set_running_or_notify_cancel():
+                self._run(future, fn, args, kwargs)
+            return future
+        self._queue.append((future, fn, args, kwargs))
+        self._request_start()
+        return future
+
+    def post_completion(self, callback, future_id, bBatch=False, metrics: ExecutorMetrics = None, on_dispatched=None):
+        """
+        Queue the done callback of a task, called from any thread.
+        :param callback: the id from register_callback, or a command string which has been formatted
+        :param bBatch: the callback receives a list of the future ids finished in the same batch
+        :param metrics: where the dispatch latency is recorded
+        :param on_dispatched: called on the game thread after the callback, even if the callback failed
+        """
+        self._completions.append((callback, future_id, bBatch, time.perf_counter(), metrics, on_dispatched))
+        self._request_start()
+
+    def add_progress_watch(self, watch: _ProgressWatch):
+        self._progress_watches.append(watch)
+        self._request_start()
+
+    def _update_progress_watches(self):
+        now = time.monotonic()
+        kept = []
+        for watch in self._progress_watches:
+            bFinal = watch.future.done()
+            try:
+                watch.update(now, bFinal)
+            except Exception as e:
+                unreal.log_warning(f"Progress update failed: {e}")
+                bFinal = True
+            if not bFinal:
+                kept.append(watch)
+        self._progress_watches = kept
+
+    def _request_start(self):
+        # called after an item is queued. The tick stops under the lock only if nothing is queued, so the item is
+        # either seen by the tick, or the tick has stopped and is started again here
+        with self._tick_lock:
+            if self.tick_handle is not None or self._bStartRequested:
+                return
+            if is_game_thread():
+                self.tick_handle = unreal.register_slate_post_tick_callback(self._on_tick)
+                return
+            self._bStartRequested = True
+        unreal.PythonBPLib.exec_python_command("import Utilities.ChameleonTaskExecutor as _executor_module;"
+                                               "_executor_module.game_thread_queue.start()", force_game_thread=True)
+
+    @staticmethod
+    def _run(future, fn, args, kwargs):
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def _on_tick(self, delta_seconds):
+        deadline = time.perf_counter() + self.budget_per_tick
+        while self._queue:
+            future, fn, args, kwargs = self._queue.popleft()
+            if future.set_running_or_notify_cancel():
+                self._run(future, fn, args, kwargs)
+            if time.perf_counter() > deadline:
+                break
+        if self._completions:
+            self.dispatch_completions()
+        if self._progress_watches:
+            self._update_progress_watches()
+        with self._tick_lock:
+            if self.is_idle():
+                self._stop()
+
+    def dispatch_completions(self, bForce=False):
+        """
+        Call the queued done callbacks, each callback id is called once with a list if it's a batch callback.
+        The command strings are executed one by one.
+        """
+        if not bForce and self.batch_window and time.perf_counter() - self._completions[0][3] < self.batch_window:
+            return
+        grouped = {}    # {(callback id, bBatch): [future id]}
+        cmds = []
+        latencies = []  # (metrics, post time)
+        dispatched_hooks = []
+        while self._completions:
+            callback, future_id, bBatch, post_time, metrics, on_dispatched = self._completions.popleft()
+            if metrics:
+                latencies.append((metrics, post_time))
+            if on_dispatched:
+                dispatched_hooks.append(on_dispatched)
+            if isinstance(callback, str):
+                cmds.append(callback)
+            else:
+                grouped.setdefault((callback, bBatch), []).append(future_id)
+        # each callback and command is guarded, so a failed one doesn't drop the others of the batch
+        for (callback_id, bBatch), future_ids in grouped.items():
+            for future_id in [future_ids] if bBatch else future_ids:
+                try:
+                    dispatch_callback(callback_id, future_id)
+                except Exception as e:
+                    unreal.log_error(f"Done callback {callback_id} of {future_id} failed: {e}")
+        for cmd in cmds:
+            try:
+                unreal.PythonBPLib.exec_python_command(cmd)
+            except Exception as e:
+                unreal.log_error(f"Done callback command {cmd} failed: {e}")
+        if latencies:
+            now = time.perf_counter()
+            for metrics, post_time in latencies:
+                metrics.record_callback(post_time, now)
+        for on_dispatched in dispatched_hooks:
+            on_dispatched()
+
+
+game_thread_queue = GameThreadQueue()
+
+
+def run_on_game_thread(fn: Callable, *args, **kwargs) -> Future:
+    """
+    Run fn(*args, **kwargs) on the game thread, called from the worker threads, use .result() to wait for it.
+    It's run directly if called on the game thread.
+    """
+    return game_thread_queue.submit(fn, *args, **kwargs)
+
+
+# callbacks registered by id, so a done callback is dispatched by id instead of a python source string rebuilt
+# from the caller's frames
+_callback_registry = {}     # {callback id: (callable or weakref.WeakMethod, param count, bWeak)}
+_callback_ids = {}          # {callback key: callback id}
+_callback_lock = Lock()
+_callback_id_counter = itertools.count(1)
+
+
+def _get_callback_key(callback):
+    if inspect.ismethod(callback):
+        return id(callback.__self__), callback.__func__
+    return callback
+
+
+def register_callback(callback: Callable) -> int:
+    """
+    Get the id of callback in the dispatch table, the bound methods are referenced weakly, so the owner tool
+    isn't kept alive by the table.
+    """
+    key = _get_callback_key(callback)
+    with _callback_lock:
+        callback_id = _callback_ids.get(key, None)
+        if callback_id is not None:
+            ref, _, bWeak = _callback_registry[callback_id]
+            if not bWeak or ref() is not None:
+                return callback_id
+        callback_id = next(_callback_id_counter)
+        bWeak = inspect.ismethod(callback)
+        ref = weakref.WeakMethod(callback) if bWeak else callback
+        _callback_registry[callback_id] = (ref, ChameleonTaskExecutor._number_of_param(callback), bWeak)
+        _callback_ids[key] = callback_id
+    return callback_id
+
+
+def dispatch_callback(callback_id: int, future_id: Union[int, list]):
+    """ Called on the game thread by GameThreadQueue, future_id is a list for the batch callbacks """
+    entry = _callback_registry.get(callback_id, None)
+    if entry is None:
+        unreal.log_warning(f"Unknown callback id: {callback_id}")
+        return
+    ref, param_count, bWeak = entry
+    callback = ref() if bWeak else ref
+    if callback is None:
+        return  # the owner has been destroyed
+    if param_count:
+        callback(future_id)
+    else:
+        callback()
+
+
+# the living executors, for the metrics panel
+_executors = weakref.WeakSet()
+
+
+def get_executors():
+    return list(_executors)
+
 
 class ChameleonTaskExecutor:
     """
     ChameleonTaskExecutor is a class for managing and executing tasks in parallel.
-    It uses a ThreadPoolExecutor to run tasks concurrently.
+    It's a handle onto the process-wide ExecutorService, so the tools share the worker threads instead of each
+    creating a thread pool.
+    The finished futures are kept for get_future and pop_result until they are popped, or for retention_ttl
+    seconds after they finished and their on_finish_callback has run, at most retention_count of them, the oldest
+    ones are dropped first. A future whose callback is still queued is never pruned.
     """
-    def __init__(self, owner):
+    def __init__(self, owner, retention_count=256, retention_ttl=300.0, lane=LANE_IO, priority=PRIORITY_NORMAL
+                 , quota=None):
         """
         Initialize the ChameleonTaskExecutor with the owner of the tasks.
+        lane, priority: the default ExecutorService lane and priority of the tasks, see submit_task
+        quota: at most how many tasks of this tool run at the same time in each lane, None: no limit
         """
         assert isinstance(owner.data, unreal.ChameleonData)
         self.owner = owner
-        self.executor = ThreadPoolExecutor()
+        self.executor = get_executor_service().create_client(type(owner).__name__, lane, priority, quota)
         self.futures_dict = {}
+        self.contexts = {}          # {future id: TaskContext}
         self.lock = Lock()
+        self._shared_ids = {}       # {(task, args, kwargs): future id}, see bShared of submit_task
+        self._shared_keys = {}      # {future id: (task, args, kwargs)}
+        self._shared_lock = Lock()
+        self.retention_count = retention_count
+        self.retention_ttl = retention_ttl
+        self.pending_count = 0      # submitted, not started yet
+        self.running_count = 0
+        self._finished = collections.OrderedDict()  # {future id: finish time}, oldest first, the prunable ones
+        self._pending_callbacks = {}    # {future id: count of the on_finish_callback not dispatched yet}
+        self.metrics = ExecutorMetrics(self.executor.name)
+        _executors.add(self)
 
     @staticmethod
     def _find_var_name_in_outer(target_var, by_type:bool=False)->str:
@@ -150,6 +498,10 @@ class ChameleonTaskExecutor:
         """Get the command string from a callable object. The command string is used to call the callable object"""
         if isinstance(callback, str):
             return callback
+        return ChameleonTaskExecutor._resolve_cmd_str_from_callable(callback)
+
+    @staticmethod
+    def _resolve_cmd_str_from_callable(callback: callable) -> str:
         callback_type = get_func_type(callback)
         if callback_type == FuncType.BUILTIN:
             return "{}(%)".format(callback.__qualname__)
@@ -193,42 +545,306 @@ class ChameleonTaskExecutor:
 
 
 
-    def submit_task(self, task:Callable, args=None, kwargs=None, on_finish_callback: Union[Callable, str] = None)-> int:
+    def submit_task(self, task:Callable, args=None, kwargs=None, on_finish_callback: Union[Callable, str] = None
+                    , bBatchCallback=False, lane=None, priority=None, timeout=None, bTaskContext=False
+                    , bShared=False)-> int:
         """
         Submit a task to be executed. The task should be a callable object.
         Args and kwargs are optional arguments to the task.
-        Callback is an optional function to be called when the task is done.
+        Callback is an optional function to be called when the task is done. The callbacks of the tasks finished in
+        the same tick are dispatched together on the game thread.
+        bBatchCallback: the callback is called once per batch, with the list of finished future ids.
+        lane, priority: the ExecutorService lane and priority of this task, None for the defaults of this executor.
+            In LANE_PROCESS, the task and its args must be picklable, and the task must be defined in a module which
+            can be imported without unreal. The large bytes args are passed by shared memory.
+        timeout: seconds from now, the task fails with TaskCancelled if it hasn't started by then, and a running task
+            sees it from its TaskContext. A task which doesn't check its TaskContext can't be stopped.
+        bTaskContext: the task is called with a task_context=TaskContext kwarg, for cancel_task and watch_progress.
+            Not for LANE_PROCESS, the context can't be shared with the worker processes.
+        bShared: if an identical (task, args, kwargs) is in flight, or has finished with a result within retention_ttl,
+            it's not submitted again, its future id is returned and on_finish_callback is added to it.
+            The tasks with unhashable args are always submitted.
+        """
+        return id(self._submit(task, args, kwargs, on_finish_callback, bBatchCallback, lane, priority, timeout
+                               , bTaskContext, bShared))
+
+    def submit_future(self, task:Callable, args=None, kwargs=None, lane=None, priority=None, timeout=None
+                      , bTaskContext=False, bShared=False) -> Future:
         """
+        Like submit_task, but return the Future of the task, for the callers which chain the tasks in the workers,
+        like TaskPipeline. The done callbacks of the future are called in the worker threads, not on the game thread.
+        """
+        return self._submit(task, args, kwargs, lane=lane, priority=priority, timeout=timeout
+                            , bTaskContext=bTaskContext, bShared=bShared)
+
+    def _submit(self, task:Callable, args=None, kwargs=None, on_finish_callback=None, bBatchCallback=False, lane=None
+                , priority=None, timeout=None, bTaskContext=False, bShared=False) -> Future:
         if args is None:
             args = []
         if kwargs is None:
             kwargs = {}
+        if on_finish_callback and not isinstance(on_finish_callback, str) \
+                and get_func_type(on_finish_callback) == FuncType.LAMBDA:
+            raise ValueError("Lambda function is not supported")
 
-        future = self.executor.submit(task, *args, **kwargs)
+        shared_key = self._get_shared_key(task, args, kwargs) if bShared else None
+        if shared_key is None:
+            future = self._submit_new(task, args, kwargs, lane, priority, timeout, bTaskContext)
+        else:
+            with self._shared_lock:
+                with self.lock:
+                    future = self.futures_dict.get(self._shared_ids.get(shared_key, None), None)
+                if future is not None and future.done() and (future.cancelled() or future.exception() is not None):
+                    future = None   # the failed ones are submitted again
+                if future is None:
+                    future = self._submit_new(task, args, kwargs, lane, priority, timeout, bTaskContext)
+                    with self.lock:
+                        self._shared_ids[shared_key] = id(future)
+                        self._shared_keys[id(future)] = shared_key
+        self._add_finish_callback(future, on_finish_callback, bBatchCallback)
+        return future
+
+    @staticmethod
+    def _get_shared_key(task, args, kwargs):
+        key = (task, tuple(args), tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _submit_new(self, task, args, kwargs, lane, priority, timeout, bTaskContext) -> Future:
+        context = TaskContext(timeout)
+        if bTaskContext:
+            kwargs = dict(kwargs, task_context=context)
+        if self.metrics.bTrace:
+            context.name = getattr(task, "__qualname__", None) or str(task)
+
+        with self.lock:
+            self.pending_count += 1
+            self.metrics.submitted_count += 1
+        future = self.executor.submit_to(lane, priority, task, args, kwargs
+                                         , on_start=functools.partial(self._on_start, context))
         assert future is not None, "future is None"
         future_id = id(future)
         with self.lock:
             self.futures_dict[future_id] = future
+            self.contexts[future_id] = context
+            self._prune()
+        # the done callbacks are added out of the lock, they are called immediately if the task has finished
+        future.add_done_callback(lambda _future: self._on_done(_future, future_id))
+        return future
+
+    def _add_finish_callback(self, future, on_finish_callback, bBatchCallback):
+        if not on_finish_callback:
+            return
+        future_id = id(future)
+        if isinstance(on_finish_callback, str):
+            param_count = ChameleonTaskExecutor._number_of_param(on_finish_callback)
+            callback = on_finish_callback.replace("%", str(future_id) if param_count else "")
+            bBatchCallback = False
+        else:
+            if get_func_type(on_finish_callback) == FuncType.LAMBDA:
+                raise ValueError("Lambda function is not supported")
+            callback = register_callback(on_finish_callback)
 
-            if on_finish_callback:
-                cmd = ChameleonTaskExecutor.get_cmd_str_from_callable(on_finish_callback)
-                param_count = ChameleonTaskExecutor._number_of_param(on_finish_callback)
+        with self.lock:
+            self._pending_callbacks[future_id] = self._pending_callbacks.get(future_id, 0) + 1
+            # a finished future isn't prunable until the new callback has run
+            self._finished.pop(future_id, None)
+        on_dispatched = functools.partial(self._on_callback_dispatched, future_id)
 
-                cmd = cmd.replace("%", str(future_id) if param_count else "")
+        def _func(_future):
+            game_thread_queue.post_completion(callback, future_id, bBatchCallback, self.metrics, on_dispatched)
 
-                def _func(_future):
-                    unreal.PythonBPLib.exec_python_command(cmd, force_game_thread=True)
+        future.add_done_callback(_func)
 
-                future.add_done_callback(_func)
+    def _on_callback_dispatched(self, future_id):
+        with self.lock:
+            count = self._pending_callbacks.get(future_id, 0) - 1
+            if count > 0:
+                self._pending_callbacks[future_id] = count
+                return
+            self._pending_callbacks.pop(future_id, None)
+            future = self.futures_dict.get(future_id, None)
+            if future is not None and future.done():
+                # the retention_ttl starts when the callback has run
+                self._finished.pop(future_id, None)
+                self._finished[future_id] = time.monotonic()
+            self._prune()
+
+    def track_future(self, future:Future, on_finish_callback: Union[Callable, str] = None, bBatchCallback=False) -> int:
+        """
+        Keep a future which isn't a task of this executor, like the one of a TaskPipeline, for get_future, pop_result
+        and the on_finish_callback on the game thread.
+        """
+        future_id = id(future)
+        with self.lock:
+            self.futures_dict[future_id] = future
+            self._prune()
+        future.add_done_callback(lambda _future: self._on_done(_future, future_id, bCounted=False))
+        self._add_finish_callback(future, on_finish_callback, bBatchCallback)
+        return future_id
 
-                unreal.log(f"submit_task callback cmd: {cmd}, param_count: {param_count}")
+    def map(self, fn:Callable, items, chunk_size=16, max_chunks_in_flight=None, lane=None, priority=None):
+        """
+        Like the builtin map, fn(item) is run in the workers, chunk_size items per task, and the results are yielded
+        in the order of items as soon as their chunk is done. At most max_chunks_in_flight chunks are submitted ahead
+        of the consumer, two per worker of the lane by default. The chunks not consumed are cancelled when the
+        generator is closed.
+        It blocks while waiting, so iterate it in a task of another lane, or on the game thread for short jobs only.
+        """
+        if max_chunks_in_flight is None:
+            max_chunks_in_flight = 2 * self.executor.service.lanes[lane if lane else self.executor.lane].max_workers
+        in_flight = collections.deque()
+        try:
+            for chunk in iter_chunks(items, chunk_size):
+                in_flight.append(self._submit(run_chunk, [fn, chunk], lane=lane, priority=priority))
+                if len(in_flight) >= max_chunks_in_flight:
+                    yield from self._pop_chunk(in_flight)
+            while in_flight:
+                yield from self._pop_chunk(in_flight)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _pop_chunk(self, in_flight):
+        future = in_flight.popleft()
+        results = future.result()
+        # the chunks are consumed here, they don't take the room of the other tasks in the retained futures
+        self.pop_result(id(future))
+        return results
+
+    def _on_start(self, context: TaskContext):
+        context.start_time = time.perf_counter()
+        context.thread_id = threading.get_ident()
+        with self.lock:
+            self.pending_count -= 1
+            self.running_count += 1
+            self.metrics.queue_wait.add(context.start_time - context.submit_time)
+        # the task is cancelled or too late, it fails before it runs
+        context.check()
+
+    def _on_done(self, future, future_id, bCounted=True):
+        done_time = time.perf_counter()
+        with self.lock:
+            if bCounted:
+                if future.cancelled():
+                    self.pending_count -= 1
+                    self.metrics.cancelled_count += 1
+                else:
+                    self.running_count -= 1
+                    if future.exception() is None:
+                        self.metrics.succeeded_count += 1
+                    else:
+                        self.metrics.failed_count += 1
+                context = self.contexts.get(future_id, None)
+                if context and context.start_time is not None:
+                    self.metrics.run_time.add(done_time - context.start_time)
+                    self.metrics.record_task(context.name, context.submit_time, context.start_time, done_time
+                                             , context.thread_id)
+            if future_id in self.futures_dict and future_id not in self._pending_callbacks:
+                self._finished[future_id] = time.monotonic()
+            self._prune()
+
+    def _prune(self):
+        # called with the lock, the finished futures are ordered by finish time, so only the head is checked.
+        # _finished only has the futures whose callbacks have run, or which have no callback
+        now = time.monotonic()
+        while self._finished:
+            future_id, finish_time = next(iter(self._finished.items()))
+            if now - finish_time <= self.retention_ttl and len(self._finished) <= self.retention_count:
+                break
+            self._finished.popitem(last=False)
+            if future_id not in self._pending_callbacks:
+                self._forget(future_id)
+
+    def _forget(self, future_id):
+        # called with the lock
+        self.futures_dict.pop(future_id, None)
+        self.contexts.pop(future_id, None)
+        shared_key = self._shared_keys.pop(future_id, None)
+        if shared_key is not None and self._shared_ids.get(shared_key, None) == future_id:
+            del self._shared_ids[shared_key]
 
-        return future_id
+    @staticmethod
+    def run_on_game_thread(fn: Callable, *args, **kwargs) -> Future:
+        """ See run_on_game_thread of the module, for the tasks which need to call unreal apis """
+        return run_on_game_thread(fn, *args, **kwargs)
 
     def get_future(self, future_id)-> Future:
         with self.lock:
             return self.futures_dict.get(future_id, None)
 
+    def get_task_context(self, future_id) -> TaskContext:
+        with self.lock:
+            return self.contexts.get(future_id, None)
+
+    def get_task_progress(self, future_id):
+        """ :return: (done, total, message) of the task, None if the task is unknown """
+        context = self.get_task_context(future_id)
+        return context.progress if context else None
+
+    def cancel_task(self, future_id) -> bool:
+        """
+        Cancel a queued task, or ask a running task to stop at its next TaskContext check.
+        :return: False if the task is unknown or finished
+        """
+        future = self.get_future(future_id)
+        if future is None or future.done():
+            return False
+        context = self.get_task_context(future_id)
+        if context:
+            context.cancel()
+        future.cancel()
+        return True
+
+    def watch_progress(self, future_id, progress_bar:str=None, on_progress:Callable=None, max_rate=10.0) -> bool:
+        """
+        Show the progress of a task on the game thread, at most max_rate times per second, until the task is done.
+        :param progress_bar: the aka name of a SProgressBar of the owner tool
+        :param on_progress: called with (done, total, message) on the game thread
+        :return: False if the task is unknown
+        """
+        future = self.get_future(future_id)
+        context = self.get_task_context(future_id)
+        if future is None or context is None:
+            return False
+        game_thread_queue.add_progress_watch(_ProgressWatch(future, context, self.owner.data, progress_bar
+                                                            , on_progress, 1.0 / max_rate if max_rate > 0 else 0.0))
+        return True
+
+    def get_metrics(self, bBuckets=False) -> dict:
+        """
+        The queue depth and the histograms of this executor, with the stats of the ExecutorService lanes.
+        The times are in milliseconds.
+        """
+        with self.lock:
+            result = self.metrics.to_dict(bBuckets)
+            result["pending"] = self.pending_count
+            result["running"] = self.running_count
+        result["lanes"] = self.executor.service.stats()
+        return result
+
+    def set_metrics_trace(self, trace_capacity=4096):
+        """ Keep the timing of the latest trace_capacity tasks for dump_metrics_trace, 0 to stop """
+        with self.lock:
+            self.metrics.set_trace_capacity(trace_capacity)
+
+    def reset_metrics(self):
+        with self.lock:
+            self.metrics.reset()
+
+    def dump_metrics(self, file_path):
+        """ Write the histograms to a .json or .csv file """
+        self.metrics.dump(file_path, extra={"pending": self.pending_count, "running": self.running_count
+            , "lanes": self.executor.service.stats()})
+
+    def dump_metrics_trace(self, file_path):
+        """ Write the traced tasks to a json file, which can be loaded by chrome://tracing, see set_metrics_trace """
+        with self.lock:
+            self.metrics.dump_trace(file_path, game_thread_id=_game_thread_ident)
+
     def get_task_is_running(self, future_id)-> bool:
         future = self.get_future(future_id)
         if future is not None:
@@ -236,7 +852,74 @@ class ChameleonTaskExecutor:
         return False
 
     def is_any_task_running(self):
-        for future_id in self.futures_dict.keys():
-            if self.get_task_is_running(future_id):
-                return True
-        return False
\ No newline at end of file
+        return self.running_count > 0
+
+    def is_any_task_unfinished(self):
+        return self.pending_count + self.running_count > 0
+
+    def close(self, bWait=False):
+        """
+        Cancel the queued tasks of this tool and ask the running ones to stop, called when the tool is closed.
+        The other tools are not affected.
+        """
+        with self.lock:
+            for context in self.contexts.values():
+                context.cancel()
+        count = self.executor.cancel_queued()
+        if bWait:
+            self.executor.wait()
+        return count
+
+    def pop_result(self, future_id, default=None):
+        """
+        Get the result of a finished task and remove its future. The exception of the task is raised.
+        :return: default if the task is unknown, pruned or not finished yet
+        """
+        with self.lock:
+            future = self.futures_dict.get(future_id, None)
+            if future is None or not future.done():
+                return default
+            self._forget(future_id)
+            self._finished.pop(future_id, None)
+        return future.result()
+
+
+def _bench_task():
+    return None
+
+
+def _bench_callback(future_id):
+    pass
+
+
+def bench_submit_throughput(owner, count=1000, bPrint=True):
+    """
+    Submit throughput in tasks/sec, with the done callback resolved from the caller's frames for every submit as
+    before the dispatch table, and with the dispatch table.
+    :param owner: a tool with .data, see ChameleonTaskExecutor
+    :return: {name: tasks per second}
+    """
+    executor = ChameleonTaskExecutor(owner)
+
+    def _submit_resolving_frames(callback):
+        future = executor.executor.submit(_bench_task)
+        try:
+            cmd = ChameleonTaskExecutor._resolve_cmd_str_from_callable(callback)
+        except Exception:
+            cmd = f"{callback.__qualname__}(%)"
+        return future, cmd
+
+    result = {}
+    t = time.perf_counter()
+    for _ in range(count):
+        _submit_resolving_frames(_bench_callback)
+    result["resolve frames"] = count / (time.perf_counter() - t)
+    t = time.perf_counter()
+    for _ in range(count):
+        executor.submit_task(_bench_task, on_finish_callback=_bench_callback)
+    result["dispatch table"] = count / (time.perf_counter() - t)
+    executor.executor.shutdown(wait=True)
+    if bPrint:
+        for name, tasks_per_second in result.items():
+            print(f"{name:>16}: {tasks_per_second:12,.0f} tasks/s")
+    return result
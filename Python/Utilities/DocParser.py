@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import re
+from collections import namedtuple
+
+import unreal
+
+EDITOR_PROPERTIES_SIGN = "**Editor Properties:**"
+
+EditorPropertyRecord = namedtuple("EditorPropertyRecord", ["name", "type_str", "rws", "descript"])
+
+# - ``actor_class`` (type(Class)):  [Read-Write] Actor Class
+# the type may contain brackets, so it ends at the first "):" before the "[rws]"
+_editor_property_re = re.compile(r"(?:^|[\r\n])[ \t]*- ``(?P<name>[^`\r\n]+)`` \((?P<type_str>[^\r\n]*?)\):[ \t]*"
+                                 r"\[(?P<rws>[^\]\r\n]*)\] ?(?P<descript>[^\r\n]*)")
+_func_doc_end_re = re.compile(r"--|[\r\n]")
+_bracket_re = re.compile(r"[()]")
+
+
+def _next_balanced(content):
+    """ The positions of the first "(" and its matched ")", (-1, -1) if not found """
+    s_pos = -1
+    balance = 0
+    for m in _bracket_re.finditer(content):
+        if m.group() == "(":
+            balance += 1
+            if s_pos == -1:
+                s_pos = m.start()
+        elif s_pos != -1:
+            balance -= 1
+            if balance == 0:
+                return s_pos, m.start()
+    return -1, -1
+
+
+def simplify_doc(content):
+    """
+    Split the doc of a builtin method, like "get_actor_label() -> str -- Returns the label of the actor."
+    :return: (the first line of the doc without description, the params string in the first brackets)
+    """
+    if not content:
+        return "", ""
+    m = _func_doc_end_re.search(content)
+    funcDoc = content[:m.start()] if m else content
+    bracketS, bracketE = _next_balanced(content)
+    param = content[bracketS + 1: bracketE].strip() if bracketS != -1 else ""
+    return funcDoc, param
+
+
+def parse_editor_properties(content):
+    """
+    Parse the "**Editor Properties:**" section of the doc of an unreal class, all the line endings are supported.
+    :return: ([EditorPropertyRecord], whether the section was found)
+    """
+    if not content:
+        return [], False
+    start = content.find(EDITOR_PROPERTIES_SIGN)
+    if start == -1:
+        return [], False
+    records = [EditorPropertyRecord(*m.group("name", "type_str", "rws", "descript"))
+               for m in _editor_property_re.finditer(content, start)]
+    return records, True
+
+
+def get_editor_properties(content, obj):
+    """ parse_editor_properties, and warn if there is no editor property found in the doc of obj """
+    records, bSignFound = parse_editor_properties(content)
+    if bSignFound:
+        if not records:
+            unreal.log_warning("not all info found {}".format(obj))
+    else:
+        unreal.log_warning("can't find editor properties in {}".format(obj))
+    return records
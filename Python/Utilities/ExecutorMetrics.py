@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+import collections
+import csv
+import json
+import os
+import threading
+import time
+
+# no unreal in this module, the metrics are recorded in the worker threads
+
+
+class LatencyHistogram(object):
+    """
+    Durations in log2 buckets of microseconds, bucket i holds [2^(i-1), 2^i) us, so an add is O(1) and the memory
+    is fixed. The percentiles are the upper bounds of their buckets, at most 2x off.
+    The caller holds a lock for add.
+    """
+    BUCKET_COUNT = 32   # the last bucket holds everything longer than about 18 minutes
+    __slots__ = ("counts", "count", "total_seconds", "max_seconds")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * LatencyHistogram.BUCKET_COUNT
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def add(self, seconds):
+        index = int(seconds * 1000000).bit_length() if seconds > 0 else 0
+        self.counts[index if index < LatencyHistogram.BUCKET_COUNT else LatencyHistogram.BUCKET_COUNT - 1] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    @staticmethod
+    def get_bucket_upper_seconds(index):
+        return (1 << index) / 1000000
+
+    @property
+    def mean_seconds(self):
+        return self.total_seconds / self.count if self.count else 0.0
+
+    def percentile(self, percent) -> float:
+        """ :return: seconds, percent in [0, 100] """
+        if not self.count:
+            return 0.0
+        target = self.count * percent / 100
+        accumulated = 0
+        for i, count in enumerate(self.counts):
+            accumulated += count
+            if accumulated >= target and count:
+                return min(LatencyHistogram.get_bucket_upper_seconds(i), self.max_seconds)
+        return self.max_seconds
+
+    def to_dict(self, bBuckets=False):
+        result = {"count": self.count, "mean_ms": round(self.mean_seconds * 1000, 3)
+            , "p50_ms": round(self.percentile(50) * 1000, 3), "p90_ms": round(self.percentile(90) * 1000, 3)
+            , "p99_ms": round(self.percentile(99) * 1000, 3), "max_ms": round(self.max_seconds * 1000, 3)}
+        if bBuckets:
+            last = max((i for i, count in enumerate(self.counts) if count), default=-1)
+            result["buckets"] = [[LatencyHistogram.get_bucket_upper_seconds(i) * 1000, self.counts[i]]
+                                 for i in range(last + 1)]
+        return result
+
+
+class ExecutorMetrics(object):
+    """
+    The metrics of one ChameleonTaskExecutor: the queue wait, run time and done callback dispatch latency of its
+    tasks, in LatencyHistogram. When trace_capacity is set, the timing of the latest tasks is kept too, for
+    dump_trace, in the chrome://tracing format.
+    """
+    HISTOGRAM_NAMES = ["queue_wait", "run_time", "callback_latency"]
+
+    def __init__(self, name, trace_capacity=0):
+        self.name = name
+        self.queue_wait = LatencyHistogram()        # submit to start
+        self.run_time = LatencyHistogram()          # start to done
+        self.callback_latency = LatencyHistogram()  # done to the on_finish_callback on the game thread
+        self.submitted_count = 0
+        self.succeeded_count = 0
+        self.failed_count = 0
+        self.cancelled_count = 0
+        self.start_time = time.perf_counter()
+        self.tasks = None       # deque of (name, submit time, start time, done time, thread id)
+        self.callbacks = None   # deque of (post time, dispatch time)
+        self._lock = threading.Lock()   # for the callbacks, the others are recorded with the lock of the executor
+        self.set_trace_capacity(trace_capacity)
+
+    @property
+    def bTrace(self):
+        return self.tasks is not None
+
+    def set_trace_capacity(self, trace_capacity):
+        """ Keep the timing of the latest trace_capacity tasks for dump_trace, 0 to stop tracing """
+        if trace_capacity:
+            self.tasks = collections.deque(self.tasks if self.tasks else [], maxlen=trace_capacity)
+            self.callbacks = collections.deque(self.callbacks if self.callbacks else [], maxlen=trace_capacity)
+        else:
+            self.tasks = self.callbacks = None
+
+    def reset(self):
+        for name in ExecutorMetrics.HISTOGRAM_NAMES:
+            getattr(self, name).reset()
+        self.submitted_count = self.succeeded_count = self.failed_count = self.cancelled_count = 0
+        self.start_time = time.perf_counter()
+        if self.tasks is not None:
+            self.tasks.clear()
+            self.callbacks.clear()
+
+    def record_task(self, name, submit_time, start_time, done_time, thread_id):
+        if self.tasks is not None:
+            self.tasks.append((name, submit_time, start_time, done_time, thread_id))
+
+    def record_callback(self, post_time, dispatch_time):
+        with self._lock:
+            self.callback_latency.add(dispatch_time - post_time)
+            if self.callbacks is not None:
+                self.callbacks.append((post_time, dispatch_time))
+
+    def to_dict(self, bBuckets=False):
+        result = {"name": self.name, "seconds": time.perf_counter() - self.start_time
+            , "submitted": self.submitted_count, "succeeded": self.succeeded_count, "failed": self.failed_count
+            , "cancelled": self.cancelled_count}
+        for name in ExecutorMetrics.HISTOGRAM_NAMES:
+            result[name] = getattr(self, name).to_dict(bBuckets)
+        return result
+
+    def get_trace_events(self, pid=None, game_thread_id=0):
+        """ The chrome://tracing events: the queue and callback waits are async events, the runs are complete events """
+        pid = os.getpid() if pid is None else pid
+
+        def _us(t):
+            return round((t - self.start_time) * 1000000, 1)
+
+        events = []
+        if self.tasks is None:
+            return events
+        for i, (name, submit_time, start_time, done_time, thread_id) in enumerate(list(self.tasks)):
+            if start_time is not None:
+                events.append({"name": name, "cat": "queue", "ph": "b", "id": i, "ts": _us(submit_time), "pid": pid
+                                  , "tid": thread_id})
+                events.append({"name": name, "cat": "queue", "ph": "e", "id": i, "ts": _us(start_time), "pid": pid
+                                  , "tid": thread_id})
+                events.append({"name": name, "cat": "run", "ph": "X", "ts": _us(start_time)
+                                  , "dur": round((done_time - start_time) * 1000000, 1), "pid": pid, "tid": thread_id})
+        for i, (post_time, dispatch_time) in enumerate(list(self.callbacks)):
+            # the waits of the callbacks overlap, so they are async events too
+            events.append({"name": "done callback", "cat": "callback", "ph": "b", "id": f"c{i}", "ts": _us(post_time)
+                              , "pid": pid, "tid": game_thread_id})
+            events.append({"name": "done callback", "cat": "callback", "ph": "e", "id": f"c{i}"
+                              , "ts": _us(dispatch_time), "pid": pid, "tid": game_thread_id})
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": game_thread_id
+                          , "args": {"name": "game thread"}})
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": self.name}})
+        return events
+
+    def dump_trace(self, file_path, game_thread_id=0):
+        """ Write the traced tasks as a json file for chrome://tracing or ui.perfetto.dev """
+        _make_folder(file_path)
+        with open(file_path, 'w', encoding="utf-8") as f:
+            json.dump({"traceEvents": self.get_trace_events(game_thread_id=game_thread_id), "displayTimeUnit": "ms"}
+                      , f, separators=(',', ':'))
+
+    def dump(self, file_path, extra=None):
+        """ Write the histograms, json with the buckets, or csv with one row per histogram """
+        _make_folder(file_path)
+        content = self.to_dict(bBuckets=True)
+        if extra:
+            content.update(extra)
+        if file_path.lower().endswith(".csv"):
+            columns = ["count", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"]
+            with open(file_path, 'w', encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["executor", "histogram"] + columns)
+                for name in ExecutorMetrics.HISTOGRAM_NAMES:
+                    writer.writerow([self.name, name] + [content[name][column] for column in columns])
+        else:
+            with open(file_path, 'w', encoding="utf-8") as f:
+                json.dump(content, f, indent=1)
+
+
+class UtilizationSampler(object):
+    """ The utilization of each lane of an ExecutorService between two samples: busy seconds / (seconds * workers) """
+    def __init__(self, service):
+        self.service = service
+        self.last_time = time.perf_counter()
+        self.last_busy = {name: lane_stats["busy_seconds"] for name, lane_stats in service.stats().items()}
+
+    def sample(self):
+        """ :return: {lane name: stats of ExecutorService, with "utilization" since the last sample} """
+        now = time.perf_counter()
+        stats = self.service.stats()
+        seconds = now - self.last_time
+        for name, lane_stats in stats.items():
+            busy = lane_stats["busy_seconds"] - self.last_busy.get(name, 0.0)
+            capacity = seconds * max(1, lane_stats["max_workers"])
+            lane_stats["utilization"] = min(1.0, busy / capacity) if capacity > 0 else 0.0
+            self.last_busy[name] = lane_stats["busy_seconds"]
+        self.last_time = now
+        return stats
+
+
+def _make_folder(file_path):
+    folder = os.path.dirname(file_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+import heapq
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+# no unreal in this module, it's imported by the worker processes of LANE_PROCESS
+
+LANE_IO = "io"                  # file and network access, most of the time is spent without the GIL
+LANE_CPU = "cpu"                # pure python computing
+LANE_BACKGROUND = "background"  # low priority work, like warming caches
+LANE_PROCESS = "process"        # picklable and unreal free tasks, run in worker processes
+
+SHARED_MEMORY_THRESHOLD = 1024 * 1024  # bytes, the larger buffers are passed to worker processes by shared memory
+
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10
+
+
+def get_default_lanes():
+    cpu_count = os.cpu_count() or 4
+    return {LANE_IO: min(32, cpu_count + 4), LANE_CPU: cpu_count, LANE_BACKGROUND: 1, LANE_PROCESS: cpu_count}
+
+
+def iter_chunks(items, chunk_size):
+    """ Split an iterable into lists of chunk_size items, the last one may be shorter """
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_chunk(fn, items):
+    # the task of a chunk of ChameleonTaskExecutor.map, at module level so it can be pickled for LANE_PROCESS
+    return [fn(item) for item in items]
+
+
+class SharedBufferRef(object):
+    """ A buffer in shared memory, passed between the editor and the worker processes instead of the bytes """
+    __slots__ = ("name", "size")
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def __getstate__(self):
+        return self.name, self.size
+
+    def __setstate__(self, state):
+        self.name, self.size = state
+
+    @staticmethod
+    def create(data):
+        """ :return: (SharedMemory, SharedBufferRef), the creator closes and unlinks the SharedMemory """
+        size = len(data) if not isinstance(data, memoryview) else data.nbytes
+        shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        shm.buf[:size] = data if not isinstance(data, memoryview) else data.cast("B")
+        return shm, SharedBufferRef(shm.name, size)
+
+    def read(self, bUnlink=False) -> bytes:
+        shm = shared_memory.SharedMemory(name=self.name)
+        try:
+            return bytes(shm.buf[:self.size])
+        finally:
+            shm.close()
+            if bUnlink:
+                shm.unlink()
+
+
+def _is_large_buffer(value):
+    if isinstance(value, memoryview):
+        return value.nbytes >= SHARED_MEMORY_THRESHOLD
+    return isinstance(value, (bytes, bytearray)) and len(value) >= SHARED_MEMORY_THRESHOLD
+
+
+def _run_in_process(fn, args, kwargs):
+    # runs in the worker process, the shared buffers are given to fn as memoryview without copying.
+    # The result goes back pickled through the future, a shared memory created here would be freed on Windows
+    # when this process closes it, before the editor reads it
+    opened = []
+
+    def _open(value):
+        if isinstance(value, SharedBufferRef):
+            shm = shared_memory.SharedMemory(name=value.name)
+            opened.append(shm)
+            return shm.buf[:value.size]
+        return value
+
+    try:
+        result = fn(*[_open(v) for v in args], **{k: _open(v) for k, v in kwargs.items()})
+        return bytes(result) if isinstance(result, memoryview) else result
+    finally:
+        for shm in opened:
+            try:
+                shm.close()
+            except BufferError:
+                pass  # fn kept a view of the buffer, it's released with the process
+
+
+def _get_python_executable():
+    # sys.executable is the editor in unreal, the worker processes need the python interpreter
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    for path in [os.path.join(sys.prefix, "python.exe"), os.path.join(sys.prefix, "bin", "python3")
+                 , os.path.join(sys.prefix, "bin", "python")]:
+        if os.path.exists(path):
+            return path
+    return sys.executable
+
+
+class _WorkItem(object):
+    __slots__ = ("future", "fn", "args", "kwargs", "client", "on_start")
+
+    def __init__(self, future, fn, args, kwargs, client, on_start):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.client = client
+        self.on_start = on_start
+
+
+class _Lane(object):
+    def __init__(self, name, max_workers, lock):
+        self.name = name
+        self.max_workers = max_workers
+        self.heap = []                  # (-priority, sequence, _WorkItem)
+        self.threads = []
+        self.idle_count = 0
+        self.running_by_client = {}     # {ExecutorClient: running count}
+        self.busy_seconds = 0.0         # the total run time of the finished tasks, for the utilization
+        self.cond = threading.Condition(lock)
+
+
+class ExecutorClient(object):
+    """
+    The handle of one tool onto the ExecutorService, it has the submit and shutdown of ThreadPoolExecutor.
+    quota: at most how many tasks of this client run at the same time in each lane, None: no limit.
+    """
+    def __init__(self, service, name, lane=LANE_IO, priority=PRIORITY_NORMAL, quota=None):
+        self.service = service
+        self.name = name
+        self.lane = lane
+        self.priority = priority
+        self.quota = quota
+        self.queued_count = 0
+        self.running_count = 0
+        self.bClosed = False
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        return self.service.submit(self, fn, args, kwargs)
+
+    def submit_to(self, lane, priority, fn, args=(), kwargs=None, on_start=None) -> Future:
+        """
+        submit with the lane and priority of this task, None for the client's default
+        on_start: called in the worker thread when the task starts
+        """
+        return self.service.submit(self, fn, args, kwargs, lane=lane, priority=priority, on_start=on_start)
+
+    def cancel_queued(self) -> int:
+        """ Cancel the tasks of this client which haven't started, the running ones are not affected """
+        return self.service.cancel_queued(self)
+
+    def wait(self, timeout=None) -> bool:
+        """ Wait until all the tasks of this client are finished, True if they are """
+        return self.service.wait_client(self, timeout)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        if cancel_futures:
+            self.cancel_queued()
+        self.bClosed = True
+        if wait:
+            self.wait()
+
+
+class ExecutorService(object):
+    """
+    The process-wide worker threads shared by all the Chameleon tools, see get_executor_service.
+    The tasks are queued in named lanes, each lane has its own workers, and runs its queued tasks by priority then
+    by submit order. The tasks of a client beyond its quota wait, and the others in the lane go first.
+    The workers of LANE_PROCESS forward their tasks to a ProcessPoolExecutor, which is created on first use and reused,
+    the large bytes args are passed by shared memory, the results are returned pickled.
+    """
+    def __init__(self, lanes=None):
+        self._lock = threading.Lock()
+        self._idle_cond = threading.Condition(self._lock)  # notified when a task finished or was cancelled
+        self._sequence = itertools.count()
+        self._process_pool = None
+        self.lanes = {}
+        for name, max_workers in (lanes if lanes else get_default_lanes()).items():
+            self.configure_lane(name, max_workers)
+
+    def configure_lane(self, name, max_workers):
+        """ Add a lane, or change the worker count of a lane, the extra workers exit when they are idle """
+        with self._lock:
+            lane = self.lanes.get(name, None)
+            if lane is None:
+                self.lanes[name] = _Lane(name, max_workers, self._lock)
+            else:
+                lane.max_workers = max_workers
+                lane.cond.notify_all()
+
+    def create_client(self, name, lane=LANE_IO, priority=PRIORITY_NORMAL, quota=None) -> ExecutorClient:
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown lane: {lane}, lanes: {list(self.lanes.keys())}")
+        return ExecutorClient(self, name, lane, priority, quota)
+
+    def submit(self, client:ExecutorClient, fn, args=(), kwargs=None, lane=None, priority=None, on_start=None) -> Future:
+        if client.bClosed:
+            raise RuntimeError(f"Executor client {client.name} has been shut down.")
+        lane = self.lanes[lane if lane else client.lane]
+        priority = client.priority if priority is None else priority
+        future = Future()
+        item = _WorkItem(future, fn, args, kwargs if kwargs else {}, client, on_start)
+        with self._lock:
+            heapq.heappush(lane.heap, (-priority, next(self._sequence), item))
+            client.queued_count += 1
+            if lane.idle_count == 0 and len(lane.threads) < lane.max_workers:
+                thread = threading.Thread(target=self._work, args=(lane,), daemon=True
+                                          , name=f"ChameleonExecutor-{lane.name}-{len(lane.threads)}")
+                lane.threads.append(thread)
+                thread.start()
+            else:
+                lane.cond.notify()
+        return future
+
+    def cancel_queued(self, client:ExecutorClient) -> int:
+        cancelled = []
+        with self._lock:
+            for lane in self.lanes.values():
+                kept = []
+                for entry in lane.heap:
+                    if entry[2].client is client:
+                        cancelled.append(entry[2].future)
+                    else:
+                        kept.append(entry)
+                if len(kept) != len(lane.heap):
+                    heapq.heapify(kept)
+                    lane.heap = kept
+            client.queued_count -= len(cancelled)
+            self._idle_cond.notify_all()
+        # the done callbacks of the futures are called out of the lock
+        for future in cancelled:
+            future.cancel()
+        return len(cancelled)
+
+    def wait_client(self, client:ExecutorClient, timeout=None) -> bool:
+        with self._lock:
+            return self._idle_cond.wait_for(lambda: client.queued_count == 0 and client.running_count == 0, timeout)
+
+    def _pick(self, lane:_Lane):
+        # called with the lock, get the first task whose client is under its quota
+        skipped = []
+        found = None
+        while lane.heap:
+            entry = heapq.heappop(lane.heap)
+            item = entry[2]
+            if item.future.cancelled():
+                item.client.queued_count -= 1
+                continue
+            quota = item.client.quota
+            if quota is not None and lane.running_by_client.get(item.client, 0) >= quota:
+                skipped.append(entry)
+                continue
+            found = item
+            break
+        for entry in skipped:
+            heapq.heappush(lane.heap, entry)
+        return found
+
+    def _work(self, lane:_Lane):
+        while True:
+            with self._lock:
+                item = self._pick(lane)
+                while item is None:
+                    if len(lane.threads) > lane.max_workers:
+                        lane.threads.remove(threading.current_thread())
+                        return
+                    lane.idle_count += 1
+                    lane.cond.wait()
+                    lane.idle_count -= 1
+                    item = self._pick(lane)
+                client = item.client
+                client.queued_count -= 1
+                client.running_count += 1
+                lane.running_by_client[client] = lane.running_by_client.get(client, 0) + 1
+
+            start_time = time.perf_counter()
+            if item.future.set_running_or_notify_cancel():
+                try:
+                    if item.on_start:
+                        item.on_start()
+                    if lane.name == LANE_PROCESS:
+                        result = self._run_in_process_pool(item)
+                    else:
+                        result = item.fn(*item.args, **item.kwargs)
+                except BaseException as e:
+                    item.future.set_exception(e)
+                else:
+                    item.future.set_result(result)
+            item = None
+
+            with self._lock:
+                lane.busy_seconds += time.perf_counter() - start_time
+                client.running_count -= 1
+                count = lane.running_by_client[client] - 1
+                if count:
+                    lane.running_by_client[client] = count
+                else:
+                    del lane.running_by_client[client]
+                if lane.heap:
+                    # the tasks of this client which were over quota can run now
+                    lane.cond.notify()
+                self._idle_cond.notify_all()
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._process_pool is None:
+                context = multiprocessing.get_context("spawn")
+                context.set_executable(_get_python_executable())
+                self._process_pool = ProcessPoolExecutor(max_workers=self.lanes[LANE_PROCESS].max_workers
+                                                         , mp_context=context)
+            return self._process_pool
+
+    def _run_in_process_pool(self, item:_WorkItem):
+        shms = []
+
+        def _share(value):
+            if _is_large_buffer(value):
+                shm, ref = SharedBufferRef.create(value)
+                shms.append(shm)
+                return ref
+            return value
+
+        try:
+            args = [_share(v) for v in item.args]
+            kwargs = {k: _share(v) for k, v in item.kwargs.items()}
+            result = self._get_process_pool().submit(_run_in_process, item.fn, args, kwargs).result()
+        finally:
+            for shm in shms:
+                shm.close()
+                shm.unlink()
+        return result
+
+    def shutdown_process_pool(self, wait=True):
+        """ Stop the worker processes, they are started again by the next task of LANE_PROCESS """
+        with self._lock:
+            pool = self._process_pool
+            self._process_pool = None
+        if pool:
+            pool.shutdown(wait=wait)
+
+    def stats(self):
+        """ {lane name: {"workers", "max_workers", "idle", "queued", "running", "busy_seconds"}} """
+        with self._lock:
+            return {name: {"workers": len(lane.threads), "max_workers": lane.max_workers, "idle": lane.idle_count
+                , "queued": len(lane.heap), "running": sum(lane.running_by_client.values())
+                , "busy_seconds": lane.busy_seconds} for name, lane in self.lanes.items()}
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_executor_service() -> ExecutorService:
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ExecutorService()
+    return _service
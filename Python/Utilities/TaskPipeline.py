@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+import threading
+from concurrent.futures import Future
+from typing import Callable, Union
+
+from .ChameleonTaskExecutor import ChameleonTaskExecutor, TaskCancelled
+from .ExecutorService import iter_chunks, run_chunk
+
+
+class _PipelineNode(object):
+    __slots__ = ("name", "fn", "args", "kwargs", "deps", "dependents", "waiting_count", "lane", "priority", "bShared"
+                 , "chunk_size")
+
+    def __init__(self, name, fn, args, kwargs, deps, lane, priority, bShared, chunk_size):
+        self.name = name
+        self.fn = fn
+        self.args = list(args) if args else []
+        self.kwargs = kwargs if kwargs else {}
+        self.deps = deps
+        self.dependents = []
+        self.waiting_count = len(deps)
+        self.lane = lane
+        self.priority = priority
+        self.bShared = bShared
+        self.chunk_size = chunk_size    # None: a single task, or a map over the result of its only dep
+
+
+class TaskPipeline(object):
+    """
+    A DAG of tasks on a ChameleonTaskExecutor. A task is submitted when all of its deps are done, with their results
+    as its leading args, so the independent branches run in parallel, and nothing waits in a worker.
+
+        pipeline = TaskPipeline(self.executor)
+        pipeline.add("assets", list_assets, args=[folder])
+        pipeline.add_map("infos", analyse_asset, dep="assets", chunk_size=32)
+        pipeline.add("report", aggregate, deps=["infos"])
+        self.pipeline_id = pipeline.run(on_finish_callback=self.on_pipeline_finished)
+
+    The result of the pipeline is {task name: result}, see executor.pop_result. When a task fails, the other tasks of
+    the pipeline are cancelled, and the pipeline fails with its exception.
+    """
+    def __init__(self, executor: ChameleonTaskExecutor):
+        self.executor = executor
+        self.nodes = {}         # {name: _PipelineNode}, in the order of add, the deps are always added before
+        self.results = {}
+        self.future = None
+        self._remaining = 0
+        self._task_futures = []
+        self._lock = threading.Lock()
+
+    def add(self, name, fn: Callable, args=None, kwargs=None, deps=None, lane=None, priority=None, bShared=False):
+        """
+        :param deps: the names of the tasks to wait for, their results are passed to fn before args, in this order
+        :param bShared: see ChameleonTaskExecutor.submit_task
+        """
+        return self._add(_PipelineNode(name, fn, args, kwargs, self._check_deps(name, deps), lane, priority, bShared
+                                       , None))
+
+    def add_map(self, name, fn: Callable, dep, chunk_size=16, lane=None, priority=None):
+        """ fn(item) for each item in the result of dep, chunk_size items per task, the result is the ordered list """
+        return self._add(_PipelineNode(name, fn, None, None, self._check_deps(name, [dep]), lane, priority, False
+                                       , max(1, chunk_size)))
+
+    def _check_deps(self, name, deps):
+        if self.future is not None:
+            raise RuntimeError("The pipeline is running, no more tasks can be added.")
+        if name in self.nodes:
+            raise ValueError(f"Duplicated task name: {name}")
+        deps = list(deps) if deps else []
+        for dep in deps:
+            if dep not in self.nodes:
+                raise ValueError(f"Unknown dep: {dep} of task: {name}, the deps need to be added first.")
+        return deps
+
+    def _add(self, node: _PipelineNode):
+        self.nodes[node.name] = node
+        for dep in node.deps:
+            self.nodes[dep].dependents.append(node)
+        return self
+
+    def run(self, on_finish_callback: Union[Callable, str] = None, bBatchCallback=False) -> int:
+        """ Start the tasks without deps. :return: the future id of the pipeline in the executor """
+        if self.future is not None:
+            raise RuntimeError("The pipeline has been run.")
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()
+        self._remaining = len(self.nodes)
+        future_id = self.executor.track_future(self.future, on_finish_callback, bBatchCallback)
+        if not self.nodes:
+            self.future.set_result({})
+        for node in [node for node in self.nodes.values() if not node.deps]:
+            self._start(node)
+        return future_id
+
+    def cancel(self):
+        """ Cancel the queued tasks and ask the running ones to stop, the pipeline fails with TaskCancelled """
+        self._fail(TaskCancelled("Pipeline cancelled."))
+
+    def _start(self, node: _PipelineNode):
+        with self._lock:
+            if self.future.done():
+                return
+            args = [self.results[dep] for dep in node.deps] + node.args
+        try:
+            if node.chunk_size is None:
+                future = self.executor.submit_future(node.fn, args, node.kwargs, lane=node.lane
+                                                     , priority=node.priority, bShared=node.bShared)
+                if not node.bShared:
+                    # the shared futures may be used by others, they are not cancelled nor popped by the pipeline
+                    self._watch(future)
+                future.add_done_callback(lambda _future: self._on_task_done(node, _future))
+            else:
+                self._start_map(node, args[0])
+        except Exception as e:
+            self._fail(e)
+
+    def _start_map(self, node: _PipelineNode, items):
+        chunks = list(iter_chunks(items, node.chunk_size))
+        if not chunks:
+            self._on_node_finished(node, [])
+            return
+        chunk_results = [None] * len(chunks)
+        remaining = [len(chunks)]
+
+        def _on_chunk_done(index, future):
+            if not self._check_future(future):
+                return
+            with self._lock:
+                chunk_results[index] = future.result()
+                remaining[0] -= 1
+                bFinished = remaining[0] == 0
+            if bFinished:
+                self._on_node_finished(node, [result for results in chunk_results for result in results])
+
+        for i, chunk in enumerate(chunks):
+            future = self.executor.submit_future(run_chunk, [node.fn, chunk], lane=node.lane, priority=node.priority)
+            self._watch(future)
+            future.add_done_callback(lambda _future, _index=i: _on_chunk_done(_index, _future))
+
+    def _watch(self, future):
+        with self._lock:
+            self._task_futures.append(future)
+
+    def _check_future(self, future) -> bool:
+        if future.cancelled():
+            self._fail(TaskCancelled("Pipeline task cancelled."))
+            return False
+        if future.exception() is not None:
+            self._fail(future.exception())
+            return False
+        return True
+
+    def _on_task_done(self, node: _PipelineNode, future):
+        if self._check_future(future):
+            self._on_node_finished(node, future.result())
+
+    def _on_node_finished(self, node: _PipelineNode, result):
+        ready = []
+        with self._lock:
+            if self.future.done():
+                return
+            self.results[node.name] = result
+            self._remaining -= 1
+            for dependent in node.dependents:
+                dependent.waiting_count -= 1
+                if dependent.waiting_count == 0:
+                    ready.append(dependent)
+            bFinished = self._remaining == 0
+            if bFinished:
+                self.future.set_result(dict(self.results))
+        if bFinished:
+            self._release()
+        for dependent in ready:
+            self._start(dependent)
+
+    def _fail(self, exception):
+        with self._lock:
+            if self.future is None or self.future.done():
+                return
+            self.future.set_exception(exception)
+            # a copy, the tasks being started add to it while cancelling
+            futures = list(self._task_futures)
+        for future in futures:
+            if not future.done():
+                self.executor.cancel_task(id(future))
+        self._release()
+
+    def _release(self):
+        # the futures of the tasks are not needed any more, they don't take the room of the other tasks of the tool
+        with self._lock:
+            futures = self._task_futures
+            self._task_futures = []
+        for future in futures:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.executor.pop_result(id(future))
@@ -8,6 +8,8 @@ import json
 
 from enum import IntFlag
 
+from . import DocParser
+
 
 
 class Singleton(type):
@@ -67,51 +69,6 @@ def l(obj, subString='', bPrint = True):
     :param subString: 过滤用字符串
     :return: 无
     '''
-    def _simplifyDoc(content):
-        bracketS, bracketE = content.find('('), content.find(')')
-        arrow = content.find('->')
-        funcDocPos = len(content)
-        endSign = ['--', '\n', '\r']
-        for s in endSign:
-            p = content.find(s)
-            if p != -1 and p < funcDocPos:
-                funcDocPos = p
-        funcDoc = content[:funcDocPos]
-        param = content[bracketS + 1: bracketE].strip()
-        return funcDoc, param
-
-    def _getEditorProperties(content, obj):
-        lines = content.split('\r')
-        signFound = False
-        allInfoFound = False
-        result = []
-        for line in lines:
-            if not signFound and '**Editor Properties:**' in line:
-                signFound = True
-            if signFound:
-                #todo re
-                nameS, nameE = line.find('``') + 2, line.find('`` ')
-                if nameS == -1 or nameE == -1:
-                    continue
-                typeS, typeE = line.find('(') + 1, line.find(')')
-                if typeS == -1 or typeE == -1:
-                    continue
-                rwS, rwE = line.find('[') + 1, line.find(']')
-                if rwS == -1 or rwE == -1:
-                    continue
-                name = line[nameS: nameE]
-                type = line[typeS: typeE]
-                rws = line[rwS: rwE]
-                descript = line[rwE + 2:]
-                allInfoFound = True
-                result.append((name, type, rws, descript))
-        if signFound:
-            if not allInfoFound:
-                unreal.log_warning("not all info found {}".format(obj))
-        else:
-            unreal.log_warning("can't find editor properties in {}".format(obj))
-        return result
-
     if obj == None:
         unreal.log_warning("obj == None")
         return None
@@ -161,7 +118,7 @@ def l(obj, subString='', bPrint = True):
         resultStr = ""
         bHasParameter = False
         if hasattr(attr, '__doc__'):
-            docForDisplay, paramStr = _simplifyDoc(attr.__doc__)
+            docForDisplay, paramStr = DocParser.simplify_doc(attr.__doc__)
             if paramStr == '':
                 # Method with No params
                 descriptionStr = docForDisplay[docForDisplay.find(')') + 1:]
@@ -182,7 +139,7 @@ def l(obj, subString='', bPrint = True):
     editorPropertiesInfos = []
     editorPropertiesNames = []
     if hasattr(obj, '__doc__') and isinstance(obj, unreal.Object):
-        editorPropertiesInfos = _getEditorProperties(obj.__doc__, obj)
+        editorPropertiesInfos = DocParser.get_editor_properties(obj.__doc__, obj)
         for name, _, _, _ in editorPropertiesInfos:
             editorPropertiesNames.append(name)
 
@@ -1,2 +1,9 @@
 # -*- coding: utf-8 -*-
-from . Utils import *
+try:
+    import unreal
+except ImportError:
+    # the worker processes of ExecutorService.LANE_PROCESS have no unreal, only the unreal free modules are imported there
+    unreal = None
+
+if unreal:
+    from . Utils import *
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "Python"))
+
+try:
+    import unreal
+except ImportError:
+    sys.path.insert(0, TESTS_DIR)
+    import fake_unreal
+    # like the builtin unreal module of the editor, which is created through the C API
+    fake_unreal.__spec__ = None
+    sys.modules["unreal"] = fake_unreal
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# The few unreal apis used by the modules under test, for running the tests out of the editor.
+# The slate ticks are driven by the tests with tick().
+import os
+import tempfile
+
+
+class Object(object):
+    pass
+
+
+class StructBase(object):
+    pass
+
+
+class Transform(StructBase):
+    pass
+
+
+class Array(list):
+    pass
+
+
+class Map(dict):
+    pass
+
+
+class ChameleonData(object):
+    def __init__(self):
+        self.texts = {}
+        self.lists = {}
+        self.progress = {}
+        self.breadcrumbs = {}
+
+    def set_text(self, aka, text):
+        self.texts[aka] = text
+
+    def set_list_view_multi_column_items(self, aka, items, column_count):
+        self.lists[aka] = list(items)
+
+    def set_progress_bar_percent(self, aka, percent):
+        self.progress[aka] = percent
+
+    def set_list_view_multi_column_line(self, aka, line_id, items, rebuild_list=True):
+        self.lists[aka][line_id * len(items): (line_id + 1) * len(items)] = items
+
+    def push_breadcrumb_string(self, aka, label, tooltip):
+        self.breadcrumbs.setdefault(aka, []).append(label)
+
+    def pop_breadcrumb_string(self, aka):
+        self.breadcrumbs.setdefault(aka, []).pop()
+
+    def clear_breadcrumbs_string(self, aka):
+        self.breadcrumbs[aka] = []
+
+    def get_breadcrumbs_count_string(self, aka):
+        return len(self.breadcrumbs.get(aka, []))
+
+    def __getattr__(self, name):
+        # the other widget setters are not checked by the tests
+        if name.startswith(("set_", "push_", "pop_", "clear_")):
+            return lambda *args, **kwargs: None
+        raise AttributeError(name)
+
+
+_data = ChameleonData()
+_ticks = {}
+logs = []
+
+
+class PythonBPLib(object):
+    @staticmethod
+    def get_chameleon_data(json_path):
+        return _data
+
+    @staticmethod
+    def exec_python_command(cmd, force_game_thread=False):
+        exec(cmd, globals())
+
+
+class Paths(object):
+    @staticmethod
+    def project_saved_dir():
+        return os.path.join(tempfile.gettempdir(), "TAPythonTests", "Saved")
+
+
+class SystemLibrary(object):
+    @staticmethod
+    def get_engine_version():
+        return "5.3.0-tests"
+
+
+def register_slate_post_tick_callback(callback):
+    _ticks[id(callback)] = callback
+    return id(callback)
+
+
+def unregister_slate_post_tick_callback(handle):
+    _ticks.pop(handle, None)
+
+
+def tick(count=1):
+    for _ in range(count):
+        for callback in list(_ticks.values()):
+            callback(0.016)
+
+
+def find_object(outer, path):
+    return None
+
+
+def log(message):
+    logs.append(("log", message))
+
+
+def log_warning(message):
+    logs.append(("warning", message))
+
+
+def log_error(message):
+    logs.append(("error", message))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from QueryTools import Utils
+from QueryTools.Utils import EAttrKind
+
+
+class _Target(object):
+    def __init__(self):
+        self.value = 1
+
+    def method(self):
+        return 2
+
+    def get_editor_property(self, name):
+        return getattr(self, name) * 10
+
+
+def test_kind_flags_are_packed_once():
+    target = _Target()
+    table = Utils.AttributeTable(target, metas=[Utils.attr_meta(target, name) for name in ["value", "method"]])
+    value, method = table
+    assert type(table.metas[0].kind_flags) is int
+    assert value.kind_flags == EAttrKind.OTHER_PROPERTY and value.bOtherProperty and not value.bCallable_other
+    assert method.kind_flags == EAttrKind.OTHER_CALLABLE and method.bCallable_other and not method.bOtherProperty
+    assert not value.bResolved
+    assert value.result == 1 and value.bResolved
+    # the resolved bit doesn't leak into the kind flags
+    assert value.kind_flags == EAttrKind.OTHER_PROPERTY
+    table.metas[0].kind_flags = EAttrKind.EDITOR_PROPERTY   # the table keeps its own flags column
+    assert value.bOtherProperty and not value.bEditorProperty
+
+
+def test_editor_property_flags_of_attr_detail():
+    target = _Target()
+    attr = Utils.attr_detail(target, "value", meta=Utils.attr_meta(target, "value", ("int32", "Read-Write", "")))
+    assert attr.bEditorProperty and not attr.bOtherProperty
+    assert attr.kind_flags == EAttrKind.EDITOR_PROPERTY
+
+    attr = Utils.attr_detail(target, "value", lazy=True)
+    assert attr.bOtherProperty and not attr.bEditorProperty
+    attr.apply_editor_property(target, "int32", "Read-Write", "")
+    assert attr.bEditorProperty and not attr.bOtherProperty and attr.result == 10
+
+
+def test_display_result_is_memoized_until_reevaluated():
+    target = _Target()
+    attr = Utils.attr_detail(target, "value", lazy=True)
+    assert attr.display_result == "1"
+    target.value = 5
+    assert attr.display_result == "1"
+    attr.reevaluate(target)
+    assert attr.display_result == "5"
+
+
+class _Counted(object):
+    def __init__(self):
+        self.reads = 0
+
+    @property
+    def counted(self):
+        self.reads += 1
+        return self.reads
+
+
+def test_lazy_values_are_evaluated_once_on_access():
+    target = _Counted()
+    attributes = {attr.name: attr for attr in Utils.ll(target, lazy=True)}
+    reads = target.reads    # the metas of python objects are built by reading the attributes
+    attr = attributes["counted"]
+    assert not attr.bResolved
+    assert attr.result == reads + 1 and attr.result == reads + 1
+    assert target.reads == reads + 1
+
+    attributes = {attr.name: attr for attr in Utils.ll(target)}
+    assert attributes["counted"].bResolved
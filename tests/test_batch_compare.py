@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+
+from QueryTools.BatchCompare import BatchCompare
+
+
+class _Target(object):
+    def __init__(self, value):
+        self.value = value
+
+
+def test_export_has_the_values_beyond_the_samples(tmp_path):
+    targets = [_Target(f"value_{i}") for i in range(10)]
+    result = BatchCompare(name_filter="value", max_samples_per_property=2).run(targets, bShowProgress=False)
+    assert len(result.samples["value"]) == 2
+
+    csv_path = str(tmp_path / "compare.csv")
+    result.export_csv(csv_path)
+    with open(csv_path, 'r', encoding="utf-8", newline='') as f:
+        rows = {row[0]: row[2:] for row in csv.reader(f)}
+    assert rows["value"] == [target.value for target in targets]
+
+    json_path = str(tmp_path / "compare.json")
+    result.export_json(json_path)
+    with open(json_path, 'r', encoding="utf-8") as f:
+        values = json.load(f)["properties"]["value"]["values"]
+    assert values == [target.value for target in targets]
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+
+from QueryTools.CallPolicy import CallPolicy, POLICY_ALLOW, POLICY_NORMAL, POLICY_SKIP_CRASH, POLICY_SKIP_SLOW\
+    , POLICY_SUSPECT
+
+
+def _new_policy(tmp_path):
+    return CallPolicy(file_path=str(tmp_path / "CallPolicy.json"), version_key="tests")
+
+
+def _read_pending(policy):
+    with open(policy.pending_path, 'r', encoding="utf-8") as f:
+        return f.read()
+
+
+def test_slow_needs_several_samples(tmp_path):
+    policy = _new_policy(tmp_path)
+    stats = policy.get_stats("Actor", "get_slow")
+    policy.record(stats, 1.0)
+    assert stats.policy == POLICY_NORMAL
+    policy.record(stats, 1.0)
+    policy.record(stats, 1.0)
+    assert stats.policy == POLICY_SKIP_SLOW
+
+
+def test_allowed_getter_isnt_downgraded_by_one_sample(tmp_path):
+    policy = _new_policy(tmp_path)
+    stats = policy.get_stats("Actor", "get_cheap")
+    for _ in range(policy.cheap_count):
+        policy.record(stats, 0.0001)
+    assert stats.policy == POLICY_ALLOW
+    policy.record(stats, 1.0)
+    assert stats.policy == POLICY_ALLOW
+
+
+def test_batch_writes_the_pending_marker_once(tmp_path):
+    policy = _new_policy(tmp_path)
+    getters = [policy.get_stats("Actor", f"get_{i}") for i in range(3)]
+    writes = []
+    write_pending = policy._write_pending
+    policy._write_pending = lambda *args, **kwargs: (writes.append(args), write_pending(*args, **kwargs))
+    with policy.batch(getters):
+        assert _read_pending(policy).splitlines() == [f"Actor\tget_{i}" for i in range(3)]
+        for stats in getters:
+            policy.call(stats, lambda: 1)
+    assert len(writes) == 1
+    assert _read_pending(policy) == ""
+
+
+def test_crash_in_batch_makes_suspects_then_finds_the_getter(tmp_path):
+    policy = _new_policy(tmp_path)
+    getters = [policy.get_stats("Actor", f"get_{i}") for i in range(3)]
+    policy._write_pending(getters)  # the editor crashed in the batch
+    policy.save()
+
+    policy = _new_policy(tmp_path)
+    getters = [policy.get_stats("Actor", f"get_{i}") for i in range(3)]
+    assert all(stats.policy == POLICY_SUSPECT for stats in getters)
+    with policy.batch(getters):
+        policy.call(getters[0], lambda: 1)
+    assert getters[0].policy == POLICY_NORMAL
+    policy._write_pending([getters[0]], alone=getters[1])  # the editor crashed in get_1, called alone in a batch
+    policy.save()
+
+    policy = _new_policy(tmp_path)
+    assert policy.get_stats("Actor", "get_1").policy == POLICY_SKIP_CRASH
+    assert policy.get_stats("Actor", "get_2").policy == POLICY_SUSPECT
+    assert os.path.getsize(policy.pending_path) == 0
+
+
+def test_batch_doesnt_block_other_threads(tmp_path):
+    policy = _new_policy(tmp_path)
+    getters = [policy.get_stats("Actor", f"get_{i}") for i in range(2)]
+    other = policy.get_stats("Actor", "get_other")
+    results = []
+    with policy.batch(getters[:1]):
+        def _run():
+            results.append(policy.call(getters[0], lambda: 0))
+            with policy.batch(getters[1:]):
+                results.append(policy.call(getters[1], lambda: 1))
+            results.append(policy.call(other, lambda: 2))
+        thread = threading.Thread(target=_run)
+        thread.start()
+        thread.join(timeout=10)
+        assert results == [0, 1, 2]
+        # the marker is kept until the last open batch is closed
+        assert _read_pending(policy).splitlines() == ["Actor\tget_0", "Actor\tget_1"]
+    assert _read_pending(policy) == ""
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+import unreal
+
+from Utilities import ChameleonTaskExecutor as executor_module
+from Utilities.ChameleonTaskExecutor import ChameleonTaskExecutor, TaskCancelled
+
+
+class _Tool(object):
+    def __init__(self):
+        self.data = unreal.PythonBPLib.get_chameleon_data("")
+        self.executor = ChameleonTaskExecutor(self)
+        self.results = {}
+        self.batches = []
+
+    def on_task_done(self, future_id):
+        self.results[future_id] = self.executor.pop_result(future_id, default="missing")
+
+    def on_batch_done(self, future_ids):
+        self.batches.append(list(future_ids))
+
+    def on_task_failed(self, future_id):
+        raise RuntimeError("callback failed")
+
+
+def _square(x):
+    return x * x
+
+
+def test_callbacks_get_results_beyond_retention_count():
+    tool = _Tool()
+    count = tool.executor.retention_count * 4
+    future_ids = {tool.executor.submit_task(_square, args=[i], on_finish_callback=tool.on_task_done): i
+                  for i in range(count)}
+    assert tool.executor.executor.wait(timeout=30)
+    executor_module.game_thread_queue.dispatch_completions(bForce=True)
+
+    assert len(tool.results) == count
+    assert all(tool.results[future_id] == i * i for future_id, i in future_ids.items())
+    assert not tool.executor.futures_dict
+
+
+def test_finished_futures_are_kept_until_popped_or_expired():
+    tool = _Tool()
+    future_ids = [tool.executor.submit_task(_square, args=[i]) for i in range(tool.executor.retention_count)]
+    assert tool.executor.executor.wait(timeout=30)
+    # hold the futures, so their ids can't be reused by the next submit
+    futures = [tool.executor.get_future(future_id) for future_id in future_ids]
+    assert all(future is not None for future in futures)
+    tool.executor.retention_ttl = 0.001
+    time.sleep(0.05)
+    # without a callback, the ttl prunes them on the next submit
+    tool.executor.submit_task(_square, args=[0])
+    assert all(tool.executor.get_future(future_id) is None for future_id in future_ids)
+
+
+def test_finished_futures_are_bounded_by_retention_count():
+    tool = _Tool()
+    count = tool.executor.retention_count * 4
+    # hold the futures, so the ids of the dropped ones can't be reused
+    futures = [tool.executor.submit_future(_square, args=[i]) for i in range(count)]
+    assert tool.executor.executor.wait(timeout=30)
+    assert len(tool.executor.futures_dict) == tool.executor.retention_count
+    kept = [(i, future) for i, future in enumerate(futures) if tool.executor.get_future(id(future)) is future]
+    assert len(kept) == tool.executor.retention_count
+    assert all(tool.executor.pop_result(id(future)) == i * i for i, future in kept)
+
+
+def test_game_thread_queue_ticks_only_with_work():
+    queue = executor_module.game_thread_queue
+    unreal.tick(2)
+    assert queue.tick_handle is None
+    tool = _Tool()
+    assert queue.tick_handle is None
+
+    future_id = tool.executor.submit_task(_square, args=[3], on_finish_callback=tool.on_task_done)
+    assert tool.executor.executor.wait(timeout=30)
+    assert queue.tick_handle is not None
+    unreal.tick()
+    assert tool.results[future_id] == 9
+    assert queue.tick_handle is None
+
+
+def test_done_callbacks_are_coalesced_per_tick():
+    tool = _Tool()
+    unreal.tick(2)
+    future_ids = [tool.executor.submit_task(_square, args=[i], on_finish_callback=tool.on_batch_done
+                                            , bBatchCallback=True) for i in range(5)]
+    future_ids.append(tool.executor.submit_task(_square, args=[5], on_finish_callback=tool.on_task_failed))
+    future_ids.append(tool.executor.submit_task(_square, args=[6], on_finish_callback=tool.on_task_done))
+    assert tool.executor.executor.wait(timeout=30)
+    assert not tool.batches and not tool.results
+    unreal.tick()
+    # one call with the list of ids, and the failed callback doesn't drop the others
+    assert [sorted(batch) for batch in tool.batches] == [sorted(future_ids[:5])]
+    assert tool.results == {future_ids[-1]: 36}
+
+
+def _loop_until_stopped(started, task_context=None):
+    started.set()
+    while True:
+        task_context.check()
+        time.sleep(0.001)
+
+
+def test_running_task_is_cancelled_or_timed_out():
+    tool = _Tool()
+    started = threading.Event()
+    future_id = tool.executor.submit_task(_loop_until_stopped, args=[started], bTaskContext=True)
+    assert started.wait(timeout=30)
+    assert tool.executor.cancel_task(future_id)
+    with pytest.raises(TaskCancelled, match="cancelled"):
+        tool.executor.get_future(future_id).result(timeout=30)
+
+    future_id = tool.executor.submit_task(_loop_until_stopped, args=[threading.Event()], timeout=0.05
+                                          , bTaskContext=True)
+    with pytest.raises(TaskCancelled, match="timeout"):
+        tool.executor.get_future(future_id).result(timeout=30)
+
+
+def _report_progress(release, task_context=None):
+    for i in range(100):
+        task_context.report_progress(i + 1, 100, f"step {i}")
+    release.wait(30)
+    return True
+
+
+def test_progress_is_throttled_on_the_game_thread():
+    tool = _Tool()
+    release = threading.Event()
+    updates = []
+    future_id = tool.executor.submit_task(_report_progress, args=[release], bTaskContext=True)
+    assert tool.executor.watch_progress(future_id, on_progress=lambda *progress: updates.append(progress)
+                                        , max_rate=0.01)
+    while tool.executor.get_task_progress(future_id)[0] < 100:
+        time.sleep(0.001)
+    unreal.tick(10)
+    assert updates == [(100, 100, "step 99")]
+    release.set()
+    tool.executor.get_future(future_id).result(timeout=30)
+    unreal.tick()
+    assert len(updates) == 2, "the final progress is always shown"
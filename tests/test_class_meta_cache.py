@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import unreal
+
+from QueryTools import Utils
+
+
+class _Class(object):
+    def __init__(self, path):
+        self.path = path
+
+    def get_path_name(self):
+        return self.path
+
+
+class _Object(unreal.Object):
+    def __init__(self, class_path):
+        self.class_path = class_path
+
+    def get_class(self):
+        return _Class(self.class_path)
+
+
+_Object.__module__ = "unreal"   # as the wrappers of the editor
+
+
+def test_refresh_invalidates_blueprint_classes_only():
+    blueprint = _Object("/Game/BP_A.BP_A_C")
+    native = _Object("/Script/Engine.StaticMeshActor")
+    Utils._class_meta_cache[Utils._get_class_key(blueprint)] = []
+    Utils._class_meta_cache[Utils._get_class_key(native)] = []
+    try:
+        assert Utils.invalidate_class_meta_of(blueprint) == 1
+        assert Utils._get_class_key(blueprint) not in Utils._class_meta_cache
+        assert Utils.invalidate_class_meta_of(native) == 0
+        assert Utils._get_class_key(native) in Utils._class_meta_cache
+    finally:
+        Utils.invalidate_class_meta()
+
+
+def test_metas_are_shared_by_the_instances_of_a_class(monkeypatch):
+    monkeypatch.setattr(Utils, "bUsePersistentMetaCache", False)
+    first, second = _Object("/Script/Tests.Shared"), _Object("/Script/Tests.Shared")
+    other = _Object("/Script/Tests.Other")
+    try:
+        metas = Utils.get_class_meta(first)
+        assert metas and all(a is b for a, b in zip(metas, Utils.get_class_meta(second)))
+        assert not any(a is b for a, b in zip(metas, Utils.get_class_meta(other)))
+        # the python objects may have their own attributes, they aren't cached
+        assert Utils._get_class_key(_Class("")) is None
+    finally:
+        Utils.invalidate_class_meta()
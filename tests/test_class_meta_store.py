@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from QueryTools import Utils
+from QueryTools.ClassMetaStore import ClassMetaStore
+
+
+class _Target(object):
+    def __init__(self):
+        self.value = 1
+
+    def method(self):
+        return 2
+
+
+def _new_store(tmp_path, version_key="tests"):
+    return ClassMetaStore(db_path=str(tmp_path / "ClassMetaCache.sqlite"), version_key=version_key)
+
+
+def test_records_are_kept_across_sessions(tmp_path):
+    target = _Target()
+    metas = [Utils.attr_meta(target, "value", ("int32", "Read-Write", "")), Utils.attr_meta(target, "method")]
+    store = _new_store(tmp_path)
+    store.save("/Script/Tests.Target", [meta.to_record() for meta in metas])
+    store.close()
+
+    store = _new_store(tmp_path)     # next editor session
+    store.warm_up(bBlocking=True)
+    loaded = [Utils.attr_meta.from_record(record) for record in store.load("/Script/Tests.Target")]
+    assert [(meta.name, meta.kind_flags, meta.display_name, meta.editor_property) for meta in loaded] \
+        == [(meta.name, meta.kind_flags, meta.display_name, meta.editor_property) for meta in metas]
+    assert store.load("/Script/Tests.Other") is None
+    store.close()
+
+
+def test_other_versions_arent_loaded(tmp_path):
+    store = _new_store(tmp_path, "5.3|1")
+    store.save("/Script/Tests.Target", [Utils.attr_meta(_Target(), "value").to_record()])
+    store.close()
+
+    store = _new_store(tmp_path, "5.4|1")
+    assert store.load("/Script/Tests.Target") is None
+    store.warm_up(bBlocking=True)
+    assert store.load("/Script/Tests.Target") is None
+    assert store.clear(bAllVersions=True) == 1
+    store.close()
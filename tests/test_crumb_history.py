@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import gc
+
+from QueryTools.CrumbHistory import CrumbHistory
+
+
+class _Target(object):
+    pass
+
+
+class _Detail(object):
+    # the interface of DetailData used by CrumbHistory
+    def __init__(self, obj, size=1, bytes_size=100):
+        self.obj = obj
+        self.attributes = [None] * size
+        self.bytes_size = bytes_size
+
+    def release_objects(self):
+        self.obj = None
+
+    def bind_objects(self, obj):
+        self.obj = obj
+
+    def estimate_bytes(self):
+        return self.bytes_size
+
+
+def test_history_crumbs_dont_keep_objects_alive():
+    history = CrumbHistory()
+    first = _Target()
+    crumb = history.push(first, "")
+    history.set_detail(crumb, _Detail(first))
+    second = _Target()
+    history.set_detail(history.push(second, "child"), _Detail(second))
+    assert crumb.detail.obj is None
+
+    history.truncate(1)
+    assert history.get_detail(crumb).obj is first
+
+    history.set_detail(history.push(second, "child"), _Detail(second))
+    del first
+    gc.collect()
+    assert crumb.obj is None
+    assert history.get_detail(crumb) is None
+
+
+def test_cached_details_are_evicted_by_size():
+    history = CrumbHistory(max_cached_attributes=1000, max_cached_bytes=250)
+    targets = [_Target() for _ in range(4)]
+    crumbs = []
+    for target in targets:
+        crumbs.append(history.push(target, ""))
+        history.set_detail(crumbs[-1], _Detail(target))
+    assert history.cached_bytes() <= 250
+    assert crumbs[0].detail is None and crumbs[-1].detail is not None
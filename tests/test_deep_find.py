@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import unreal
+
+from QueryTools.DeepFind import DeepFind
+
+
+class _Node(unreal.Object):
+    def __init__(self, label):
+        self.label = label
+        self.child = None
+        self.items = []
+
+
+def _chain(count):
+    nodes = [_Node(f"node_{i}") for i in range(count)]
+    for parent, child in zip(nodes, nodes[1:]):
+        parent.child = child
+    return nodes
+
+
+def test_paths_and_depth_limit():
+    nodes = _chain(6)
+    nodes[1].items = [_Node("leaf_a"), _Node("leaf_b")]
+    matches = DeepFind("leaf_b").run(nodes[0])
+    assert [match.path for match in matches] == ["root.child.items[1].label"]
+
+    finder = DeepFind("node_", max_depth=3, bMatchName=False)
+    paths = [match.path for match in finder.run(nodes[0])]
+    assert "root.child.child.label" in paths
+    assert all(match.depth <= 3 for match in finder.matches)
+    assert not any("node_3" in match.value_str for match in finder.matches if match.path.endswith(".label"))
+
+
+def test_cycles_are_visited_once():
+    a, b = _chain(2)
+    b.child = a
+    finder = DeepFind("label", max_depth=10)
+    paths = [match.path for match in finder.run(a)]
+    assert finder.visited_count == 2
+    assert paths == ["root.label", "root.child.label"]
+
+
+def test_budgets_stop_the_search():
+    nodes = _chain(50)
+    finder = DeepFind("label", max_depth=100, max_nodes=10)
+    finder.run(nodes[0])
+    assert finder.visited_count == 10
+
+    finder = DeepFind("label", max_depth=100, time_budget=0)
+    finder.run(nodes[0])
+    assert finder.bTimeout and finder.visited_count == 0
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from QueryTools import Utils
+from QueryTools.DetailDiff import DetailDiff
+
+
+class _Target(object):
+    def __init__(self, **kwargs):
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+
+def _details(obj, names):
+    return [Utils.attr_detail(obj, name, lazy=True) for name in names]
+
+
+def test_diff_by_name():
+    lefts = _details(_Target(a=1, b=2, c="x (0x000001B2C3D4E5F6)", removed=0), ["a", "b", "c", "removed"])
+    rights = _details(_Target(a=1, b=3, c="x (0x00000ABCDEF01234)", added=0), ["added", "c", "b", "a"])
+    differ = DetailDiff()
+    assert not differ.is_built_for(lefts, rights)
+    differ.build(lefts, rights)
+    assert differ.is_built_for(lefts, rights)
+
+    assert not differ.is_changed("a")
+    assert differ.is_changed("b")
+    assert not differ.is_changed("c"), "the pointer noise is not a difference"
+    assert not differ.is_changed("added") and not differ.is_changed("removed")
+    assert differ.summary() == {"added": 1, "removed": 1, "changed": 1}
+    # the row ids of the shown rows of both sides, the order of the sides can differ
+    assert differ.diff_rows(lefts, rights) == ([1], [2])
+    assert differ.diff_rows(lefts[:1], rights) == ([], [])
+
+
+def test_filter_change_reuses_the_index():
+    lefts = _details(_Target(a=1, b=2), ["a", "b"])
+    rights = _details(_Target(a=1, b=3), ["a", "b"])
+    differ = DetailDiff()
+    differ.build(lefts, rights)
+    assert differ.diff_rows(lefts, rights) == ([1], [1])
+    # a narrowed filter only looks up the memoized state of the shown rows
+    differ._changed["b"] = False
+    assert differ.is_built_for(lefts, rights)
+    assert differ.diff_rows(lefts[1:], rights[1:]) == ([], [])
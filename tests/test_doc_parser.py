@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import pytest
+
+from Utilities import DocParser
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "doc_corpus")
+LINE_ENDINGS = {"lf": "\n", "crlf": "\r\n", "cr": "\r"}
+
+
+def _load_cases(folder):
+    # the docs are stored with \n, and the expected outputs are next to them in .json
+    folder = os.path.join(CORPUS_DIR, folder)
+    cases = []
+    for file_name in sorted(os.listdir(folder)):
+        if file_name.endswith(".txt"):
+            with open(os.path.join(folder, file_name), 'r', encoding="utf-8", newline="") as f:
+                doc = f.read()
+            with open(os.path.join(folder, file_name[:-4] + ".json"), 'r', encoding="utf-8") as f:
+                expected = json.load(f)
+            cases.append(pytest.param(doc, expected, id=file_name[:-4]))
+    return cases
+
+
+@pytest.mark.parametrize("line_ending", LINE_ENDINGS.values(), ids=LINE_ENDINGS.keys())
+@pytest.mark.parametrize("doc, expected", _load_cases("classes"))
+def test_parse_editor_properties(doc, expected, line_ending):
+    records, bSignFound = DocParser.parse_editor_properties(doc.replace("\n", line_ending))
+    assert bSignFound == expected["found"]
+    assert [list(record) for record in records] == expected["records"]
+
+
+@pytest.mark.parametrize("line_ending", LINE_ENDINGS.values(), ids=LINE_ENDINGS.keys())
+@pytest.mark.parametrize("doc, expected", _load_cases("methods"))
+def test_simplify_doc(doc, expected, line_ending):
+    assert list(DocParser.simplify_doc(doc.replace("\n", line_ending))) == expected
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+
+import unreal
+
+from Utilities.ChameleonTaskExecutor import ChameleonTaskExecutor
+from Utilities.ExecutorMetrics import LatencyHistogram
+
+
+class _Tool(object):
+    def __init__(self):
+        self.data = unreal.PythonBPLib.get_chameleon_data("")
+        self.executor = ChameleonTaskExecutor(self)
+
+    def on_task_done(self, future_id):
+        self.executor.pop_result(future_id)
+
+
+def _square(x):
+    return x * x
+
+
+def test_histogram_percentiles_are_bucket_bounds():
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.add(0.0001)   # 100us, in the bucket up to 128us
+    for _ in range(10):
+        histogram.add(0.01)     # 10ms, in the bucket up to 16.384ms
+    assert histogram.count == 100
+    assert histogram.percentile(50) == LatencyHistogram.get_bucket_upper_seconds(7)
+    assert histogram.percentile(99) == 0.01, "never over the max"
+    assert 0.0001 <= histogram.percentile(50) <= 0.0002
+    buckets = histogram.to_dict(bBuckets=True)["buckets"]
+    assert sum(count for _, count in buckets) == 100
+
+
+def test_metrics_and_trace_export(tmp_path):
+    tool = _Tool()
+    tool.executor.set_metrics_trace(16)
+    for i in range(20):
+        tool.executor.submit_task(_square, args=[i], on_finish_callback=tool.on_task_done)
+    assert tool.executor.executor.wait(timeout=30)
+    unreal.tick()
+
+    metrics = tool.executor.get_metrics()
+    assert metrics["submitted"] == metrics["succeeded"] == 20
+    assert metrics["run_time"]["count"] == 20 and metrics["callback_latency"]["count"] == 20
+
+    trace_path = tmp_path / "trace.json"
+    tool.executor.dump_metrics_trace(str(trace_path))
+    with open(trace_path, 'r', encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    assert len([event for event in events if event["ph"] == "X"]) == 16, "only the latest trace_capacity tasks"
+    assert all(event["name"].endswith("_square") for event in events if event["ph"] == "X")
+
+    csv_path = tmp_path / "metrics.csv"
+    tool.executor.dump_metrics(str(csv_path))
+    with open(csv_path, 'r', encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert [row[1] for row in rows[1:]] == ["queue_wait", "run_time", "callback_latency"]
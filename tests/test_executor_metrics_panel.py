@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+import unreal
+
+from QueryTools.ExecutorMetricsPanel import ExecutorMetricsPanel
+
+
+def test_tick_is_registered_each_time_the_panel_opens():
+    panel = ExecutorMetricsPanel("")
+    tick_count = len(unreal._ticks)
+    panel.on_open()
+    panel.on_open()
+    assert len(unreal._ticks) == tick_count + 1
+    panel.on_close()
+    assert len(unreal._ticks) == tick_count
+
+    assert ExecutorMetricsPanel("") is panel   # reopened
+    panel.on_open()
+    assert panel.tick_handle is not None and len(unreal._ticks) == tick_count + 1
+    panel.on_close()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import importlib
+import threading
+
+from Utilities.ExecutorService import ExecutorService, LANE_IO, LANE_PROCESS, PRIORITY_HIGH, PRIORITY_LOW\
+    , SHARED_MEMORY_THRESHOLD
+
+
+def _sum_bytes(data):
+    return sum(data[::4096])
+
+
+def test_process_lane_passes_large_args_and_results():
+    service = ExecutorService()
+    client = service.create_client("tests")
+    size = SHARED_MEMORY_THRESHOLD * 2
+    try:
+        result = client.submit_to(LANE_PROCESS, None, bytes, args=(size,)).result(timeout=60)
+        assert isinstance(result, bytes) and len(result) == size
+
+        data = bytes(range(256)) * (size // 256)
+        assert client.submit_to(LANE_PROCESS, None, _sum_bytes, args=(data,)).result(timeout=60) == \
+            sum(data[::4096])
+    finally:
+        client.shutdown()
+        service.shutdown_process_pool()
+
+
+def test_utilities_imports_with_a_builtin_unreal(monkeypatch):
+    # imported here, this module is imported by the worker processes too, which have no unreal
+    import unreal
+    import Utilities
+    # the unreal module of the editor is created through the C API, its __spec__ is None
+    monkeypatch.setattr(unreal, "__spec__", None)
+    importlib.reload(Utilities)
+    assert Utilities.get_selected_actors is Utilities.Utils.get_selected_actors
+
+
+def _blocked_service():
+    # one worker, blocked until the returned event is set, so the next tasks stay queued
+    service = ExecutorService(lanes={LANE_IO: 1})
+    release = threading.Event()
+    blocker = service.create_client("blocker")
+    blocker.submit(release.wait, 30)
+    return service, release
+
+
+def test_lanes_run_by_priority_and_quota():
+    service, release = _blocked_service()
+    order = []
+    low = service.create_client("low", priority=PRIORITY_LOW)
+    high = service.create_client("high", priority=PRIORITY_HIGH)
+    low.submit(order.append, "low")
+    high.submit(order.append, "high")
+    release.set()
+    assert low.wait(timeout=30) and high.wait(timeout=30)
+    assert order == ["high", "low"]
+
+    service.configure_lane(LANE_IO, 4)
+    running = []
+    lock = threading.Lock()
+    peak = [0]
+
+    def _task():
+        with lock:
+            running.append(1)
+            peak[0] = max(peak[0], len(running))
+        threading.Event().wait(0.01)
+        with lock:
+            running.pop()
+
+    quoted = service.create_client("quoted", quota=1)
+    for _ in range(8):
+        quoted.submit(_task)
+    assert quoted.wait(timeout=30)
+    assert peak[0] == 1
+    assert len(service.lanes[LANE_IO].threads) <= 4
+
+
+def test_closing_a_client_only_cancels_its_queued_tasks():
+    service, release = _blocked_service()
+    closing = service.create_client("closing")
+    other = service.create_client("other")
+    closing_futures = [closing.submit(int, i) for i in range(3)]
+    other_futures = [other.submit(int, i) for i in range(3)]
+    closing.shutdown(wait=False, cancel_futures=True)
+    release.set()
+    assert all(future.cancelled() for future in closing_futures)
+    assert [future.result(timeout=30) for future in other_futures] == [0, 1, 2]
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+import unreal
+
+from QueryTools import Utils
+from QueryTools.ObjectDetailViewer import ObjectDetailViewer
+
+
+class _Target(object):
+    def __init__(self, count):
+        for i in range(count):
+            setattr(self, f"value_{i:03d}", i)
+
+
+@pytest.fixture
+def viewer():
+    viewer = ObjectDetailViewer("")
+    viewer.reset()
+    viewer.asyncQuery = True
+    yield viewer
+    viewer.reset()
+    viewer.asyncQuery = False
+    viewer.resolveBudgetPerTick = 0.008
+    viewer.stop_tick()
+
+
+def _shown_names(viewer):
+    items = viewer.data.lists[viewer.ui_detailListLeft]
+    return [name.strip() for name in items[0::2]]
+
+
+def test_query_rows_are_streamed(viewer):
+    target = _Target(50)
+    viewer.resolveBudgetPerTick = 0     # one attribute per step
+    viewer.clear_and_query(target, False)
+    unreal.tick()
+    job = viewer.queryJobs[False]
+    assert job.data is viewer.left and viewer.left.bPartial
+    assert 0 < len(_shown_names(viewer)) < 50
+
+    for _ in range(1000):
+        if False not in viewer.queryJobs:
+            break
+        unreal.tick()
+    assert not viewer.left.bPartial
+    assert len(viewer.left.attributes) == len(dir(target))
+    assert len(_shown_names(viewer)) == len(viewer.left.filtered_attributes)
+
+
+def test_cancelled_partial_detail_is_queried_again(viewer):
+    first = _Target(5)
+    viewer.clear_and_query(first, False)
+    unreal.tick(20)
+    viewer.resolveBudgetPerTick = 0
+    viewer.query_and_push(_Target(30), "child", bPush=True, bRight=False)
+    unreal.tick()
+    partial = viewer.left
+    assert partial.bPartial
+    viewer.query_and_push(_Target(30), "other", bPush=True, bRight=False)
+    viewer.leftHistory.truncate(2)
+    assert viewer.show_crumb(viewer.leftHistory.top(), False)
+    assert False in viewer.queryJobs   # queried again instead of showing the partial rows
+
+
+class _Class(object):
+    def get_path_name(self):
+        return "/Game/Maps/Level.Level_C"
+
+
+class _Actor(unreal.Object):
+    def get_world(self):
+        return "world"
+
+    def get_class(self):
+        return _Class()
+
+    def get_name(self):
+        return "actor"
+
+    def get_path_name(self):
+        return "/Game/Maps/Level.Level:PersistentLevel.actor"
+
+
+def test_world_query_is_cancelled_on_teardown(viewer):
+    viewer.clear_and_query(_Target(5), False)
+    unreal.tick(20)
+    viewer.query_and_push(_Actor(), "actor", bPush=False, bRight=False)
+    assert False in viewer.queryJobs
+    viewer.on_map_changed("TearDownWorld")
+    assert False not in viewer.queryJobs
+
+
+def test_worker_doesnt_block_other_rows():
+    started = threading.Event()
+
+    class _Slow(object):
+        @property
+        def slow(self):
+            started.set()
+            time.sleep(0.5)
+            return 1
+
+        fast = 2
+
+    target = _Slow()
+    rows = {attr.name: attr for attr in Utils.ll(target, lazy=True)}
+    slow = rows["slow"]
+    fast = Utils.attr_detail(target, "fast", rows["fast"].meta, lazy=True)
+    while Utils._get_row_lock(fast) is Utils._get_row_lock(slow):
+        fast = Utils.attr_detail(target, "fast", rows["fast"].meta, lazy=True)
+    worker = threading.Thread(target=slow.resolve)
+    worker.start()
+    assert started.wait(5)
+    t = time.perf_counter()
+    assert fast.resolve() == 2
+    assert time.perf_counter() - t < 0.25
+    worker.join()
+
+
+def test_the_window_is_rendered_first(viewer):
+    viewer.asyncQuery = False
+    viewer.clear_and_query(_Target(300), False)
+    data = viewer.left
+    window_end = viewer.get_window_end(data)
+    assert len(data.filtered_attributes) > window_end
+    assert all(lineId < window_end for lineId in data.pendingLineIds)
+    assert all(lineId >= window_end for lineId in data.backgroundLineIds)
+
+    # a selected line out of the window is rendered at once
+    lineId = len(data.filtered_attributes) - 1
+    viewer.data.get_list_view_multi_column_selection = lambda list_view: [lineId]
+    try:
+        viewer.ui_on_listview_DetailList_selection_changed(False)
+    finally:
+        del viewer.data.get_list_view_multi_column_selection
+    assert lineId not in data.pendingLineSet
+    assert viewer.data.lists[viewer.ui_detailListLeft][lineId * 2 + 1] == "299"
+
+    # the others are rendered after the window
+    for _ in range(1000):
+        if not data.pendingLineSet:
+            break
+        unreal.tick()
+    assert not data.pendingLineSet and not data.backgroundLineIds
+    items = viewer.data.lists[viewer.ui_detailListLeft]
+    line = data.filtered_attributes.index(next(attr for attr in data.filtered_attributes if attr.name == "value_122"))
+    assert items[line * 2 + 1] == "122"
+
+
+def test_long_containers_are_cut_before_formatting():
+    value = list(range(1000000))
+    text = Utils.format_limited(value, 200)
+    assert 200 < len(text) < 1000
+    assert text.startswith("[0, 1, 2")
+    assert Utils.format_limited([1, 2], 200) == "[1, 2]"
+
+
+def test_watch_updates_the_compare(viewer):
+    viewer.asyncQuery = False
+    viewer.compareMode = True
+    viewer.watchInterval = 0
+    left, right = _Target(3), _Target(3)
+    viewer.clear_and_query(left, False)
+    viewer.clear_and_query(right, True)
+    unreal.tick(10)
+    assert not viewer.differ.is_changed("value_001")
+    viewer.ui_on_checkbox_Watch_state_changed(True)
+    try:
+        unreal.tick(5)   # the first round only records the fingerprints
+        right.value_001 = 10
+        unreal.tick(5)
+        assert viewer.differ.is_changed("value_001")
+    finally:
+        viewer.ui_on_checkbox_Watch_state_changed(False)
+        viewer.compareMode = False
+
+
+def test_streamed_rows_rebuild_the_compare_index(viewer):
+    viewer.compareMode = True
+    viewer.resolveBudgetPerTick = 0
+    left, right = _Target(30), _Target(30)
+    right.value_029 = -1
+    viewer.clear_and_query(left, False)
+    viewer.clear_and_query(right, True)
+    unreal.tick()
+    viewer.apply_compare_if_needed()    # built while both sides are partial
+    for _ in range(1000):
+        if not viewer.queryJobs:
+            break
+        unreal.tick()
+    viewer.apply_compare_if_needed()
+    assert viewer.differ.is_changed("value_029")
+    viewer.compareMode = False
+
+
+def test_search_evaluates_the_lazy_values_in_one_batch(viewer, monkeypatch):
+    viewer.asyncQuery = False
+    viewer.clear_and_query(_Target(30), False)
+    batches = []
+    call_batch = Utils.call_batch
+    monkeypatch.setattr(Utils, "call_batch", lambda metas: (batches.append(list(metas)), call_batch(metas))[1])
+    viewer.leftSearchText = "29"
+    viewer.apply_search_filter("29", False)
+    unreal.tick()
+    assert batches and len(batches[0]) > 1
+    assert [attr.name for attr in viewer.left.filtered_attributes if attr.name.startswith("value_")] == ["value_029"]
+
+
+def test_extended_search_only_scans_the_last_result(viewer, monkeypatch):
+    viewer.asyncQuery = False
+    viewer.clear_and_query(_Target(100), False)
+    data = viewer.left
+    scanned = []
+    match = data._match
+    monkeypatch.setattr(data, "_match", lambda candidates, *args: (scanned.append(len(candidates))
+                                                                   , match(candidates, *args))[1])
+    hidden_mask = viewer.get_hidden_kind_mask()
+    first = data.search("value_01", hidden_mask)
+    assert scanned[-1] == len(data.attributes)
+    found = [data.attributes[i].name for i in data.search("value_012", hidden_mask)]
+    assert [name for name in found if name.startswith("value_")] == ["value_012"]
+    assert scanned[-1] == len(first)
+    # a shorter text, or other hidden kinds, scans all again
+    data.search("value_0", hidden_mask)
+    assert scanned[-1] == len(data.attributes)
+
+
+def test_text_changed_events_are_coalesced(viewer, monkeypatch):
+    viewer.asyncQuery = False
+    viewer.clear_and_query(_Target(10), False)
+    unreal.tick(5)
+    applied = []
+    apply_search_filter = viewer.apply_search_filter
+    monkeypatch.setattr(viewer, "apply_search_filter", lambda text, bRight: (applied.append(text)
+                                                                             , apply_search_filter(text, bRight)))
+    for text in ["v", "va", "val", "value_003"]:
+        viewer.on_searchbox_FilterLeft_text_changed(text)
+    assert not applied
+    unreal.tick()
+    assert applied == ["value_003"]
+    assert [attr.name for attr in viewer.left.filtered_attributes if attr.name.startswith("value_")] == ["value_003"]
+
+
+class _Counted(object):
+    reads = 0
+
+    @property
+    def counted(self):
+        _Counted.reads += 1
+        return _Counted.reads
+
+
+def test_category_toggles_dont_query_again(viewer, monkeypatch):
+    viewer.asyncQuery = False
+    viewer.clear_and_query(_Counted(), False)
+    unreal.tick(5)
+    queries = []
+    query_and_push = viewer.query_and_push
+    monkeypatch.setattr(viewer, "query_and_push", lambda *args, **kwargs: (queries.append(args)
+                                                                           , query_and_push(*args, **kwargs))[1])
+    reads = _Counted.reads
+    viewer.ui_on_checkbox_ShowProperties_state_changed(False)
+    assert "counted" not in [attr.name for attr in viewer.left.filtered_attributes]
+    viewer.ui_on_checkbox_ShowProperties_state_changed(True)
+    unreal.tick(5)
+    assert "counted" in [attr.name for attr in viewer.left.filtered_attributes]
+    assert not queries and _Counted.reads == reads
+
+    viewer.refresh_values()
+    unreal.tick(5)
+    assert len(queries) == 1 and _Counted.reads > reads
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from QueryTools import Snapshot
+
+
+class _Target(object):
+    def __init__(self, value):
+        self.value = value
+
+
+def test_missing_snapshot_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Snapshot.diff_snapshots(str(tmp_path / "missing.jsonl"), Snapshot.LiveSource(_Target(1)), bPrint=False)
+
+
+def test_live_objects_need_live_source():
+    with pytest.raises(TypeError):
+        Snapshot.diff_snapshots(_Target(1), Snapshot.LiveSource(_Target(1)), bPrint=False)
+
+
+def test_diff_snapshot_and_live_object(tmp_path):
+    target = _Target(1)
+    file_path = str(tmp_path / "target.jsonl.gz")
+    assert Snapshot.export_snapshot(target, file_path) > 0
+    target.value = 2
+    result = Snapshot.diff_snapshots(file_path, Snapshot.LiveSource(target), bPrint=False)
+    assert "value" in result.changed_names()
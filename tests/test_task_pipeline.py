@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+import unreal
+
+from Utilities.ChameleonTaskExecutor import ChameleonTaskExecutor
+from Utilities.TaskPipeline import TaskPipeline
+
+
+class _Tool(object):
+    def __init__(self):
+        self.data = unreal.PythonBPLib.get_chameleon_data("")
+        self.executor = ChameleonTaskExecutor(self)
+
+
+def _items(count):
+    return list(range(count))
+
+
+def _square(x):
+    return x * x
+
+
+def _total(values):
+    return sum(values)
+
+
+def _fail():
+    raise ValueError("failed")
+
+
+def test_pipeline_result():
+    tool = _Tool()
+    pipeline = TaskPipeline(tool.executor)
+    pipeline.add("items", _items, args=[100])
+    pipeline.add_map("squares", _square, dep="items", chunk_size=7)
+    pipeline.add("total", _total, deps=["squares"])
+    future_id = pipeline.run()
+    result = tool.executor.get_future(future_id).result(timeout=30)
+    assert result["total"] == sum(i * i for i in range(100))
+    assert not pipeline._task_futures
+
+
+def test_failed_task_cancels_the_pipeline():
+    tool = _Tool()
+    release = threading.Event()
+    pipeline = TaskPipeline(tool.executor)
+    pipeline.add("slow", release.wait, args=[30])
+    pipeline.add("fail", _fail)
+    future = tool.executor.get_future(pipeline.run())
+    with pytest.raises(ValueError):
+        future.result(timeout=30)
+    release.set()
+    assert tool.executor.executor.wait(timeout=30)
+
+
+def test_executor_map_keeps_the_order_and_bounds_the_chunks():
+    tool = _Tool()
+    assert list(tool.executor.map(_square, range(100), chunk_size=3, max_chunks_in_flight=2)) \
+        == [i * i for i in range(100)]
+    results = tool.executor.map(_square, range(100), chunk_size=10, max_chunks_in_flight=2)
+    assert next(results) == 0
+    results.close()     # the chunks not consumed are cancelled
+    assert tool.executor.executor.wait(timeout=30)
+    assert tool.executor.running_count == tool.executor.pending_count == 0